@@ -0,0 +1,196 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+import json
+import os
+import time
+
+_MANIFEST_VERSION = 1
+_RACY_NS = 2 * 10**9
+"""Directories modified less than this many nanoseconds before a scan are scanned again the next time, as files
+added within the resolution of the file system clock would not change their mtime."""
+
+
+class DirectoryScanner():
+    """
+    Finds the sample files that have been added to or removed from the subdirectories of a directory, like the
+    training directory. Only files directly within the subdirectories are taken into account, like the shard
+    directories created by 'Project.create_sample_id'.
+
+    The scanner keeps a manifest with the mtime of each subdirectory and the names of the files found in it. A
+    subdirectory whose mtime has not changed since the last scan is not read again, as adding, removing, or
+    renaming a file changes the mtime of its directory. The manifest is persisted, so even the first scan of a
+    session only reads the directories that have changed. The file names are kept as one string per directory
+    and only split into a set for the directories that have changed.
+
+    Given the paths the caller knows about, like the raw files in the sample file index, the files in the
+    manifest are compared with those instead of with the last scan. This way, files the caller has lost track
+    of, like after the index has been deleted or reset, are reported as added again.
+    """
+
+    root: Path
+    """The directory whose subdirectories are scanned."""
+    manifest_path: Path
+    """The file the manifest is persisted to."""
+    suffixes: Tuple[str, ...]
+    """Suffixes of the files that are looked for."""
+    _dirs: Dict[str, Tuple[int | None, str]] | None
+    """Maps the names of the subdirectories to their mtime in nanoseconds and the names of their files, separated
+    by line breaks. The mtime is None if the directory has to be scanned again. None if no manifest is known."""
+    pending: bool
+    """True if directories have been scanned since the manifest has been written or read."""
+
+    def __init__(self, root: Path, manifest_path: Path, suffixes: Tuple[str, ...] = ('.html', '.htm')) -> None:
+        """
+        root: Path
+        The directory whose subdirectories are scanned.
+
+        manifest_path: Path
+        The file the manifest is persisted to. Its directory is created when the manifest is written.
+
+        suffixes: Tuple[str, ...] = ('.html', '.htm')
+        Suffixes of the files that are looked for.
+        """
+        self.root = root
+        self.manifest_path = manifest_path
+        self.suffixes = suffixes
+        self._dirs = None
+        self.pending = False
+
+    def scan(self, known: Iterable[str] | None = None, write_on_update: bool = True) -> Tuple[List[str], List[str]]:
+        """
+        Scans the subdirectories that have changed since the last scan.
+
+        known: Iterable[str] | None = None
+        Paths, relative to the root, the caller already knows about, like the raw files in the sample file index.
+        If given, the files found are compared with these paths: files that are not known count as added, known
+        paths within the subdirectories that are not found count as removed. Otherwise, the files found are
+        compared with the last scan, and without a manifest, all files found count as added.
+
+        write_on_update: bool = True
+        Write the manifest if a directory has been scanned. Pass False if the files found are recorded elsewhere
+        first, like in the sample file index, and call 'write' once they are. A manifest written before would hide
+        the files from the next scan if recording them fails.
+
+        returns: Tuple[List[str], List[str]]
+        The paths, relative to the root, of the files that have been added and the ones that have been removed.
+        """
+        if self._dirs is None and not self.read():
+            self._dirs = dict()
+
+        added: List[str] = []
+        removed: List[str] = []
+        scanned = 0
+        now = time.time_ns()
+        found: Set[str] = set()
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                found.add(entry.name)
+                mtime = entry.stat().st_mtime_ns
+                last_mtime, last_names = self._dirs.get(entry.name, (None, ''))
+                if mtime == last_mtime:
+                    continue
+
+                names = self._list_files(entry.path)
+                last = set(last_names.split('\n')) if len(last_names) > 0 else set()
+                current = set(names)
+                added.extend(os.path.join(entry.name, name) for name in names if name not in last)
+                removed.extend(os.path.join(entry.name, name) for name in last if name not in current)
+                # the mtime of a directory modified just now may not change when yet another file is added
+                clean = mtime if now - mtime > _RACY_NS else None
+                self._dirs[entry.name] = (clean, '\n'.join(names))
+                scanned += 1
+
+        for name in [name for name in self._dirs if name not in found]:
+            _, last_names = self._dirs.pop(name)
+            if len(last_names) > 0:
+                removed.extend(os.path.join(name, file_name) for file_name in last_names.split('\n'))
+            scanned += 1
+
+        self.pending = self.pending or scanned > 0
+        if write_on_update and scanned > 0:
+            try:
+                self.write()
+            except BaseException as be:
+                print('could not write the scan manifest')
+                print(be)
+        if known is not None:
+            return self._compare(known)
+        return added, removed
+
+    def write(self) -> None:
+        """
+        Writes the manifest. The file is replaced as a whole, never left half written.
+        """
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest = {'version': _MANIFEST_VERSION, 'root': str(self.root), 'dirs': self._dirs or dict()}
+        tmp_path = self.manifest_path.with_name(f'{self.manifest_path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'wt') as file:
+            json.dump(manifest, file)
+        os.replace(tmp_path, self.manifest_path)
+        self.pending = False
+
+    def discard(self) -> None:
+        """
+        Forgets what has been scanned since the manifest has been written. The next scan starts from the written
+        manifest again.
+        """
+        self._dirs = None
+        self.pending = False
+
+    def read(self) -> bool:
+        """
+        Reads the manifest, if it has been written before for the same root. Replaces the current one.
+
+        returns: bool
+        True if the manifest has been read.
+        """
+        if not self.manifest_path.exists():
+            return False
+        try:
+            with open(self.manifest_path, 'rt') as file:
+                manifest = json.load(file)
+        except BaseException as be:
+            print('could not read the scan manifest')
+            print(be)
+            return False
+        if manifest.get('version') != _MANIFEST_VERSION or manifest.get('root') != str(self.root):
+            return False
+        self._dirs = {name: (mtime, names) for name, (mtime, names) in manifest['dirs'].items()}
+        self.pending = False
+        return True
+
+    def _compare(self, known: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        Compares the files in the manifest with the known paths. Known paths that are not located directly within
+        a subdirectory are left out.
+        """
+        known_paths = set(str(path) for path in known)
+        listed: Set[str] = set()
+        added: List[str] = []
+        for directory, (_, names) in self._dirs.items():  # type: ignore
+            if len(names) == 0:
+                continue
+            for name in names.split('\n'):
+                path = os.path.join(directory, name)
+                listed.add(path)
+                if path not in known_paths:
+                    added.append(path)
+        removed = [path for path in known_paths if path not in listed and _in_subdir(path)]
+        return added, sorted(removed)
+
+    def _list_files(self, directory: str) -> List[str]:
+        with os.scandir(directory) as entries:
+            return sorted(entry.name for entry in entries
+                          if entry.name.endswith(self.suffixes) and entry.is_file())
+
+
+
+def _in_subdir(path: str) -> bool:
+    """
+    returns: bool
+    True if the path, relative to the root, is located directly within a subdirectory.
+    """
+    directory = os.path.dirname(path)
+    return len(directory) > 0 and len(os.path.dirname(directory)) == 0
@@ -0,0 +1,240 @@
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Tuple
+import sqlite3
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from pandas.api.extensions import ExtensionArray
+from rate_texts.tools import keys
+
+CSV = 'csv'
+"""Index format: the whole index as a csv file, rewritten on every write."""
+SQLITE = 'sqlite'
+"""Index format: a SQLite database with typed columns, only changed rows are written."""
+_TABLE = 'samples'
+_ROW = '_row'
+"""Column of the table that holds the index of the data frame."""
+_TYPES: Dict[str, str] = {keys.RAW_FILE: 'TEXT', keys.PREP_FILE: 'TEXT', keys.ORIGIN: 'TEXT', keys.LANGUAGE: 'TEXT',
+                          keys.RATING: 'INTEGER', keys.LABELED_BY: 'TEXT', keys.USAGE: 'TEXT'}
+"""Types of the known columns of the sample file index."""
+
+
+def make_empty_index() -> pd.DataFrame:
+    """
+    returns: pandas.DataFrame
+    A new, empty sample file index.
+    """
+    return pd.DataFrame(
+        [], columns=[keys.RAW_FILE, keys.PREP_FILE, keys.ORIGIN, keys.LANGUAGE, keys.RATING, keys.LABELED_BY, keys.USAGE])
+
+
+class CsvIndex():
+    """
+    Stores the sample file index as a csv file. The file is rewritten as a whole on every write, and the columns
+    are untyped. Kept for projects created by former versions.
+    """
+
+    path: Path
+    """The csv file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def exists(self) -> bool:
+        """
+        returns: bool
+        True if the index has been written before.
+        """
+        return self.path.exists()
+
+    def read(self) -> pd.DataFrame:
+        """
+        Reads the sample file index. Does not take care of I/O errors!
+
+        returns: pandas.DataFrame
+        The sample file index.
+        """
+        return pd.read_csv(self.path, index_col=0)
+
+    def write(self, file_data: pd.DataFrame) -> int:
+        """
+        Writes the sample file index.
+
+        file_data: pandas.DataFrame
+        The sample file index.
+
+        returns: int
+        Number of rows written.
+        """
+        file_data.to_csv(self.path, index=True)
+        return len(file_data)
+
+
+class SqliteIndex():
+    """
+    Stores the sample file index in a SQLite database. The known columns are typed, see '_TYPES'. Columns the
+    index gains later on are added to the table, as REAL if they are numeric and as TEXT otherwise.
+
+    The index keeps a copy of the data frame it has read or written last. On a write, the data frame is compared
+    with this copy, and only the rows that have been added, changed, or removed are written, in a single
+    transaction. The rows keep the order they have been added in.
+    """
+
+    path: Path
+    """The database file."""
+    _last: pd.DataFrame | None
+    """The sample file index as it has been read or written last. None if not known."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._last = None
+
+    def exists(self) -> bool:
+        """
+        returns: bool
+        True if the index has been written before.
+        """
+        return self.path.exists()
+
+    def read(self) -> pd.DataFrame:
+        """
+        Reads the sample file index. Does not take care of I/O errors!
+
+        returns: pandas.DataFrame
+        The sample file index. Missing values are NaN, like in an index read from csv.
+        """
+        with closing(self._connect()) as con:
+            file_data = pd.read_sql_query(
+                f'SELECT * FROM "{_TABLE}" ORDER BY rowid', con, index_col=_ROW)
+        file_data.index.name = None
+        for column in file_data.columns:
+            if file_data[column].dtype == object:
+                file_data[column] = file_data[column].where(file_data[column].notna(), np.nan)
+        self._last = file_data.copy()
+        return file_data
+
+    def write(self, file_data: pd.DataFrame) -> int:
+        """
+        Writes the rows of the sample file index that have changed since it has been read or written last. Writes
+        all rows if the index has not been read before.
+
+        file_data: pandas.DataFrame
+        The sample file index.
+
+        returns: int
+        Number of rows written or removed.
+        """
+        if not file_data.index.is_unique:
+            file_data = file_data[~file_data.index.duplicated(keep='last')]
+        with closing(self._connect()) as con, con:
+            existing = self._get_columns(con)
+            for column in file_data.columns:
+                if column not in existing:
+                    con.execute(f'ALTER TABLE "{_TABLE}" ADD COLUMN "{_quote(column)}" {_get_type(file_data[column])}')
+
+            last = self._last
+            if last is None:
+                # the content of the database is unknown, start over
+                con.execute(f'DELETE FROM "{_TABLE}"')
+                changed = file_data
+                removed: List[str] = []
+            else:
+                mask, gone = _find_changed(file_data, last)
+                changed = file_data.loc[mask]
+                removed = [str(row) for row in gone]
+
+            columns = list(file_data.columns)
+            names = ', '.join(f'"{_quote(column)}"' for column in [_ROW] + columns)
+            updates = ', '.join(f'"{_quote(column)}" = excluded."{_quote(column)}"' for column in columns)
+            marks = ', '.join('?' for _ in range(len(columns) + 1))
+            sql = f'INSERT INTO "{_TABLE}" ({names}) VALUES ({marks})'
+            if len(columns) > 0:
+                sql += f' ON CONFLICT("{_ROW}") DO UPDATE SET {updates}'
+            else:
+                sql += f' ON CONFLICT("{_ROW}") DO NOTHING'
+            con.executemany(sql, _to_records(changed))
+            con.executemany(f'DELETE FROM "{_TABLE}" WHERE "{_ROW}" = ?', [(row,) for row in removed])
+        self._last = file_data.copy()
+        return len(changed) + len(removed)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens the database and creates the table if there is none yet. Used as context manager, the connection
+        commits the transaction in the end, or rolls it back on an error, but it is not closed.
+        """
+        con = sqlite3.connect(self.path)
+        columns = ', '.join(f'"{_quote(column)}" {sql_type}' for column, sql_type in _TYPES.items())
+        con.execute(f'CREATE TABLE IF NOT EXISTS "{_TABLE}" ("{_ROW}" TEXT PRIMARY KEY, {columns})')
+        return con
+
+    def _get_columns(self, con: sqlite3.Connection) -> List[str]:
+        return [info[1] for info in con.execute(f'PRAGMA table_info("{_TABLE}")')]
+
+
+def _find_changed(file_data: pd.DataFrame, last: pd.DataFrame) -> Tuple[npt.NDArray[np.bool_], pd.Index]:
+    """
+    Finds the rows of 'file_data' that are new or differ from the ones in 'last', and the rows of 'last' that
+    have been removed. The columns are compared one by one as arrays, which is much faster than comparing the data
+    frames. The common cases of an unchanged set of rows and of rows appended to the end need no alignment by the
+    index.
+    """
+    changed = np.ones(len(file_data), dtype=bool)
+    n_last = len(last)
+    if file_data.index[:n_last].equals(last.index):
+        positions = np.arange(n_last)
+        old = last
+        removed = last.index[:0]
+    else:
+        positions = np.flatnonzero(file_data.index.isin(last.index))
+        old = last.loc[file_data.index[positions]]
+        removed = last.index[~last.index.isin(file_data.index)]
+    same = np.ones(len(positions), dtype=bool)
+    for column in file_data.columns:
+        if column not in old.columns:
+            same[:] = False
+            break
+        same &= _equal(file_data[column].array.take(positions), old[column].array)
+    changed[positions[same]] = False
+    return changed, removed
+
+
+def _equal(new: ExtensionArray, old: ExtensionArray) -> npt.NDArray[np.bool_]:
+    """
+    Compares two columns element by element. Two missing values count as equal.
+    """
+    # plain numpy arrays compare faster than pandas' string arrays, which look for missing values first
+    new_values = np.asarray(new, dtype=object)
+    old_values = np.asarray(old, dtype=object)
+    equal = np.array(new_values == old_values, dtype=bool)
+    # missing values are never equal, check the few remaining rows for them
+    differ = np.flatnonzero(~equal)
+    equal[differ] = pd.isna(new_values[differ]) & pd.isna(old_values[differ])
+    return equal
+
+
+def _to_records(file_data: pd.DataFrame) -> List[tuple]:
+    """
+    Turns the rows into tuples for the database, the index first. Missing values become NULL.
+    """
+    values = file_data.astype(object).where(file_data.notna(), None)
+    records = []
+    for row, *cells in values.itertuples(name=None):
+        records.append(tuple([str(row)] + [_to_sql(cell) for cell in cells]))
+    return records
+
+
+def _to_sql(cell):
+    if isinstance(cell, np.generic):
+        return cell.item()
+    return cell
+
+
+def _get_type(column: pd.Series) -> str:
+    if column.name in _TYPES:
+        return _TYPES[str(column.name)]
+    return 'REAL' if pd.api.types.is_numeric_dtype(column) else 'TEXT'
+
+
+def _quote(name: str) -> str:
+    return str(name).replace('"', '""')
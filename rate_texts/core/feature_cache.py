@@ -0,0 +1,205 @@
+from hashlib import sha256
+from pathlib import Path
+from typing import List, Tuple
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from rate_texts.tools import keys
+from rate_texts.core.sample_store import FileStore, ShardStore
+
+_META = 'meta.json'
+_DATA = 'data.npy'
+_INDICES = 'indices.npy'
+_INDPTR = 'indptr.npy'
+_LABELS = 'labels.npy'
+_ROWS = 'rows.npy'
+_VERSION = 3
+"""Version of the layout of the entries and of their keys. Increase it when either changes."""
+
+
+def fingerprint_rows(file_data: pd.DataFrame, usage: str, samples: FileStore | ShardStore | None = None) -> str | None:
+    """
+    Computes a fingerprint of the rows of the sample file index that make up the samples of a usage, i.e., the
+    labeled samples of that usage that have been prepared. The fingerprint changes if a sample is added or
+    removed, or if its prepared file or its label changes. With the store of the samples, it also changes if any
+    sample of the store is written, like a prepared file written again under the same name, see
+    'FileStore.version'. The columns are hashed as a whole, and the store is only looked at per directory, so
+    the fingerprint takes little time even for a large index.
+
+    file_data: pandas.DataFrame
+    The sample file index.
+
+    usage: str
+    The usage, like 'train' or 'test'.
+
+    samples: FileStore | ShardStore | None = None
+    The store of the prepared files.
+
+    returns: str | None
+    The fingerprint as hex string. None if the store has been written too recently to tell whether it changes.
+    """
+    idx = ((file_data[keys.USAGE] == usage) & file_data[keys.RATING].notna() &
+           file_data[keys.PREP_FILE].notna()).to_numpy()
+    digest = sha256()
+    # numpy arrays turned into lists are joined much faster than the columns themselves
+    for values in [file_data.index.to_numpy()[idx], file_data[keys.PREP_FILE].to_numpy()[idx]]:
+        digest.update('\0'.join(map(str, values.tolist())).encode('utf-8'))
+        digest.update(b'\n')
+    digest.update(file_data[keys.RATING].to_numpy(dtype=np.float64, na_value=np.nan)[idx].tobytes())
+    if samples is not None:
+        version = samples.version()
+        if version is None:
+            return None
+        digest.update(version.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class FeatureCache():
+    """
+    Cache of feature matrices on disk. An entry holds the feature matrix of the samples of a usage together with
+    their labels. It is keyed by the fingerprint of the feature extractor, the ngram range, the usage, and the
+    fingerprint of the rows of the sample file index.
+
+    The feature matrix is stored as the three arrays of its CSR form, each in a .npy file, so it is memory mapped
+    when it is loaded instead of being read.
+
+    The mtime of the meta file of an entry is its last use. When an entry is added, the least recently used
+    entries are evicted until all entries together take up at most 'max_bytes'. The entry just added is kept
+    even if it alone exceeds the bound.
+    """
+
+    directory: Path
+    """The cache directory."""
+    max_bytes: int
+    """Maximum total size of the entries."""
+
+    def __init__(self, directory: Path, max_bytes: int = 2**30) -> None:
+        """
+        directory: Path
+        The cache directory. It is created when the first entry is added.
+
+        max_bytes: int = 2**30
+        Maximum total size of the entries.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def make_key(self, features: str, ngram_range: Tuple[int, int], usage: str, rows_fingerprint: str) -> str:
+        """
+        Computes the key of an entry.
+
+        features: str
+        Fingerprint of the feature extractor, i.e. the hash of the vocabulary or the width of the hashed features.
+
+        ngram_range: Tuple[int, int]
+        The ngram range of the vocabulary.
+
+        usage: str
+        The usage of the samples.
+
+        rows_fingerprint: str
+        Fingerprint of the rows of the sample file index, see 'fingerprint_rows'.
+
+        returns: str
+        The key.
+        """
+        parts = [_VERSION, features, list(ngram_range), usage, rows_fingerprint]
+        return sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+    def load(self, key: str) -> Tuple[sparse.csr_matrix, pd.Series] | None:
+        """
+        Opens an entry. The arrays of the feature matrix are memory mapped read only.
+
+        key: str
+        Key of the entry.
+
+        returns: Tuple[scipy.sparse.csr_matrix, pandas.Series] | None
+        The feature matrix and the labels, indexed like the sample file index. None if there is no such entry.
+        """
+        path = Path(self.directory, key)
+        if not Path(path, _META).exists():
+            return None
+        with open(Path(path, _META), 'rt') as file:
+            shape = tuple(json.load(file)['shape'])
+        os.utime(Path(path, _META))  # used just now
+        data = np.load(Path(path, _DATA), mmap_mode='r')
+        indices = np.load(Path(path, _INDICES), mmap_mode='r')
+        indptr = np.load(Path(path, _INDPTR), mmap_mode='r')
+        features = sparse.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+        labels = pd.Series(np.load(Path(path, _LABELS)), index=np.load(Path(path, _ROWS)), name=keys.RATING)
+        return (features, labels)
+
+    def store(self, key: str, features: sparse.spmatrix, labels: pd.Series) -> None:
+        """
+        Adds an entry. An existing entry with the same key is replaced.
+
+        key: str
+        Key of the entry.
+
+        features: scipy.sparse.spmatrix
+        The feature matrix.
+
+        labels: pandas.Series
+        The labels, indexed like the sample file index.
+        """
+        features = sparse.csr_matrix(features)
+        path = Path(self.directory, key)
+        tmp_path = Path(self.directory, f'{key}.{os.getpid()}.tmp')
+        tmp_path.mkdir(parents=True, exist_ok=True)
+        np.save(Path(tmp_path, _DATA), features.data)
+        np.save(Path(tmp_path, _INDICES), features.indices)
+        np.save(Path(tmp_path, _INDPTR), features.indptr)
+        values = labels.to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        np.save(Path(tmp_path, _LABELS), values)
+        np.save(Path(tmp_path, _ROWS), labels.index.to_numpy().astype(str))
+        # the meta file comes last, an entry without it does not count
+        with open(Path(tmp_path, _META), 'wt') as file:
+            json.dump({'shape': list(features.shape)}, file)
+
+        if path.exists():
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+        self.evict(keep=key)
+
+    def evict(self, keep: str | None = None) -> List[str]:
+        """
+        Evicts the least recently used entries until the entries take up at most 'max_bytes'. Entries that are
+        incomplete, like ones left by a crashed process, are evicted first.
+
+        keep: str | None = None
+        Key of an entry that is never evicted.
+
+        returns: List[str]
+        The keys of the evicted entries.
+        """
+        if not self.directory.exists():
+            return []
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as dirs:
+            for entry in dirs:
+                if not entry.is_dir() or entry.name.endswith('.tmp'):
+                    continue
+                with os.scandir(entry.path) as files:
+                    size = sum(file.stat().st_size for file in files if file.is_file())
+                try:
+                    last_use = Path(entry.path, _META).stat().st_mtime_ns
+                except FileNotFoundError:
+                    last_use = -1
+                entries.append((last_use, entry.name, size))
+                total += size
+        evicted = []
+        for last_use, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(Path(self.directory, name), ignore_errors=True)
+            total -= size
+            evicted.append(name)
+        return evicted
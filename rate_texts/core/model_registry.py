@@ -0,0 +1,231 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+import os
+from rate_texts.models.model_wrapper import FEATURES_SUFFIX, ModelWrapper
+
+SUFFIXES = ('.keras', '.sklearn')
+"""File suffixes of the supported models."""
+DEFAULT_MAX_BYTES = 2**30
+"""Default bound of the summed file sizes of the loaded models."""
+
+
+class ModelRegistry():
+    """
+    Loads the models of a model directory and keeps them in memory, so models that are evaluated or served
+    repeatedly are only deserialized once.
+
+    The model files, the ones with a supported suffix, are indexed by their names the first time a model is looked
+    for. The directory is only listed again if a model is not in the index, like one that has been written since by
+    another process. A loaded model is reused as long as the mtime and the size of its file and of the description
+    of its features have not changed, the model is loaded again otherwise.
+
+    The loaded models are bounded by the summed size of their files, which serves as an estimate of the memory they
+    take. If the bound is exceeded, the model that has not been used for the longest time is dropped. The model
+    used last is kept even if it alone exceeds the bound.
+    """
+
+    model_dir: Path
+    """The directory of the model files."""
+    max_bytes: int
+    """Bound of the summed file sizes of the loaded models."""
+    loaded_bytes: int
+    """Summed file sizes of the loaded models."""
+    hits: int
+    """Number of requests answered with a model in memory."""
+    misses: int
+    """Number of requests that loaded a model from its file."""
+    _files: Dict[str, Path] | None
+    """Maps the model names to their files. None until the directory has been listed."""
+    _models: OrderedDict[str, Tuple[ModelWrapper, int, int, Tuple[int, int] | None]]
+    """Maps the names of the loaded models to the models, the mtime in nanoseconds and the size of their files, and
+    the mtime and the size of the description of their features, None if there is none. The most recently used
+    models are at the end."""
+
+    def __init__(self, model_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        model_dir: Path
+        The directory of the model files.
+
+        max_bytes: int = 2**30
+        Bound of the summed file sizes of the loaded models.
+        """
+        self.model_dir = model_dir
+        self.max_bytes = max_bytes
+        self.loaded_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._files = None
+        self._models = OrderedDict()
+
+    def __getstate__(self) -> Dict:
+        # the loaded models are not shipped to worker processes
+        return {'model_dir': self.model_dir, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(state['model_dir'], state['max_bytes'])
+
+    def __contains__(self, name: str) -> bool:
+        """
+        returns: bool
+        True if the model is loaded, no matter if its file has changed since.
+        """
+        return name in self._models
+
+    def names(self) -> List[str]:
+        """
+        Lists the model directory again.
+
+        returns: List[str]
+        The names of all models in the model directory.
+        """
+        self._index()
+        return sorted(self._files)  # type: ignore
+
+    def get(self, name: str) -> ModelWrapper:
+        """
+        Gets a model, from memory if its file has not changed since it has been loaded.
+
+        name: str
+        Name of the model. This is also the file name without suffix.
+
+        returns: ModelWrapper
+        The wrapped model. The same instance is returned for each request, until the file or the description of
+        the features changes.
+
+        raises FileNotFoundError:
+        If there is no model file with the name and a supported suffix.
+        """
+        file = self._find(name)
+        try:
+            stat = file.stat()
+        except FileNotFoundError:
+            # removed since it has been indexed, it may have been written with another suffix
+            self.forget(name)
+            file = self._find(name)
+            stat = file.stat()
+
+        features = _stat_features(file, name)
+        entry = self._models.get(name)
+        if entry is not None and entry[1:] == (stat.st_mtime_ns, stat.st_size, features):
+            self._models.move_to_end(name)
+            self.hits += 1
+            return entry[0]
+
+        self.forget(name, keep_file=True)
+        model = load_model_file(file, name)
+        self._models[name] = (model, stat.st_mtime_ns, stat.st_size, features)
+        self.loaded_bytes += stat.st_size
+        self.misses += 1
+        while self.loaded_bytes > self.max_bytes and len(self._models) > 1:
+            _, (_, _, size, _) = self._models.popitem(last=False)
+            self.loaded_bytes -= size
+        return model
+
+    def preload(self, names: Iterable[str]) -> List[str]:
+        """
+        Loads models in advance, for instance the ones that are served right from the start. Models that cannot
+        be loaded are reported to sout and skipped. If the models exceed the bound, the ones named first are
+        dropped again.
+
+        names: Iterable[str]
+        The names of the models.
+
+        returns: List[str]
+        The names of the models that have been loaded.
+        """
+        loaded = []
+        for name in names:
+            try:
+                self.get(name)
+                loaded.append(name)
+            except BaseException as be:
+                print(f'could not preload model {name}')
+                print(be)
+        return loaded
+
+    def forget(self, name: str, keep_file: bool = False) -> None:
+        """
+        Drops a model from memory, like after its file has been written, and from the index of files.
+
+        name: str
+        Name of the model.
+
+        keep_file: bool = False
+        Keep the model in the index of files.
+        """
+        entry = self._models.pop(name, None)
+        if entry is not None:
+            self.loaded_bytes -= entry[2]
+        if not keep_file and self._files is not None:
+            self._files.pop(name, None)
+
+    def clear(self) -> None:
+        """
+        Drops all models from memory and the index of files.
+        """
+        self._models.clear()
+        self.loaded_bytes = 0
+        self._files = None
+
+    def _find(self, name: str) -> Path:
+        if self._files is None or name not in self._files:
+            self._index()
+        try:
+            return self._files[name]  # type: ignore
+        except KeyError:
+            raise FileNotFoundError('No model file with the provided name')
+
+    def _index(self) -> None:
+        files: Dict[str, Path] = dict()
+        if self.model_dir.exists():
+            with os.scandir(self.model_dir) as entries:
+                for entry in entries:
+                    path = Path(entry.path)
+                    # the model index and the descriptions of the features are no models
+                    if path.suffix in SUFFIXES and entry.is_file():
+                        files[path.stem] = path
+        self._files = files
+
+
+def _stat_features(file: Path, name: str) -> Tuple[int, int] | None:
+    try:
+        stat = Path(file.parent, f'{name}{FEATURES_SUFFIX}').stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_model_file(file: Path, name: str) -> ModelWrapper:
+    """
+    Loads a model file and wraps the model into the wrapper of its kind. The file suffix determines which wrapper
+    is appropriate. The description of the features is read from next to the model file.
+
+    file: Path
+    The model file.
+
+    name: str
+    Name of the model.
+
+    returns: ModelWrapper
+    The wrapped model.
+
+    raises RuntimeError:
+    If the file does not have a supported suffix.
+    """
+    # the model libraries are only imported once a model of their kind is loaded, tensorflow alone takes
+    # seconds to import
+    if file.suffix == '.keras':
+        from tensorflow.keras.models import load_model
+        from rate_texts.models.tfkeras_model import TfKerasModel
+        model = load_model(file)
+        wrap = TfKerasModel(name, model)
+    elif file.suffix == '.sklearn':
+        from joblib import load
+        from rate_texts.models.sklearn_model import SklearnModel
+        model = load(file)
+        wrap = SklearnModel(name, model)
+    else:
+        raise RuntimeError('Unsupported suffix')
+    wrap.read_features(file.parent)
+    return wrap
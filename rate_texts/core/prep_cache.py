@@ -0,0 +1,287 @@
+from collections import OrderedDict
+from hashlib import sha256
+from pathlib import Path
+from typing import BinaryIO
+import json
+import os
+import shutil
+from rate_texts.core.sample_store import FileStore, ShardStore
+
+_INDEX = 'index.json'
+"""File name of the list of cache entries, least recently used first."""
+_ENCODING = 'utf-8'
+
+
+def hash_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    Computes the sha256 hash of the content of a file. The file is read in chunks.
+
+    path: Path
+    The file.
+
+    chunk_size: int = 1048576
+    Number of bytes read at once.
+
+    returns: str
+    The hash as hex string.
+    """
+    with open(path, 'rb') as file:
+        return hash_stream(file, chunk_size)
+
+
+def hash_stream(file: BinaryIO, chunk_size: int = 1 << 20) -> str:
+    """
+    Computes the sha256 hash of the rest of a binary stream. The stream is read in chunks.
+
+    file: BinaryIO
+    The stream.
+
+    chunk_size: int = 1048576
+    Number of bytes read at once.
+
+    returns: str
+    The hash as hex string.
+    """
+    digest = sha256()
+    while True:
+        chunk = file.read(chunk_size)
+        if len(chunk) == 0:
+            break
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PreprocessingCache():
+    """
+    Content addressed cache of prepared samples. An entry is keyed by the hash of the raw file, the fingerprint of
+    the preprocessing pipeline, and the origin and the given language of the sample. It holds the language and the
+    prepared text. Identical raw files are therefore preprocessed only once, no matter where they are located.
+
+    The entries are files in the cache directory, so worker processes can look them up and add them on their own.
+    The list of entries, their sizes, and the order of their last use is only kept by the process that owns the
+    cache and is updated by 'record'. The least recently used entries are evicted if the entries take up more than
+    'max_bytes'.
+    """
+
+    directory: Path
+    """The cache directory."""
+    fingerprint: str
+    """Fingerprint of the configuration of the pipeline the entries are made with."""
+    max_bytes: int
+    """Maximum total size of the entries."""
+    hits: int
+    """Number of samples that have been taken from the cache."""
+    misses: int
+    """Number of samples that have been preprocessed."""
+    _entries: OrderedDict[str, int]
+    """Maps the keys of the entries to their sizes, least recently used first."""
+    _size: int
+    """Total size of the entries."""
+
+    def __init__(self, directory: Path, fingerprint: str, max_bytes: int = 256 * 2**20) -> None:
+        """
+        directory: Path
+        The cache directory. It is created when the first entry is added.
+
+        fingerprint: str
+        Fingerprint of the configuration of the pipeline.
+
+        max_bytes: int = 268435456
+        Maximum total size of the entries.
+        """
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._read_index()
+
+    def make_key(self, raw_file: Path, origin: str | None, language: str | None, samples: FileStore | ShardStore | None = None) -> str:
+        """
+        Computes the key of a sample. Reads the raw file.
+
+        raw_file: Path
+        The raw file of the sample.
+
+        origin: str | None
+        Origin of the sample.
+
+        language: str | None
+        Language of the sample, if it is known before the preprocessing.
+
+        samples: FileStore | ShardStore | None = None
+        The store the raw file is read from. The file system if None.
+
+        returns: str
+        The key.
+        """
+        if samples is None:
+            samples = FileStore(Path())
+        with samples.open_binary(raw_file) as file:
+            raw_hash = hash_stream(file)
+        digest = sha256()
+        for part in [raw_hash, self.fingerprint, str(origin), str(language)]:
+            digest.update(part.encode(_ENCODING))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def restore(self, key: str, prep_file: Path, samples: FileStore | ShardStore | None = None) -> str | None:
+        """
+        Writes the prepared text of the entry to the prepared file.
+
+        key: str
+        Key of the entry.
+
+        prep_file: Path
+        The prepared file. It is not written if the sample turned out to be of unknown language.
+
+        samples: FileStore | ShardStore | None = None
+        The store the prepared file is written to. The file system if None.
+
+        returns: str | None
+        The language of the sample, or None if there is no such entry.
+        """
+        try:
+            entry = open(self._get_entry_path(key), 'rt', encoding=_ENCODING)
+        except FileNotFoundError:
+            return None
+
+        with entry:
+            language = entry.readline().rstrip('\n')
+            if language != 'unknown':
+                if samples is None:
+                    samples = FileStore(Path())
+                with samples.open_write(prep_file) as prep:
+                    shutil.copyfileobj(entry, prep)
+        return language
+
+    def store(self, key: str, language: str, prep_file: Path | None, samples: FileStore | ShardStore | None = None) -> int:
+        """
+        Adds an entry.
+
+        key: str
+        Key of the entry.
+
+        language: str
+        The language of the sample.
+
+        prep_file: Path | None
+        The prepared file of the sample, or None if the sample is of unknown language.
+
+        samples: FileStore | ShardStore | None = None
+        The store the prepared file is read from. The file system if None.
+
+        returns: int
+        Size of the entry in bytes.
+        """
+        path = self._get_entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'wt', encoding=_ENCODING) as entry:
+            entry.write(language + '\n')
+            if prep_file is not None:
+                if samples is None:
+                    samples = FileStore(Path())
+                with samples.open_read(prep_file) as prep:
+                    shutil.copyfileobj(prep, entry)
+        os.replace(tmp_path, path)  # never leave a half written entry
+        return path.stat().st_size
+
+    def record(self, key: str, hit: bool, size: int = 0) -> None:
+        """
+        Notes down that an entry has been used or added, and evicts the least recently used entries if the cache
+        has grown too large.
+
+        key: str
+        Key of the entry.
+
+        hit: bool
+        True if the entry has been used, False if it has been added.
+
+        size: int = 0
+        Size of an added entry.
+        """
+        if hit:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            return
+
+        self.misses += 1
+        self._size += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Evicts the least recently used entries until the entries fit into 'max_bytes'. The entry used last is kept
+        in any case.
+        """
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            old_key, old_size = self._entries.popitem(last=False)
+            self._size -= old_size
+            try:
+                self._get_entry_path(old_key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def hit_rate(self) -> float:
+        """
+        returns: float
+        Fraction of the samples that have been taken from the cache. Zero if no sample has been looked up yet.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.
+
+    def write_index(self) -> None:
+        """
+        Writes the list of entries to the cache directory.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(Path(self.directory, _INDEX), 'wt') as file:
+            json.dump(list(self._entries.items()), file)
+
+    def _read_index(self) -> None:
+        """
+        Reads the list of entries from the cache directory, if there is one, and lists the entry files. Entries of
+        the list whose file is gone are dropped. Entry files that are not on the list, like the ones added in a
+        session that ended before the list has been written, are taken on as the least recently used entries, so
+        they are evicted first.
+        """
+        if not self.directory.exists():
+            return
+        path = Path(self.directory, _INDEX)
+        indexed: OrderedDict[str, int] = OrderedDict()
+        if path.exists():
+            try:
+                with open(path, 'rt') as file:
+                    for key, size in json.load(file):
+                        indexed[key] = size
+            except BaseException as be:
+                print('could not read index of the preprocessing cache')
+                print(be)
+
+        found = dict()
+        with os.scandir(self.directory) as dirs:
+            for sub_dir in dirs:
+                if not sub_dir.is_dir():
+                    continue
+                with os.scandir(sub_dir.path) as entries:
+                    for entry in entries:
+                        # temporary files are entries still being written, or left over by a crashed worker
+                        if entry.is_file() and not entry.name.endswith('.tmp'):
+                            found[entry.name] = entry.stat().st_size
+
+        for key, size in found.items():
+            if key not in indexed:
+                self._entries[key] = size
+        for key, size in indexed.items():
+            if key in found:
+                self._entries[key] = size
+        self._size = sum(self._entries.values())
+        self._evict()
+
+    def _get_entry_path(self, key: str) -> Path:
+        return Path(self.directory, key[:2], key)
@@ -0,0 +1,269 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, TextIO
+from rate_texts.doc_process.pipeline import Pipeline, Document, Stemming, UNKNOWN
+from rate_texts.core.prep_cache import PreprocessingCache
+from rate_texts.core.sample_store import FileStore, ShardStore
+
+
+class PreparationJob():
+    """
+    A sample that is to be preprocessed.
+    """
+
+    row: str
+    """Index of the sample in the sample file index."""
+    raw_file: Path
+    """The raw html file, relative to the root of 'store'."""
+    prep_file: Path
+    """The prepared file that is to be written, relative to the root of 'store'."""
+    origin: str | None
+    """Origin of the sample, if any."""
+    language: str | None
+    """Language of the sample. None if it has to be detected."""
+    store: FileStore | ShardStore
+    """The store the raw file is read from and the prepared file is written to."""
+
+    def __init__(self, row: str, raw_file: Path, prep_file: Path, origin: str | None, language: str | None, store: FileStore | ShardStore | None = None) -> None:
+        self.row = row
+        self.raw_file = raw_file
+        self.prep_file = prep_file
+        self.origin = origin
+        self.language = language
+        self.store = store if store is not None else FileStore(Path())
+
+
+class PreparationResult():
+    """
+    The outcome of a preparation job.
+    """
+
+    row: str
+    """Index of the sample in the sample file index."""
+    language: str | None
+    """The language of the sample. None if the raw file could not be read."""
+    written: bool
+    """True if the prepared file has been written."""
+    message: str | None
+    """Describes what went wrong, if anything did."""
+    timings: Dict[str, float]
+    """Seconds spent in each stage of the pipeline for this sample."""
+    stem_hits: int
+    """Number of words whose stem has been looked up."""
+    stem_misses: int
+    """Number of words that had to be stemmed."""
+    cache_key: str | None
+    """Key of the sample in the preprocessing cache, if a cache is used."""
+    cache_hit: bool
+    """True if the sample has been taken from the preprocessing cache."""
+    cache_size: int
+    """Size of the entry added to the preprocessing cache, if any."""
+
+    def __init__(self, row: str) -> None:
+        self.row = row
+        self.language = None
+        self.written = False
+        self.message = None
+        self.timings = dict()
+        self.stem_hits = 0
+        self.stem_misses = 0
+        self.cache_key = None
+        self.cache_hit = False
+        self.cache_size = 0
+
+
+def prepare_sample(pipeline: Pipeline, job: PreparationJob, chunk_size: int | None = None, cache: PreprocessingCache | None = None) -> PreparationResult:
+    """
+    Preprocesses a sample and writes the prepared file.
+
+    If 'chunk_size' is given, the raw file is read in chunks and each chunk is processed and written to the
+    prepared file right away. If the language of the sample is not known yet, the raw file is read twice then.
+    The first pass collects the distinct words for the language detection, the second pass writes the prepared
+    file. The prepared file is the same as without chunking.
+
+    If a cache is given and it holds the sample, the prepared file is copied from the cache and the pipeline is
+    not run at all. Otherwise, the prepared sample is added to the cache. The cache only needs to be told about
+    this by 'PreprocessingCache.record' afterwards.
+
+    pipeline: Pipeline
+    The preprocessing pipeline.
+
+    job: PreparationJob
+    The sample.
+
+    chunk_size: int | None = None
+    Number of characters read at once, or None for reading the raw file at once.
+
+    cache: PreprocessingCache | None = None
+    The cache of prepared samples.
+
+    returns: PreparationResult
+    The outcome.
+    """
+    result = PreparationResult(job.row)
+    doc = Document(job.origin, job.language)
+
+    if cache is not None:
+        try:
+            result.cache_key = cache.make_key(
+                job.raw_file, job.origin, job.language, job.store)
+            result.language = cache.restore(result.cache_key, job.prep_file, job.store)
+        except BaseException as be:
+            result.message = f'cannot take {str(job.raw_file)} from the cache:\n{be}'
+            return result
+        if result.language is not None:
+            result.cache_hit = True
+            result.written = result.language != UNKNOWN
+            return result
+
+    def open_raw() -> TextIO:
+        return job.store.open_read(job.raw_file)
+
+    try:
+        if chunk_size is None:
+            with open_raw() as raw:
+                lines = [line.strip() for line in raw.readlines()]
+                # join by space prevents two words merging into one
+                text = ' '.join(lines)
+            words = pipeline.process(text, doc)
+        else:
+            pipeline.detect_language_in_file(open_raw, doc, chunk_size)
+    except BaseException as be:
+        result.message = f'cannot read raw sample file {str(job.raw_file)}:\n{be}'
+        return result
+
+    result.language = doc.language
+    if doc.language == UNKNOWN:
+        _store(cache, result, None, job.store)
+        return result
+
+    # write cleaned file, the words become a text only now
+    try:
+        with job.store.open_write(job.prep_file) as prep:
+            if chunk_size is None:
+                prep.write(' '.join(words))
+            else:
+                separator = ''
+                for batch in pipeline.process_file(open_raw, doc, chunk_size):
+                    if len(batch) > 0:
+                        prep.write(separator + ' '.join(batch))
+                        separator = ' '
+    except BaseException as be:
+        result.message = f'cannot write {job.prep_file.name}:\n{be}'
+        return result
+
+    result.written = True
+    _store(cache, result, job.prep_file, job.store)
+    return result
+
+
+def _store(cache: PreprocessingCache | None, result: PreparationResult, prep_file: Path | None, samples: FileStore | ShardStore) -> None:
+    """
+    Adds the outcome to the cache, if there is a cache. A failure does not spoil the outcome.
+    """
+    if cache is None or result.cache_key is None:
+        return
+    try:
+        result.cache_size = cache.store(
+            result.cache_key, str(result.language), prep_file, samples)
+    except BaseException as be:
+        result.cache_key = None
+        result.message = f'cannot add {str(prep_file)} to the cache:\n{be}'
+
+
+def prepare_samples(pipeline: Pipeline, jobs: Iterable[PreparationJob], chunk_size: int | None = None, workers: int = 1, cache: PreprocessingCache | None = None) -> Iterator[PreparationResult]:
+    """
+    Preprocesses the samples. With more than one worker, the samples are spread over a pool of processes, and
+    the results are yielded in the order the samples are done. Each worker process has its own copy of the
+    pipeline. The timings and the stem counters are reported back with each result, but the stems memoized in
+    the worker processes are lost when the pool shuts down.
+
+    pipeline: Pipeline
+    The preprocessing pipeline.
+
+    jobs: Iterable[PreparationJob]
+    The samples.
+
+    chunk_size: int | None = None
+    Number of characters read at once, or None for reading the raw files at once.
+
+    workers: int = 1
+    Number of worker processes. With one worker, the samples are processed in this process, one after another.
+
+    cache: PreprocessingCache | None = None
+    The cache of prepared samples. Call 'PreprocessingCache.record' for each result.
+
+    returns: Iterator[PreparationResult]
+    The outcomes.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield prepare_sample(pipeline, job, chunk_size, cache)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pipeline, cache)) as pool:
+        pending: Set[Future] = set()
+        for job in jobs:
+            # keep a few jobs per worker in the queue, but not all of them
+            if len(pending) >= 4 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(_prepare_in_worker, job, chunk_size))
+        while len(pending) > 0:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def merge_stats(pipeline: Pipeline, result: PreparationResult) -> None:
+    """
+    Adds the timings and the stem counters a worker process has reported to the ones of the pipeline.
+
+    pipeline: Pipeline
+    The pipeline of this process.
+
+    result: PreparationResult
+    The outcome reported by the worker process.
+    """
+    for name, seconds in result.timings.items():
+        pipeline.timings[name] = pipeline.timings.get(name, 0.) + seconds
+    pipeline.documents += 1
+    lexicons = _get_stemmings(pipeline)
+    if len(lexicons) > 0:
+        lexicons[0].lexicon.hits += result.stem_hits
+        lexicons[0].lexicon.misses += result.stem_misses
+
+
+_worker_pipeline: Pipeline
+"""The pipeline of a worker process."""
+_worker_cache: PreprocessingCache | None
+"""The preprocessing cache of a worker process."""
+
+
+def _init_worker(pipeline: Pipeline, cache: PreprocessingCache | None) -> None:
+    global _worker_pipeline, _worker_cache
+    _worker_pipeline = pipeline
+    _worker_cache = cache
+
+
+def _prepare_in_worker(job: PreparationJob, chunk_size: int | None) -> PreparationResult:
+    """
+    Prepares the sample with the pipeline of the worker process and notes down the timings and stem counters.
+    """
+    pipeline = _worker_pipeline
+    pipeline.reset_timings()
+    stemmings = _get_stemmings(pipeline)
+    for stemming in stemmings:
+        stemming.lexicon.reset_counters()
+
+    result = prepare_sample(pipeline, job, chunk_size, _worker_cache)
+    result.timings = dict(pipeline.timings)
+    result.stem_hits = sum(stemming.lexicon.hits for stemming in stemmings)
+    result.stem_misses = sum(
+        stemming.lexicon.misses for stemming in stemmings)
+    return result
+
+
+def _get_stemmings(pipeline: Pipeline) -> List[Stemming]:
+    return [stage for stage in pipeline.stages if isinstance(stage, Stemming)]
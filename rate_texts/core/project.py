@@ -1,27 +1,50 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
 import numpy.typing as npt
 import rate_texts.dev_tools.utils as utils
-from typing import Dict, List
+from typing import Deque, Dict, Iterable, Iterator, List, Tuple
 import pandas as pd
-from rate_texts.tools import keys, tools
+from rate_texts.tools import keys, tools, vocab_file
+from rate_texts.tools.vocab_file import VocabFile
 from rate_texts.models.model_wrapper import ModelWrapper
-from tensorflow.keras.models import load_model
-from rate_texts.models.tfkeras_model import TfKerasModel
-from rate_texts.models.sklearn_model import SklearnModel
-from joblib import load
+from rate_texts.doc_process.stemming import StemLexicon
+from rate_texts.core import doc_index
+from rate_texts.core.doc_index import CsvIndex, SqliteIndex
+from rate_texts.core.dir_scan import DirectoryScanner
+from rate_texts.core import sample_store
+from rate_texts.core.sample_store import FileStore, ShardStore
+from rate_texts.core import model_registry
+from rate_texts.core.model_registry import ModelRegistry
 
 _train_dir = 'training'
 """Directory for the training data."""
 _model_dir = 'model'
 """Directory for the models."""
+_cache_dir = 'cache'
+"""Directory for data that can be derived again at any time."""
+_doc_freq_dir = 'document_frequencies'
+"""Directory for the terms of the prepared training samples."""
+_corpus_dir = 'corpus'
+"""Directory for the token ids of the prepared training samples."""
 _data_dir = 'data'
 """Directory for the data that is actually analyzed."""
 _doc_index = 'document_index.csv'
+"""File name of the list of properties of the samples, as written by former versions."""
+_doc_index_db = 'document_index.sqlite'
 """File name of the list of properties of the samples."""
+_training_scan = 'training_scan.json'
+"""File name of the manifest of the scanned training directory, in the cache directory."""
 _chars = np.array(
     list('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'))
 _model_index = 'model_index.csv'
+_stem_lexicon = 'stem_lexicon.json'
+"""File name of the persisted stem lexicon."""
+_IO_THREADS = 8
+"""Default number of threads reading sample files."""
+_IO_CHUNK = 32
+"""Number of sample files a reading thread reads per task."""
 
 
 class Project():
@@ -36,11 +59,27 @@ class Project():
     """directory for storing the models"""
     data_dir: Path
     """Directory with the data actually ised for predictions"""
+    cache_dir: Path
+    """Directory for caches. It can be deleted at any time."""
+    doc_freq_dir: Path
+    """Directory for the document frequency store of the training samples."""
+    corpus_dir: Path
+    """Directory for the corpus store of the training samples."""
+    training_index: CsvIndex | SqliteIndex
+    """Stores the sample file index of the training data."""
+    training_scanner: DirectoryScanner
+    """Finds the raw files added to or removed from the training directory."""
+    training_store: FileStore | ShardStore
+    """Reads and writes the raw and prepared files of the training samples."""
+    data_store: FileStore | ShardStore
+    """Reads and writes the raw and prepared files of the data that is analyzed."""
+    models: ModelRegistry
+    """Keeps the models that have been read in memory."""
     sample_counter: int
     rand = np.random.Generator
     name: str
 
-    def __init__(self, name: str, parent: Path) -> None:
+    def __init__(self, name: str, parent: Path, index_format: str = doc_index.SQLITE, sample_format: str | None = None, codec: str | None = None, model_memory: int = model_registry.DEFAULT_MAX_BYTES) -> None:
         """
         Creates a new project and iys directories.
 
@@ -49,6 +88,19 @@ class Project():
 
         parent:Path The path to the folder that holds all project folders. The new folder for this new
         project is also created in this parent folder.
+
+        index_format:str How the sample file index is stored, 'sqlite' or 'csv'. See 'doc_index'. With 'sqlite',
+        the index is kept in 'training/document_index.sqlite' and only the rows that have changed are written.
+        An index in 'training/document_index.csv' left by a former version is read and then written as sqlite.
+
+        sample_format:str|None How the samples are stored, 'files' or 'shards'. See 'sample_store'. If None, the
+        format the samples have been written in before is used, single files for a new project.
+
+        codec:str|None How the samples are compressed when they are written, 'none', 'gzip', or 'lzma'. See
+        'sample_store'. If None, the codec of the project is kept, no compression for a new project. Samples are
+        read no matter how they have been compressed.
+
+        model_memory:int Bound of the summed file sizes of the models kept in memory. See 'model_registry'.
         """
         # TODO: check if writable / check for already existing
         self.name = name
@@ -56,6 +108,17 @@ class Project():
         self.training_dir = Path(self.root_dir, _train_dir)
         self.model_dir = Path(self.root_dir, _model_dir)
         self.data_dir = Path(self.root_dir, _data_dir)
+        self.cache_dir = Path(self.root_dir, _cache_dir)
+        self.doc_freq_dir = Path(self.root_dir, _doc_freq_dir)
+        self.corpus_dir = Path(self.root_dir, _corpus_dir)
+        if index_format == doc_index.CSV:
+            self.training_index = CsvIndex(Path(self.training_dir, _doc_index))
+        else:
+            self.training_index = SqliteIndex(Path(self.training_dir, _doc_index_db))
+        self.training_scanner = DirectoryScanner(self.training_dir, Path(self.cache_dir, _training_scan))
+        self.training_store = sample_store.open_store(self.training_dir, sample_format, codec)
+        self.data_store = sample_store.open_store(self.data_dir, sample_format, codec)
+        self.models = ModelRegistry(self.model_dir, model_memory)
         self.sample_counter = 0
         self.rand = np.random.default_rng()
 
@@ -89,153 +152,250 @@ class Project():
 
         return {'id': id, 'path': '/'.join([dir, id]), 'dir': dir}
 
-    def write_vocab(self, vocab: npt.NDArray[np.str_], name: str) -> None:
-        """Writes the vocabulary to disk."""
-        full_path = Path(self.root_dir, f'{name}.txt')
+    def write_vocab(self, vocab: Iterable[str], name: str) -> str | None:
+        """
+        Writes the vocabulary to disk in the binary format of 'vocab_file.write_vocab_file'.
+
+        vocab: Iterable[str]
+        The vocabulary.
+
+        name: str
+        Name of the vocabulary, without the file suffix.
+
+        returns: str | None
+        The hash of the vocabulary, or None if it could not be written.
+        """
+        full_path = Path(self.root_dir, f'{name}{vocab_file.SUFFIX}')
         try:
-            with open(full_path, 'wt') as file:
-                for word in vocab:
-                    file.write(word+'\n')
+            return vocab_file.write_vocab_file(full_path, vocab)
         except BaseException as be:
-            print(f'could not write vocabulary {name}.txt')
+            print(f'could not write vocabulary {full_path.name}')
             print(be)
+            return None
 
     def read_vocab(self, name: str) -> npt.NDArray[np.str_]:
         """
-        Reads a vocabulary from disk. Does not take care of i/o errors!
+        Reads a vocabulary from disk. Vocabularies written as text, with one word per line, by former versions
+        are read as well. Does not take care of i/o errors!
 
         name:str
-        Name of the vocabulary, without the ending txt.
+        Name of the vocabulary, without the file suffix.
 
         returns: NDArray[np.str_]
         Vocabulary
         """
+        full_path = Path(self.root_dir, f'{name}{vocab_file.SUFFIX}')
+        if full_path.exists():
+            vocab = self.open_vocab(name)
+            try:
+                return vocab.to_array()
+            finally:
+                vocab.close()
+
         full_path = Path(self.root_dir, f'{name}.txt')
         with open(full_path, 'rt') as file:
             lst = [line.strip() for line in file.readlines()]
-            return np.array(lst)
+            return np.array(lst, dtype=str)
+
+    def open_vocab(self, name: str) -> VocabFile:
+        """
+        Opens a vocabulary written in the binary format. The file is memory mapped, so the words are only read
+        when they are accessed. Does not take care of i/o errors!
+
+        name: str
+        Name of the vocabulary, without the file suffix.
+
+        returns: VocabFile
+        The vocabulary. Its hash is known without reading the words.
+        """
+        return VocabFile(Path(self.root_dir, f'{name}{vocab_file.SUFFIX}'))
+
+    def write_stem_lexicon(self, lexicon: StemLexicon) -> None:
+        """
+        Writes the stem lexicon to the project directory, so it can be warm-loaded later on.
+
+        lexicon: StemLexicon
+        The lexicon.
+        """
+        full_path = Path(self.root_dir, _stem_lexicon)
+        try:
+            lexicon.write(full_path)
+        except BaseException as be:
+            print(f'could not write stem lexicon {_stem_lexicon}')
+            print(be)
+
+    def read_stem_lexicon(self, lexicon: StemLexicon) -> bool:
+        """
+        Adds the words of the stem lexicon stored in the project directory to the given lexicon.
+
+        lexicon: StemLexicon
+        The lexicon that is warm-loaded.
+
+        returns: bool
+        True if a stored lexicon has been read.
+        """
+        full_path = Path(self.root_dir, _stem_lexicon)
+        if not full_path.exists():
+            return False
+        try:
+            lexicon.read(full_path)
+        except BaseException as be:
+            print(f'could not read stem lexicon {_stem_lexicon}')
+            print(be)
+            return False
+        return True
 
     def write_training_index(self, file_data: pd.DataFrame) -> None:
         """
-        Writes the training files index as csv to the disk.
+        Writes the training files index to the disk. With the SQLite format, only the rows that have changed
+        since the index has been read or written last are written. The manifest of the training directory is
+        written afterwards, see 'scan_training_dir'.
 
         file_data: pandas.DataFrame
         Index list of sample files for training.
         """
-        full_path = Path(self.training_dir, _doc_index)
-        file_data.to_csv(full_path, index=True)
+        self.training_index.write(file_data)
+        if self.training_scanner.pending:
+            try:
+                self.training_scanner.write()
+            except BaseException as be:
+                print('could not write the scan manifest')
+                print(be)
 
     def read_training_index(self) -> pd.DataFrame:
         """
-        Reads the training files index from disk. Does not take care of I/O errors!
+        Reads the training files index from disk. An index written as csv by a former version is read if there
+        is no other one yet, and is written in the format of the project the next time the index is written.
+        Does not take care of I/O errors!
 
         returns: pandas.DataFrame
         Index list of sample data for training. A new, empty one is created if the file
         does not exist.
         """
-        full_path = Path(self.training_dir, _doc_index)
-        if full_path.exists():
-            file_data = pd.read_csv(full_path, index_col=0)
-        else:
-            file_data = pd.DataFrame(
-                [], columns=[keys.RAW_FILE, keys.PREP_FILE, keys.ORIGIN, keys.LANGUAGE, keys.RATING, keys.LABELED_BY, keys.USAGE])
-        return file_data
+        if self.training_index.exists():
+            return self.training_index.read()
+        legacy = CsvIndex(Path(self.training_dir, _doc_index))
+        if legacy.exists():
+            return legacy.read()
+        return doc_index.make_empty_index()
+
+    def scan_training_dir(self, file_data: pd.DataFrame) -> Tuple[List[str], List[str]]:
+        """
+        Looks for .html and .htm files that have been added to or removed from the subdirectories of the training
+        directory since the last scan. Only the subdirectories that have changed are read, see 'DirectoryScanner'.
+        The manifest of the scan is only written along with the sample file index, so files that never made it
+        into a written index are found again by the next session.
 
-    def update_training_index(self, file_data: pd.DataFrame, write_on_update: bool = True) -> pd.DataFrame:
+        file_data: pandas.DataFrame
+        The sample file index. Its raw files are compared with the files found, so files missing from the index
+        are found again even if the directory has been scanned before, like after the index has been deleted.
+
+        returns: Tuple[List[str], List[str]]
+        The paths, relative to the training directory, of the files that are not in the index yet and the ones
+        of the index that have been removed.
+        """
+        added, removed = self.training_scanner.scan(file_data[keys.RAW_FILE].dropna(), write_on_update=False)
+        if len(removed) > 0 and isinstance(self.training_store, ShardStore):
+            # samples packed into shard archives have no files of their own
+            removed = [path for path in removed if not self.training_store.exists(path)]
+        return added, removed
+
+    def update_training_index(self, file_data: pd.DataFrame, write_on_update: bool = True,
+                              scan: Tuple[List[str], List[str]] | None = None) -> pd.DataFrame:
         """
         Looks for .html and .htm files in the training directory that have not been added to
-        the sample file index yet. The files found become listed in the index.
+        the sample file index yet. The files found become listed in the index. Samples whose raw files have been
+        deleted are removed from the index.
 
         file_data: pandas.DataFrame
         The sample file index.
 
         write_on_update: bool = True
-        If files have been added, write the file index to disc in the end.
+        If files have been added or removed, write the file index to disc in the end.
+
+        scan: Tuple[List[str], List[str]] | None = None
+        The result of 'scan_training_dir', if it has been called already.
 
         returns: pandas.DataFrame
         The, possibily updated, sample file index.
         """
-        counter = 0
-        for subdir in self.training_dir.iterdir():
-            if subdir.is_file():
-                continue
-
-            new_files = self._update_training_directory(
-                file_data, subdir, self.training_dir)
-            counter += len(new_files)
-            file_data = pd.concat([file_data]+new_files)
-        if counter > 0:
-            print(f'added {counter} files')  # TODO: localize info message
+        added, removed = self.scan_training_dir(file_data) if scan is None else scan
+        if len(removed) > 0:
+            file_data = file_data[~file_data[keys.RAW_FILE].isin(removed)]
+            print(f'removed {len(removed)} files')  # TODO: localize info message
+        if len(added) > 0:
+            new_files = pd.DataFrame({keys.RAW_FILE: added}, index=added)
+            file_data = pd.concat([file_data, new_files])
+            print(f'added {len(added)} files')  # TODO: localize info message
+        if len(added) > 0 or len(removed) > 0:
             if write_on_update:
-                self.write_training_index(file_data)
+                try:
+                    self.write_training_index(file_data)
+                except BaseException:
+                    # the files are found again by the next scan
+                    self.training_scanner.discard()
+                    raise
         else:
             print('no new files')
         return file_data
 
-    def _update_training_directory(self, file_data: pd.DataFrame, subdir: Path, modedir: Path) -> List[pd.DataFrame]:
+    def read_train_samples(self, file_data: pd.DataFrame, threads: int = _IO_THREADS) -> pd.Series:
         """
-        Browses the 'subdir' for .htm and .html files. For any file found, it is checked if the
-        file is listed in the sample file index. If not, the file is added.
+        Reads the training samples. A file is skipped if an I/O error occurs while the
+        file is read.
 
         file_data: pandas.DataFrame
-        The sample file index.
-
-        subdir: Path
-        The directory in that new files are looked for.
+        The data frame indexing the sample files.
 
-        modedir: Path
-        The training directory or the data directory.
+        threads: int = 8
+        Number of threads reading the files.
 
-        returns: pandas.DataFrame
-        Single row data frames that can be appended to the file index. One row per new entry.
+        returns: pandas.Series
+        List of training samples.
         """
-        new_files = []
-        for file in subdir.glob('*.htm*'):
-            if not file.is_file():
-                continue
-            if not file.suffix == '.html' and not file.suffix == '.htm':
-                continue
+        return self._read_training_samples(keys.TRAIN, file_data, threads)
 
-            file_path = str(file.relative_to(modedir))
-            idx = file_data[keys.RAW_FILE] == file_path
-            if not idx.any():
-                df = pd.DataFrame(
-                    {keys.RAW_FILE: file_path}, index=[file_path])
-                new_files.append(df)
-        return new_files
-
-    def read_train_samples(self, file_data: pd.DataFrame) -> pd.Series:
+    def read_test_samples(self, file_data: pd.DataFrame, threads: int = _IO_THREADS) -> pd.Series:
         """
-        Reads the training samples. A file is skipped if an I/O error occurs while the
+        Reads the testing samples. A file is skipped if an I/O error occurs while the
         file is read.
 
-        file_data: pandas.DataFrame
+        file_data:
         The data frame indexing the sample files.
 
-        returns: pandas.Series
-        List of training samples.
+        threads: int = 8
+        Number of threads reading the files.
+
+        returns:
+        List of testing samples.
         """
-        return self._read_training_samples(keys.TRAIN, file_data)
+        return self._read_training_samples(keys.TEST, file_data, threads)
 
-    def read_test_samples(self, file_data: pd.DataFrame) -> pd.Series:
+    def read_validation_samples(self, file_data: pd.DataFrame, threads: int = _IO_THREADS) -> pd.Series:
         """
-        Reads the testing samples. A file is skipped if an I/O error occurs while the
+        Reads the validation samples. A file is skipped if an I/O error occurs while the
         file is read.
 
         file_data:
         The data frame indexing the sample files.
 
+        threads: int = 8
+        Number of threads reading the files.
+
         returns:
-        List of testing samples.
+        List of validation samples.
         """
-        return self._read_training_samples(keys.TEST, file_data)
+        return self._read_training_samples(keys.VALIDATION, file_data, threads)
 
-    def _read_training_samples(self, usage: str, file_data: pd.DataFrame) -> pd.Series:
+    def _read_training_samples(self, usage: str, file_data: pd.DataFrame, threads: int = _IO_THREADS) -> pd.Series:
         """
         Reads the training samples for a certain usage. A file is skipped if an I/O error occurs while the
         file is read.
 
         This method restrict itself to the prepared files and ignores files that have not been preprocessed yet.
+        The files are read by a pool of threads, and the texts are collected in a list of the final size before
+        the Series is built in one go. See 'iter_training_samples' for working on the samples while they are
+        still being read.
 
         usage:str
         Read files of this usage. Usually, this is 'train' for the samples used for the training, or
@@ -244,39 +404,142 @@ class Project():
         file_data:pandas.DataFrame
         The data frame indexing the sample files.
 
+        threads: int = 8
+        Number of threads reading the files.
+
         returns:pandas.Series
         List of training samples. The indices refers to the index in *file_data*. The values are the
         actual texts in the documents.
         """
+        file_names = self._get_prepared_files(file_data, usage)
+        contents: List[str | None] = [None] * len(file_names)
+        for position, content in enumerate(self._read_prepared_files(file_names, threads)):
+            contents[position] = content
+        read = [content is not None for content in contents]
+        return pd.Series([content for content in contents if content is not None],
+                         index=file_names.index[read], dtype=object)
+
+    def iter_training_samples(self, file_data: pd.DataFrame, usage: str | None = None, threads: int = _IO_THREADS) -> Iterator[Tuple[str, str]]:
+        """
+        Reads the prepared training samples lazily, so the samples can be processed while later files are still
+        being read. Only a few files per thread are read ahead, so the memory needed does not depend on the number
+        of samples. A file is skipped if an I/O error occurs while the file is read.
+
+        file_data: pandas.DataFrame
+        The data frame indexing the sample files.
+
+        usage: str | None = None
+        Read files of this usage, like 'train' or 'test'. Files of all usages if None.
+
+        threads: int = 8
+        Number of threads reading the files.
+
+        returns: Iterator[Tuple[str, str]]
+        The index of each sample in *file_data* and the text of its prepared file, in the order of *file_data*.
+        Only labeled samples that have been prepared are read.
+        """
+        file_names = self._get_prepared_files(file_data, usage)
+        for idx, content in zip(file_names.index, self._read_prepared_files(file_names, threads)):
+            if content is not None:
+                yield idx, content
 
+    def _get_prepared_files(self, file_data: pd.DataFrame, usage: str | None) -> pd.Series:
+        """
+        Selects the prepared files of the labeled samples of a usage, or of all usages if None.
+        """
         # get training samples with labels
-        usage_idx = file_data[keys.USAGE] == usage
-        label_idx = file_data[keys.RATING].notna()
-        idx = usage_idx & label_idx
-        file_names = file_data.loc[idx, keys.PREP_FILE].dropna()
-
-        contents: List[pd.Series] = []
-        for idx in file_names.index:
-            file_name = file_names.loc[idx]
-            full_path = Path(self.training_dir, file_name)
+        idx = file_data[keys.RATING].notna()
+        if usage is not None:
+            idx = idx & (file_data[keys.USAGE] == usage)
+        return file_data.loc[idx, keys.PREP_FILE].dropna()
+
+    def _read_prepared_files(self, file_names: pd.Series, threads: int) -> Iterator[str | None]:
+        """
+        Reads the prepared files in a pool of threads and yields their stripped texts in the order of
+        'file_names'. None for a file that could not be read.
+        """
+        def read(file_name: str) -> str | None:
             try:
-                with open(full_path, 'rt') as file:
-                    content = file.read().strip()
-                    data = pd.Series(content, index=[idx])
-                    contents.append(data)
+                return self.training_store.read(file_name).strip()
             except BaseException as be:
                 print(f'SKIPPING FILE {file_name}')
                 print(be)
+                return None
+
+        if threads <= 1:
+            for file_name in file_names:
+                yield read(file_name)
+            return
+
+        def read_chunk(chunk: List[str]) -> List[str | None]:
+            return [read(file_name) for file_name in chunk]
+
+        names = file_names.tolist()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            pending: Deque[Future] = deque()
+            # a few files per task, so the overhead of the tasks does not outweigh reading small files
+            for start in range(0, len(names), _IO_CHUNK):
+                if len(pending) >= 4 * threads:
+                    yield from pending.popleft().result()
+                pending.append(pool.submit(read_chunk, names[start:start + _IO_CHUNK]))
+            while len(pending) > 0:
+                yield from pending.popleft().result()
+
+    def read_sample_file(self, sub_path: str | Path) -> str:
+        """
+        Reads a raw or prepared file of a training sample and joins its stripped lines by spaces. Does not take
+        care of I/O errors!
 
-        return pd.concat(contents)
+        sub_path: str | Path
+        The file, relative to the training directory, as listed in the sample file index.
 
-    def read_sample_file(self, full_path: Path) -> str:
-        with open(full_path, 'rt') as file:
+        returns: str
+        The text of the file.
+        """
+        with self.training_store.open_read(sub_path) as file:
             content = [line.strip() for line in file.readlines()]
             text = ' '.join(content)
 
         return text
 
+    def write_sample_file(self, sub_path: str | Path, text: str) -> None:
+        """
+        Writes a raw or prepared file of a training sample. Does not take care of I/O errors!
+
+        sub_path: str | Path
+        The file, relative to the training directory. Missing directories are created.
+
+        text: str
+        The content of the file.
+        """
+        self.training_store.write(sub_path, text)
+
+    def pack_training_samples(self, file_data: pd.DataFrame) -> int:
+        """
+        Moves the raw and prepared files of the training samples into shard archives, see 'ShardStore'. From then
+        on, the training samples of the project are stored in shard archives.
+
+        file_data: pandas.DataFrame
+        The sample file index. The paths of the files do not change.
+
+        returns: int
+        Number of files packed. A file is skipped if an I/O error occurs.
+        """
+        if not isinstance(self.training_store, ShardStore):
+            self.training_store = ShardStore(self.training_dir, self.training_store.codec)
+        counter = 0
+        for column in [keys.RAW_FILE, keys.PREP_FILE]:
+            if column not in file_data.columns:
+                continue
+            for sub_path in file_data[column].dropna():
+                try:
+                    if self.training_store.pack(sub_path):
+                        counter += 1
+                except BaseException as be:
+                    print(f'could not pack {sub_path}')
+                    print(be)
+        return counter
+
     def write_model_index(self, file_data: pd.DataFrame) -> None:
         """
         Writes the model index as csv to the disk.
@@ -304,10 +567,11 @@ class Project():
 
     def read_model(self, name: str) -> ModelWrapper:
         """
-        Loads the model with the given name and wraps it into an approbiate wrapper. The file suffix
+        Gets the model with the given name, wrapped into an approbiate wrapper. The file suffix
         determines which wrapper is approbiate.
 
-        The model is taken from the model directory and only from the model directory.
+        The model is taken from the model directory and only from the model directory. It is loaded once and
+        kept in memory until its file changes, see 'models'.
 
         ---
 
@@ -315,32 +579,26 @@ class Project():
         Name of the model. This is also the file name without suffix.
 
         returns:
-        The wrapped model.
+        The wrapped model. The same instance is returned until the file of the model changes.
 
         ---
 
         raises FileNotFoundException:
-        If no file with 'name' as stem is found.
-
-        raises RuntimeError:
-        If the found file does not have a supported file suffix.
-        """
-        files = [file for file in self.model_dir.iterdir(
-        ) if file.is_file() and file.stem == name]
-        if len(files) == 0:
-            raise FileNotFoundError('No model file with the provided name')
-
-        file = files[0]
-        if file.suffix == '.keras':
-            model = load_model(file)
-            wrap = TfKerasModel(name, model)
-            return wrap
-        elif file.suffix == '.sklearn':
-            model = load(file)
-            wrap = SklearnModel(name, model)
-            return wrap
-        else:
-            raise RuntimeError('Unsupported suffix')
+        If no file with 'name' as stem and a supported file suffix is found.
+        """
+        return self.models.get(name)
+
+    def preload_models(self, names: Iterable[str]) -> List[str]:
+        """
+        Loads models into memory in advance. Models that cannot be loaded are reported to sout.
+
+        names:
+        The names of the models.
+
+        returns:
+        The names of the models that have been loaded.
+        """
+        return self.models.preload(names)
 
     def write_model(self, model: ModelWrapper) -> None:
         """
@@ -352,3 +610,5 @@ class Project():
         """
         dir = self.model_dir
         model.write_model(dir)
+        # loaded again from the new file the next time it is read
+        self.models.forget(model.name)
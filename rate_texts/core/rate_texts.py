@@ -1,21 +1,33 @@
 from pathlib import Path
 import json
-from typing import Dict, Tuple, List
+from typing import Dict, Iterator, Tuple, List
 from rate_texts.core.project import Project
 import numpy as np
 import numpy.typing as npt
 import pandas as pd
 from rate_texts.tools import tools
+from rate_texts.tools.tools import FeatureExtractor, HashedFeatureExtractor
 from scipy.sparse import spmatrix
-from rate_texts.run import run_dev
 from rate_texts.tools import keys
-from rate_texts.doc_process import html_cleaning, stops_removal, stemming
-from rate_texts.doc_process import lang_detection
+from rate_texts.doc_process.stops_removal import StopwordRegistry
+from rate_texts.doc_process.stemming import StemLexicon
+from rate_texts.doc_process.pipeline import Pipeline, LanguageDetection, StopwordRemoval, Stemming, UNKNOWN
+from rate_texts.doc_process.doc_freqs import DocumentFrequencyStore
+from rate_texts.doc_process.corpus_store import CorpusStore
+from rate_texts.doc_process import vocab_extraction
+from rate_texts.core import preparation
+from rate_texts.core.preparation import PreparationJob
+from rate_texts.core.prep_cache import PreprocessingCache
+from rate_texts.core.sample_store import FileStore, ShardStore
+from rate_texts.core import feature_cache
+from rate_texts.core.feature_cache import FeatureCache
 from rate_texts.models.model_wrapper import ModelWrapper
-from rate_texts.presenter.presenter import Presenter
 
-_UNKNOWN = "unknown"
 _ORIGIN = "origin"
+_PREP_CACHE = 'preprocessing'
+"""Subdirectory of the cache directory of the project for the preprocessing cache."""
+_FEATURE_CACHE = 'features'
+"""Subdirectory of the cache directory of the project for the feature matrices."""
 
 
 class RateTexts():
@@ -31,27 +43,52 @@ class RateTexts():
     """Directory containing the folders for the rating projects."""
     default_langs: List[str]
     """A list of default languages for language detection"""
+    preload_models: List[str]
+    """Names of the models that are loaded into memory as soon as a project is read, like the ones that are
+    served. Configured as 'preload_models'."""
     prj: Project
     """Currently loaded project"""
     training_mode: bool
     """True when working with training data. False when analyzing the actual data."""
     vocab: npt.NDArray[np.str_]
     """The currently active vocabulary."""
+    _vocab_hash: Tuple[npt.NDArray | None, str | None]
+    """The vocabulary that has been read last, and its hash as stored in the vocabulary file."""
     file_data: pd.DataFrame
     """The sample file index that lists all the sample files together with their meta data."""
     train_samples: pd.Series
     test_samples: pd.Series
+    _samples_fingerprints: Dict[str, str | None]
+    """Fingerprints of the rows of the sample file index 'train_samples' and 'test_samples' have been read for, by
+    usage, see 'feature_cache.fingerprint_rows'."""
     train_data: Tuple[spmatrix, pd.Series]
     test_data: Tuple[spmatrix, pd.Series]
+    validation_data: Tuple[spmatrix, pd.Series]
     model_data: pd.DataFrame
     """The model index that lists all known models within the project along their scores."""
     origins: List[Dict]
+    """The origins of samples, each with a list of stop words specific to that origin."""
+    stopword_registry: StopwordRegistry
+    """Stop words of the origins and of the languages."""
+    stem_lexicon: StemLexicon
+    """Memoized stems of the words."""
+    doc_freqs: DocumentFrequencyStore | None
+    """The terms of the prepared training samples of the project. None until a project is loaded."""
+    corpus: CorpusStore | None
+    """The token ids of the prepared training samples of the project. None until a project is loaded."""
+    feature_extractors: Dict[Tuple[str | int, Tuple[int, int]], FeatureExtractor | HashedFeatureExtractor]
+    """Feature extractors by vocabulary hash, or width of the hashed feature space, and ngram range."""
+    hashed_features: int | None
+    """Width of the hashed feature space in the hashed feature mode. None if the vocabulary is used."""
+    features: Dict | None
+    """Describes the features of 'train_data' and 'test_data'. None if there are none yet."""
 
     def __init__(self) -> None:
         path = Path(__file__).parent
         path = Path(path, '..',
                     'rate_texts_config.json').absolute().resolve()
 
+        self.preload_models = []
         if path.exists() and path.is_file():
             try:
                 with open(path, 'rt') as file:
@@ -60,6 +97,7 @@ class RateTexts():
                     self.home_path = Path(
                         path.parent, to_home).absolute().resolve()
                     self.default_langs = self._config['default_langs']
+                    self.preload_models = self._config.get('preload_models', [])
 
                     # origins
                     try:
@@ -74,6 +112,19 @@ class RateTexts():
 
             self.training_mode = True
 
+        try:
+            self.stopword_registry = StopwordRegistry(self.origins)
+        except AttributeError:
+            self.stopword_registry = StopwordRegistry()
+        self.stem_lexicon = StemLexicon()
+        self.doc_freqs = None
+        self.corpus = None
+        self.feature_extractors = dict()
+        self._samples_fingerprints = dict()
+        self._vocab_hash = (None, None)
+        self.hashed_features = None
+        self.features = None
+
     # _______________  project  _______________
 
     def create_project(self, name: str) -> Project:
@@ -88,15 +139,35 @@ class RateTexts():
         """
         self.prj = Project(name, self.home_path)
         self.prj.make_missing_dirs()
+        self.prj.read_stem_lexicon(self.stem_lexicon)
+        self._read_doc_freqs()
+        self._read_corpus()
         return self.prj
 
     def update_project(self) -> pd.DataFrame:
         """
-        Scans for new, raw sample files and adds them to the sample file index
+        Scans for new, raw sample files and adds them to the sample file index. Samples whose raw files have been
+        deleted are removed from the index, from the document frequency store, and from the corpus store.
         """
-        # TODO: remove deleted samples from file the file index
         if (self.training_mode):
-            self.file_data = self.prj.update_training_index(self.file_data)
+            added, removed = self.prj.scan_training_dir(self.file_data)
+            removed_rows = []
+            if len(removed) > 0:
+                removed_rows = self.file_data.index[self.file_data[keys.RAW_FILE].isin(removed)]
+            self.file_data = self.prj.update_training_index(self.file_data, scan=(added, removed))
+            for store, name in [(self.doc_freqs, 'document frequencies'), (self.corpus, 'corpus store')]:
+                if store is None:
+                    continue
+                stale = [row for row in removed_rows if row in store]
+                if len(stale) == 0:
+                    continue
+                for row in stale:
+                    store.remove(row)
+                try:
+                    store.write()
+                except BaseException as be:
+                    print(f'could not write {name}')
+                    print(be)
         return self.file_data
 
     def read_project(self, name: str) -> Project:
@@ -114,8 +185,30 @@ class RateTexts():
             raise RuntimeError('No such project')  # TODO: localize message
 
         self.prj = Project(name, self.home_path)
+        self.prj.read_stem_lexicon(self.stem_lexicon)
+        self._read_doc_freqs()
+        self._read_corpus()
+        self.prj.preload_models(self.preload_models)
         return self.prj
 
+    def _read_doc_freqs(self) -> None:
+        self.doc_freqs = DocumentFrequencyStore(self.prj.doc_freq_dir)
+        try:
+            self.doc_freqs.read()
+        except BaseException as be:
+            print('could not read document frequencies')
+            print(be)
+            self.doc_freqs = DocumentFrequencyStore(self.prj.doc_freq_dir)
+
+    def _read_corpus(self) -> None:
+        self.corpus = CorpusStore(self.prj.corpus_dir)
+        try:
+            self.corpus.read()
+        except BaseException as be:
+            print('could not read corpus store')
+            print(be)
+            self.corpus = CorpusStore(self.prj.corpus_dir)
+
     # _______________  vocabulary  _______________
 
     def read_vocab(self, name: str) -> npt.NDArray[np.str_]:
@@ -128,9 +221,116 @@ class RateTexts():
         returns: NDArray[np.str_]
         The vocabulary.
         """
-        self.vocab = self.prj.read_vocab(name)
+        try:
+            vocab = self.prj.open_vocab(name)
+        except FileNotFoundError:
+            # written as text by a former version
+            self.vocab = self.prj.read_vocab(name)
+            return self.vocab
+        try:
+            self.vocab = vocab.to_array()
+            self._vocab_hash = (self.vocab, vocab.vocab_hash)
+        finally:
+            vocab.close()
         return self.vocab
 
+    def extract_vocab(self, min_df=1, ngram_range: Tuple[int, int] = (1, 1), threshold: float = 0.98, usage: str | None = None,
+                      verbose: bool = True, approximate: bool = False) -> npt.NDArray[np.str_]:
+        """
+        Extracts a vocabulary from the document frequency store of the project and sets it as the active one.
+        The prepared samples are not read, see 'vocab_extraction.extract_vocab_from_store'.
+
+        min_df (default 1):
+        A word is omitted for the vocabulary if it appears in less documents than this value is set to.
+
+        ngram_range: Tuple[int, int] = (1, 1)
+        The n-grams that make up the vocabulary.
+
+        threshold: float = 0.98
+        Words whose appearances agree with the ones of an earlier word in more than this fraction of the
+        documents are dropped.
+
+        usage: str | None = None
+        Only take the samples of this usage into account, like 'train'. All prepared samples if None.
+
+        verbose: bool = True
+        If and only if, a progress indicator is printed to sout.
+
+        approximate: bool = False
+        Use the approximate pruning of 'vocab_extraction.find_redundant_lsh'.
+
+        returns: numpy.NDArray[numpy.str_]
+        The vocabulary.
+        """
+        rows = None
+        if usage is not None:
+            rows = self.file_data.index[self.file_data[keys.USAGE] == usage]
+        self.vocab = vocab_extraction.extract_vocab_from_store(
+            self.doc_freqs, min_df, ngram_range, threshold, verbose, rows, approximate)
+        return self.vocab
+
+    def update_doc_freqs(self, write_on_update: bool = True) -> int:
+        """
+        Adds the prepared training samples that are not in the document frequency store yet, and the ones whose
+        prepared files have been written again since they have been added. Only their prepared files are read.
+
+        write_on_update: bool = True
+        Write the store to disk if samples have been added.
+
+        returns: int
+        Number of samples added.
+        """
+        added = self._update_store(self.doc_freqs)
+        if write_on_update and added > 0:
+            try:
+                self.doc_freqs.write()
+            except BaseException as be:
+                print('could not write document frequencies')
+                print(be)
+        return added
+
+    def update_corpus(self, write_on_update: bool = True) -> int:
+        """
+        Adds the prepared training samples that are not in the corpus store yet, as token ids, and the ones whose
+        prepared files have been written again since they have been added. Only their prepared files are read.
+        Afterwards, the features of the training samples are computed from the token ids, see 'get_features'.
+
+        write_on_update: bool = True
+        Write the store to disk if samples have been added.
+
+        returns: int
+        Number of samples added.
+        """
+        added = self._update_store(self.corpus)
+        if write_on_update and added > 0:
+            try:
+                self.corpus.write()
+            except BaseException as be:
+                print('could not write corpus store')
+                print(be)
+        return added
+
+    def _update_store(self, store: DocumentFrequencyStore | CorpusStore) -> int:
+        """
+        Adds the prepared training samples to the store whose prepared files it has not seen yet, recognized by
+        their stamps, see 'FileStore.stamp'.
+        """
+        prepared = self.file_data[keys.PREP_FILE].dropna()
+        added = 0
+        for row, prep_file in prepared.items():
+            stamp = self.prj.training_store.stamp(prep_file)
+            if row in store and store.get_stamp(row) == stamp:
+                continue
+            try:
+                text = self.prj.read_sample_file(prep_file)
+            except BaseException as be:
+                print(f'SKIPPING FILE {prep_file}')
+                print(be)
+                continue
+            store.add(row, text, stamp)
+            added += 1
+        return added
+
     # _______________  models  _______________
 
     def read_model_index(self) -> pd.DataFrame:
@@ -210,6 +410,10 @@ class RateTexts():
                             keys.TEST_REC] = model.test_scores.loc['avg', keys.RECALL]
         self.model_data.loc[model.name,
                             keys.TEST_F1] = model.test_scores.loc['avg', keys.F1]
+        self._describe_features(model)
+        if model.features is not None:
+            self.model_data.loc[model.name,
+                                keys.FEATURES] = json.dumps(model.features)
 
         if write_on_update:
             self.prj.write_model_index(self.model_data)
@@ -224,8 +428,24 @@ class RateTexts():
         model:
         The model that is stored.
         """
+        self._describe_features(model)
         self.prj.write_model(model)
 
+    def _describe_features(self, model: ModelWrapper) -> None:
+        """
+        Notes down the description of the current features in the model, unless the model knows its features
+        already.
+        """
+        if model.features is None and self.features is not None:
+            model.features = self.features
+
+    def _check_features(self, model: ModelWrapper) -> None:
+        """
+        Warns if the model has been trained on other features than the current ones.
+        """
+        if not model.fits_features(self.features):
+            print(f'model {model.name} has been trained on other features than the current ones')
+
     def read_model(self, name: str) -> ModelWrapper:
         return self.prj.read_model(name)
 
@@ -240,6 +460,7 @@ class RateTexts():
         returns: pandas.DataFrame
         Data frame with the training scores.
         """
+        self._check_features(model)
         return model.compute_training_scores(self.train_data[0], self.train_data[1])
 
     def compute_test_scores(self, model: ModelWrapper) -> pd.DataFrame:
@@ -253,6 +474,7 @@ class RateTexts():
         returns: pandas.DataFrame
         Data frame with the test scores.
         """
+        self._check_features(model)
         return model.test(self.test_data[0], self.test_data[1])
 
     # _______________  training data  _______________
@@ -273,109 +495,341 @@ class RateTexts():
         """
         self.train_samples = self.prj.read_train_samples(self.file_data)
         self.test_samples = self.prj.read_test_samples(self.file_data)
+        for usage in [keys.TRAIN, keys.TEST]:
+            self._samples_fingerprints[usage] = feature_cache.fingerprint_rows(
+                self.file_data, usage, self.prj.training_store)
         return (self.train_samples, self.test_samples)
 
-    def prepare_unclean_samples(self, backup_langs: List[str] = ['english'], write_on_update: bool = True) -> None:
+    def prepare_unclean_samples(self, backup_langs: List[str] = ['english'], write_on_update: bool = True, chunk_size: int | None = None, persist_stems: bool = False, workers: int = 1, use_cache: bool = True, update_doc_freqs: bool = True, update_corpus: bool = True) -> None:
+        """
+        Prepares the samples that have a raw file but no prepared file yet. The html is stripped away, the
+        language is detected if unknown, the stop words are removed, and the remaining words are stemmed.
+
+        backup_langs: List[str] = ['english']
+        Languages taken into account by the language detection if no default languages are configured.
+
+        write_on_update: bool = True
+        Write the sample file index to disk in the end?
+
+        chunk_size: int | None = None
+        If given, the raw files are read and processed in chunks of this many characters and the prepared
+        text is written chunk by chunk. This bounds the memory needed for huge raw files.
+
+        persist_stems: bool = False
+        Write the stem lexicon to the project directory in the end, so the next session starts with the stems
+        known so far.
+
+        workers: int = 1
+        Number of processes the samples are spread over. The sample file index is updated by this process only,
+        so the outcome does not depend on the number of workers. Stems memoized by other processes are not kept.
+
+        use_cache: bool = True
+        Take the prepared samples from the preprocessing cache of the project if the same raw content has been
+        preprocessed with the same configuration before, and add newly prepared samples to the cache.
+
+        update_doc_freqs: bool = True
+        Add the newly prepared training samples to the document frequency store of the project, see
+        'update_doc_freqs'.
+
+        update_corpus: bool = True
+        Add the newly prepared training samples to the corpus store of the project, see 'update_corpus'.
+        """
         idx1 = self.file_data[keys.RAW_FILE].notna()
         idx2 = self.file_data[keys.PREP_FILE].isna()
         df = self.file_data[idx1 & idx2]
         if self.training_mode:
-            root = self.prj.training_dir
+            store = self.prj.training_store
         else:
-            root = self.prj.data_dir
+            store = self.prj.data_store
+        try:
+            use_langs = self.default_langs
+        except AttributeError:
+            use_langs = backup_langs
+        pipeline = self.make_pipeline(use_langs)
+        self.stem_lexicon.reset_counters()
+        if use_cache:
+            cache = PreprocessingCache(
+                Path(self.prj.cache_dir, _PREP_CACHE), pipeline.fingerprint())
+        else:
+            cache = None
         filecount = len(df)
         counter = 1
-        for row in df.index:
-            print(f'\rpreprocessing file {counter} of {filecount}:', end='')
-            raw_file = Path(root, str(df.loc[row, keys.RAW_FILE])).resolve()
-            print(f' {str(raw_file.name)} ', end='')
-            prep_name = raw_file.stem + '-cleaned.txt'
-            prep_file = Path(root, raw_file.parent, prep_name)
-            try:
-                use_langs = self.default_langs
-            except AttributeError:
-                use_langs = backup_langs
-            ok = self._prepare_unclean_sample(
-                row, raw_file, prep_file, root, use_langs)
-            if ok:
+        done = 0
+        jobs = self._make_preparation_jobs(df, store)
+        for result in preparation.prepare_samples(pipeline, jobs, chunk_size, workers, cache):
+            if workers > 1:
+                preparation.merge_stats(pipeline, result)
+            if cache is not None and result.cache_key is not None:
+                cache.record(result.cache_key, result.cache_hit,
+                             result.cache_size)
+            done += 1
+            print(f'\rpreprocessed file {done} of {filecount}', end='')
+            if result.message is not None:
+                print()
+                print(result.message)
+            if result.language is not None:
+                self.file_data.loc[result.row, keys.LANGUAGE] = result.language
+            if result.written:
+                prep_file = self._get_prep_file(result.row)
+                self.file_data.loc[result.row, keys.PREP_FILE] = str(prep_file)
                 counter += 1
 
         if write_on_update and counter > 0:
             self.prj.write_training_index(self.file_data)
+        if persist_stems:
+            self.prj.write_stem_lexicon(self.stem_lexicon)
+        if update_doc_freqs and self.training_mode:
+            self.update_doc_freqs(write_on_update)
+        if update_corpus and self.training_mode:
+            self.update_corpus(write_on_update)
+        if cache is not None:
+            try:
+                cache.write_index()
+            except BaseException as be:
+                print('could not write index of the preprocessing cache')
+                print(be)
         print('\r')
         print(f'Preprocessed and wrote {counter-1} files')
+        print(
+            f'stem lexicon: {self.stem_lexicon.hits} hits, {self.stem_lexicon.misses} misses')
+        if cache is not None:
+            print(
+                f'preprocessing cache: {cache.hits} hits, {cache.misses} misses, hit rate {cache.hit_rate():.3f}')
+        print(pipeline.timing_report())
 
-    def _prepare_unclean_sample(self, row: str, raw_file: Path, prep_file: Path, root: Path, search_langs: List[str]) -> bool:
-        try:
-            with open(raw_file, 'rt') as raw:
-                lines = [line.strip() for line in raw.readlines()]
-                # join by space prevents two words merging into one
-                text = ' '.join(lines)
-        except BaseException as be:
-            print(f'cannot read raw sample file {str(raw_file)}:')
-            print(be)
-            return False
+    def make_pipeline(self, search_langs: List[str]) -> Pipeline:
+        """
+        Creates the preprocessing pipeline for the samples: language detection, removal of the stop words of
+        the origin and of the language, and stemming.
+
+        search_langs: List[str]
+        Languages taken into account by the language detection.
+
+        returns: Pipeline
+        The pipeline.
+        """
+        self.stopword_registry.set_origins(self.origins)
+        return Pipeline([LanguageDetection(search_langs, self.stopword_registry, threshold=0.1),
+                         StopwordRemoval(self.stopword_registry),
+                         Stemming(self.stem_lexicon)])
 
-        # preprocess sample, part one: reducing html to the words visible on the webpage the html represents
-        text = html_cleaning.clean_html(text)
+    def _make_preparation_jobs(self, df: pd.DataFrame, store: FileStore | ShardStore) -> Iterator[PreparationJob]:
+        """
+        Creates the jobs for preprocessing the samples listed in 'df'.
+
+        df: pandas.DataFrame
+        The part of the sample file index with the samples to be preprocessed.
+
+        store: FileStore | ShardStore
+        The store of the training directory or of the data directory.
+
+        returns: Iterator[PreparationJob]
+        One job per sample.
+        """
+        for row in df.index:
+            raw_file = Path(str(df.loc[row, keys.RAW_FILE]))
+            yield PreparationJob(row, raw_file, self._get_prep_file(row),
+                                 self._get_row_origin(row), self._get_row_language(row), store)
+
+    def _get_prep_file(self, row: str) -> Path:
+        """
+        Gets the path of the prepared file of a sample, relative to the training or the data directory. The
+        prepared file is next to the raw file.
+        """
+        raw_file = Path(str(self.file_data.loc[row, keys.RAW_FILE]))
+        prep_name = raw_file.stem + '-cleaned.txt'
+        return Path(raw_file.parent, prep_name)
 
+    def _get_row_origin(self, row: str) -> str | None:
+        """
+        Gets the origin of the sample.
+
+        row: str
+        Index of the sample in the sample file index.
+
+        returns: str | None
+        The origin, or None if the sample has no origin.
+        """
         try:
-            origin = str(self.file_data.loc[row, keys.ORIGIN])
+            origin = self.file_data.loc[row, keys.ORIGIN]
         except BaseException as ba:
-            origin = pd.NA
+            return None
+        return str(origin) if pd.notna(origin) else None
 
-        if pd.notna(origin):
-            try:
-                sw_list = self._get_origin_stopwords(origin)
-                text = stops_removal.remove_given_stopwords(text, sw_list)
-            except BaseException as be:
-                # origin not listed in configuration. Could be mistake, could be purpose, simply skip this step
-                pass
+    def _get_row_language(self, row: str) -> str | None:
+        """
+        Gets the language of the sample from the sample file index.
 
-        # which language?
+        row: str
+        Index of the sample in the sample file index.
+
+        returns: str | None
+        The language, or None if the language is still unknown and has to be detected.
+        """
         try:
-            if pd.notna(self.file_data.loc[row, keys.LANGUAGE]) and self.file_data.loc[row, keys.LANGUAGE] != _UNKNOWN:
+            if pd.notna(self.file_data.loc[row, keys.LANGUAGE]) and self.file_data.loc[row, keys.LANGUAGE] != UNKNOWN:
                 # use existing language
-                use_lang = str(self.file_data.loc[row, keys.LANGUAGE])
-            else:
-                # auto detect
-                use_lang = lang_detection.detect_lang(
-                    text, search_langs, threshold=0.1)
+                return str(self.file_data.loc[row, keys.LANGUAGE])
         except KeyError:  # column language still does not exists in file_data
-            use_lang = lang_detection.detect_lang(
-                text, search_langs, threshold=0.1)
+            pass
+        return None
 
-        self.file_data.loc[row, keys.LANGUAGE] = use_lang
-        if use_lang == _UNKNOWN:
-            return False
+    def use_hashed_features(self, n_features: int | None = 2**20) -> None:
+        """
+        Switches between the feature modes. In the hashed feature mode, the ngrams of the documents are hashed into
+        a feature space of fixed width, and no vocabulary is needed. Otherwise, the features are the words of the
+        currently active vocabulary.
 
-        # process sample, part two: remove stopwords and stem
-        text = stops_removal.remove_stop_words(text, lang=use_lang)
-        text = stemming.stem(text, lang=use_lang)
+        n_features: int | None = 1048576
+        Width of the hashed feature space, or None for using the vocabulary.
+        """
+        self.hashed_features = n_features
 
-        # write cleaned file
-        ok = True
-        try:
-            with open(prep_file, 'wt') as prep:
-                prep.write(text)
-                self.file_data.loc[row, keys.PREP_FILE] = str(
-                    prep_file.relative_to(root))
-        except BaseException as be:
-            print()
-            print(f'cannot write {prep_file.name}:')
-            print(be)
-            print()
-            ok = False
+    def get_feature_extractor(self, ngram_range: Tuple[int, int] = (1, 1)) -> FeatureExtractor | HashedFeatureExtractor:
+        """
+        Provides the feature extractor for the currently active vocabulary, or for the hashed feature space in the
+        hashed feature mode. It is set up only once per vocabulary and ngram range, and kept for later calls.
 
-        return ok
+        ngram_range: Tuple[int, int] = (1, 1)
+        The ngram range the vocabulary is made of.
 
-    def get_feature_labels(self, ngram_range: Tuple[int, int] = (1, 1)) -> Tuple[spmatrix, pd.Series, spmatrix, pd.Series]:
-        self.train_data = tools.get_features_labels(
-            self.vocab, self.train_samples, self.file_data, ngram_range=ngram_range)
-        self.test_data = tools.get_features_labels(
-            self.vocab, self.test_samples, self.file_data, ngram_range=ngram_range)
+        returns: FeatureExtractor | HashedFeatureExtractor
+        The feature extractor.
+        """
+        if self.hashed_features is not None:
+            # looked up before anything is constructed, setting up the vectorizer is not free
+            hashed_key = (self.hashed_features, tuple(ngram_range))
+            if hashed_key not in self.feature_extractors:
+                self.feature_extractors[hashed_key] = HashedFeatureExtractor(
+                    self.hashed_features, ngram_range)
+            return self.feature_extractors[hashed_key]
+
+        if self._vocab_hash[0] is self.vocab:
+            # the hash stored in the vocabulary file
+            vocab_hash = str(self._vocab_hash[1])
+        else:
+            vocab_hash = tools.hash_vocab(self.vocab)
+        key = (vocab_hash, tuple(ngram_range))
+        if key not in self.feature_extractors:
+            self.feature_extractors[key] = FeatureExtractor(
+                self.vocab, ngram_range, vocab_hash)
+        return self.feature_extractors[key]
+
+    def get_feature_labels(self, ngram_range: Tuple[int, int] = (1, 1), use_cache: bool = True, workers: int = 1) -> Tuple[spmatrix, pd.Series, spmatrix, pd.Series]:
+        """
+        Computes the features and the labels of the training samples and of the test samples, see 'get_features'.
+
+        ngram_range: Tuple[int, int] = (1, 1)
+        The ngram range the vocabulary is made of.
+
+        use_cache: bool = True
+        Take the feature matrices from the feature cache of the project, if possible.
+
+        workers: int = 1
+        Number of worker processes the samples are transformed in.
+
+        returns: Tuple[spmatrix, pandas.Series, spmatrix, pandas.Series]
+        Features and labels of the training samples, then features and labels of the test samples.
+        """
+        self.train_data = self.get_features(
+            keys.TRAIN, ngram_range, use_cache, workers)
+        self.test_data = self.get_features(
+            keys.TEST, ngram_range, use_cache, workers)
+        self.features = self.get_feature_extractor(ngram_range).describe()
         return (self.train_data[0], self.train_data[1], self.test_data[0], self.test_data[1])
 
+    def get_features(self, usage: str, ngram_range: Tuple[int, int] = (1, 1), use_cache: bool = True, workers: int = 1) -> Tuple[spmatrix, pd.Series]:
+        """
+        Computes the features and the labels of the samples of a usage with the currently active vocabulary, or
+        with hashed features in the hashed feature mode.
+
+        With the cache, the feature matrix is stored in the project, keyed by the vocabulary, the ngram range and
+        the rows of the sample file index of the samples. If nothing of this has changed, the stored matrix is
+        memory mapped, and no sample is read at all. Otherwise, if all samples are in the corpus store of the
+        project, the features are computed from their token ids. Only if not, the samples are taken from
+        'train_samples' or 'test_samples' if they have been read for the current rows already, and are read from
+        disk if not.
+
+        usage: str
+        The usage of the samples, like 'train', 'test', or 'validation'.
+
+        ngram_range: Tuple[int, int] = (1, 1)
+        The ngram range the vocabulary is made of.
+
+        use_cache: bool = True
+        Take the feature matrix from the feature cache of the project if possible, and add it to the cache if not.
+
+        workers: int = 1
+        Number of worker processes the samples are transformed in.
+
+        returns: Tuple[spmatrix, pandas.Series]
+        The features and the labels.
+        """
+        extractor = self.get_feature_extractor(ngram_range)
+        cache = None
+        rows_fingerprint = feature_cache.fingerprint_rows(self.file_data, usage, self.prj.training_store)
+        # without a fingerprint, the samples are just being written, and a cached matrix could not be told apart
+        if use_cache and rows_fingerprint is not None:
+            cache = FeatureCache(Path(self.prj.cache_dir, _FEATURE_CACHE))
+            key = cache.make_key(extractor.fingerprint(), extractor.ngram_range, usage, rows_fingerprint)
+            try:
+                data = cache.load(key)
+            except BaseException as be:
+                print('could not load cached feature matrix')
+                print(be)
+                data = None
+            if data is not None:
+                return data
+
+        data = self._get_features_from_corpus(usage, extractor)
+        if data is None:
+            data = tools.get_features_labels(
+                None, self._get_samples(usage, rows_fingerprint), self.file_data, ngram_range=ngram_range, extractor=extractor, workers=workers)
+        if cache is not None:
+            try:
+                cache.store(key, data[0], data[1])
+            except BaseException as be:
+                print('could not cache feature matrix')
+                print(be)
+        return data
+
+    def _get_features_from_corpus(self, usage: str, extractor: FeatureExtractor | HashedFeatureExtractor) -> Tuple[spmatrix, pd.Series] | None:
+        """
+        Computes the features and the labels of the samples of a usage from the corpus store. Returns None if the
+        extractor works on hashed features, or if a sample is missing in the corpus store or its prepared file has
+        been written since it has been added, like when it has been prepared again without updating the store.
+        """
+        if not isinstance(extractor, FeatureExtractor) or self.corpus is None:
+            return None
+        idx = (self.file_data[keys.USAGE] == usage) & self.file_data[keys.RATING].notna() & \
+            self.file_data[keys.PREP_FILE].notna()
+        rows = self.file_data.index[idx]
+        for row, prep_file in self.file_data.loc[rows, keys.PREP_FILE].items():
+            if row not in self.corpus or self.corpus.get_stamp(row) != self.prj.training_store.stamp(prep_file):
+                return None
+        features = self.corpus.transform(extractor.vocab, extractor.ngram_range, rows)
+        return (features, self.file_data.loc[rows, keys.RATING])
+
+    def _get_samples(self, usage: str, rows_fingerprint: str | None = None) -> pd.Series:
+        """
+        Provides the samples of a usage. Training samples and test samples that have been read already are not
+        read again, unless the rows of the sample file index, or their prepared files, have changed since, or this
+        cannot be told. The fingerprint of the current rows is computed if not given.
+        """
+        if usage == keys.VALIDATION:
+            return self.prj.read_validation_samples(self.file_data)
+        if usage not in [keys.TRAIN, keys.TEST]:
+            raise ValueError(f'unknown usage {usage}')
+        if rows_fingerprint is None:
+            rows_fingerprint = feature_cache.fingerprint_rows(self.file_data, usage, self.prj.training_store)
+        if rows_fingerprint is None or self._samples_fingerprints.get(usage) != rows_fingerprint:
+            if usage == keys.TRAIN:
+                self.train_samples = self.prj.read_train_samples(self.file_data)
+            else:
+                self.test_samples = self.prj.read_test_samples(self.file_data)
+            self._samples_fingerprints[usage] = rows_fingerprint
+        return self.train_samples if usage == keys.TRAIN else self.test_samples
+
     def load_training_project(self, name: str) -> pd.DataFrame:
         """
         Shortcut for 'read_project(name)' and 'read_training_index()'.
@@ -393,7 +847,9 @@ class RateTexts():
         """
         Presents the training data in a rating window.
         """
-        pres = Presenter(self.file_data, self.prj.training_dir)
+        # tkinter and the html widget are only imported when there is something to show
+        from rate_texts.presenter.presenter import Presenter
+        pres = Presenter(self.file_data, self.prj.training_dir, self.prj.training_store)
         pres.show()
 
     # _______________  misc  _______________
@@ -419,7 +875,10 @@ class RateTexts():
         returns: Project
         A project with training data at hand.
         """
+        from rate_texts.run import run_dev
         self.prj = run_dev.create_dev_project(size, name, self.home_path)
+        self._read_doc_freqs()
+        self._read_corpus()
         return self.prj
 
     def get_current_project_name(self):
@@ -429,30 +888,3 @@ class RateTexts():
 
     def is_in_training_mode(self) -> bool:
         return self.training_mode
-
-    def _get_origin_stopwords(self, name: str) -> List[str]:
-        """
-        Gets the stopword list of the given origin from the configuration.
-
-        name:
-        Name of the origin.
-
-        returns:
-        The list of stopwords for this origin, or empty list if no origin of the given name is found.
-
-        raises KeyError:
-        When a json object of an origin does not have a name key (indicates a misconfiguration). Or when the
-        json object of the correct origin does not have a stopword list (indicates a misconfiguration, too).
-        """
-        for origin in self.origins:
-            # get name (might missing due to misconfiguration, raising an error then)
-            oname = origin['origin']
-            if oname != name:
-                continue
-
-            # now we have the correct json object with name == oname
-            # get list (might be missing due to misconfiguration, raising an error in this case)
-            list = origin['stopwords']
-            return list
-
-        return []
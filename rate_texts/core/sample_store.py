@@ -0,0 +1,723 @@
+from hashlib import sha256
+from pathlib import Path, PurePath
+from typing import BinaryIO, Dict, Set, TextIO, Tuple
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tempfile
+import threading
+import time
+try:
+    import fcntl
+except ImportError:  # not available on Windows, writers of other processes are not locked out there
+    fcntl = None
+
+FILES = 'files'
+"""Sample format: one file per raw and per prepared sample, in the subdirectories of the training or data
+directory."""
+SHARDS = 'shards'
+"""Sample format: one shard archive per subdirectory, see 'ShardStore'."""
+_MARKER = 'shards'
+"""File in the root directory that marks a store of shard archives."""
+_DATA = 'samples.dat'
+"""File name of the data file of a shard archive."""
+_INDEX = 'samples.idx'
+"""File name of the offset index of a shard archive."""
+_ENCODING = 'utf-8'
+NONE = 'none'
+"""Codec: samples are written as they are."""
+GZIP = 'gzip'
+"""Codec: samples are compressed with gzip. Fast, compresses html about five- to tenfold."""
+LZMA = 'lzma'
+"""Codec: samples are compressed with lzma. Compresses better than gzip, but takes longer to write."""
+_CODEC_FILE = 'codec'
+"""File in the root directory that names the codec the samples are written with."""
+_MAGIC = {GZIP: b'\x1f\x8b', LZMA: b'\xfd7zXZ\x00'}
+"""The first bytes of compressed content, by codec. Text never starts with them."""
+_GZIP_LEVEL = 6
+"""Compression level of gzip. The highest one takes much longer for little gain on html."""
+_SPOOL_BYTES = 1 << 20
+"""Samples written to a shard are held in memory up to this size, and in a temporary file beyond."""
+_COPY_BYTES = 1 << 16
+"""Number of bytes copied at once when a sample is appended to its shard."""
+_RACY_NS = 2 * 10**9
+"""Directories modified less than this many nanoseconds ago give no version of a store, as a sample written
+within the resolution of the file system clock would not change their mtime."""
+
+
+def open_store(root: Path, sample_format: str | None = None, codec: str | None = None) -> 'FileStore | ShardStore':
+    """
+    Creates the store of the samples of a directory.
+
+    root: Path
+    The training directory or the data directory.
+
+    sample_format: str | None = None
+    'files' or 'shards'. If None, shard archives are used if the directory has been written as such before,
+    and single files otherwise.
+
+    codec: str | None = None
+    'none', 'gzip', or 'lzma', the codec samples are written with. If None, the codec the directory has been
+    written with before, or 'none' for a new directory. Samples are read no matter which codec they have been
+    written with.
+
+    returns: FileStore | ShardStore
+    The store.
+    """
+    if sample_format is None:
+        sample_format = SHARDS if Path(root, _MARKER).exists() else FILES
+    if codec is None:
+        codec = read_codec(root)
+    if sample_format == SHARDS:
+        return ShardStore(root, codec)
+    return FileStore(root, codec)
+
+
+def read_codec(root: Path) -> str:
+    """
+    returns: str
+    The codec the samples of the directory are written with, 'none' if it has not been set.
+    """
+    try:
+        return Path(root, _CODEC_FILE).read_text().strip()
+    except FileNotFoundError:
+        return NONE
+
+
+def compress(content: bytes, codec: str) -> bytes:
+    """
+    Compresses the encoded content of a sample.
+
+    content: bytes
+    The content.
+
+    codec: str
+    'none', 'gzip', or 'lzma'.
+
+    returns: bytes
+    The compressed content.
+
+    raises ValueError:
+    If the codec is unknown.
+    """
+    if codec == NONE:
+        return content
+    if codec == GZIP:
+        return gzip.compress(content, compresslevel=_GZIP_LEVEL, mtime=0)
+    if codec == LZMA:
+        return lzma.compress(content)
+    raise ValueError(f'unknown codec {codec}')
+
+
+def decompress(content: bytes) -> bytes:
+    """
+    Decompresses the content of a sample. The codec is recognized by the first bytes, content that has not been
+    compressed is returned as it is.
+    """
+    codec = _detect(content)
+    if codec == GZIP:
+        return gzip.decompress(content)
+    if codec == LZMA:
+        return lzma.decompress(content)
+    return content
+
+
+class FileStore():
+    """
+    Stores each sample as a file of its own. The samples are addressed by their paths relative to the root, like
+    the raw and the prepared files in the sample file index. Absolute paths are taken as they are.
+
+    With a codec, the files are compressed but keep their names. Compressed files are read as a stream, like
+    plain ones, so chunked reading still needs little memory.
+    """
+
+    root: Path
+    """The directory the paths are relative to."""
+    codec: str
+    """The codec samples are written with."""
+    _codec_saved: bool
+    """True once the codec has been noted down in the root directory."""
+
+    def __init__(self, root: Path, codec: str = NONE) -> None:
+        self.root = root
+        self.codec = codec
+        self._codec_saved = False
+
+    def exists(self, sub_path: str | PurePath) -> bool:
+        """
+        returns: bool
+        True if there is a sample at the path.
+        """
+        return Path(self.root, sub_path).is_file()
+
+    def stamp(self, sub_path: str | PurePath) -> str | None:
+        """
+        returns: str | None
+        A stamp of the current content of the sample, the mtime and the size of its file. It changes when the
+        sample is written again. None if there is no such sample.
+        """
+        try:
+            stat = Path(self.root, sub_path).stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return f'{stat.st_mtime_ns}:{stat.st_size}'
+
+    def version(self) -> str | None:
+        """
+        returns: str | None
+        A version of the samples in the subdirectories of the root, made of one stat per subdirectory. A sample is
+        written to a temporary file that then replaces it, so writing a sample changes the mtime of its directory
+        and with it the version. Samples directly in the root are not taken into account. None if a subdirectory
+        has been modified too recently to tell.
+        """
+        return _version(self.root, False)
+
+    def read(self, sub_path: str | PurePath) -> str:
+        """
+        Reads a sample. Does not take care of I/O errors!
+
+        sub_path: str | PurePath
+        Path of the sample, relative to the root.
+
+        returns: str
+        The content of the sample.
+        """
+        with self.open_read(sub_path) as file:
+            return file.read()
+
+    def write(self, sub_path: str | PurePath, text: str) -> None:
+        """
+        Writes a sample, replacing the one at the same path. Does not take care of I/O errors!
+
+        sub_path: str | PurePath
+        Path of the sample, relative to the root. Missing directories are created.
+
+        text: str
+        The content of the sample.
+        """
+        with self.open_write(sub_path) as file:
+            file.write(text)
+
+    def open_read(self, sub_path: str | PurePath) -> TextIO:
+        """
+        Opens a sample for reading it as text. A compressed file is decompressed while it is read.
+        """
+        path = Path(self.root, sub_path)
+        file = open(path, 'rb')
+        codec = _detect(file.peek(len(_MAGIC[LZMA])))
+        if codec is None:
+            return io.TextIOWrapper(file, encoding=_ENCODING)
+        file.close()
+        return _open_compressed(path, codec, 'rt')
+
+    def open_binary(self, sub_path: str | PurePath) -> BinaryIO:
+        """
+        Opens a sample for reading its bytes. A compressed file is decompressed while it is read.
+        """
+        path = Path(self.root, sub_path)
+        file = open(path, 'rb')
+        codec = _detect(file.peek(len(_MAGIC[LZMA])))
+        if codec is None:
+            return file
+        file.close()
+        return _open_compressed(path, codec, 'rb')
+
+    def open_write(self, sub_path: str | PurePath) -> TextIO:
+        """
+        Opens a sample for writing it as text, compressed by the codec of the store. Missing directories are
+        created. The sample is replaced when the file is closed, and is left as it is if writing fails.
+        """
+        path = Path(self.root, sub_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not self._codec_saved:
+            self._codec_saved = _save_codec(self.root, self.codec)
+        return _FileWriter(path, self.codec)
+
+
+class ShardStore():
+    """
+    Stores the samples of each subdirectory of the root in a shard archive, instead of one file per sample. The
+    samples are addressed by the same paths as single files, like '0001/abcdef_301-raw.html'. The directory,
+    '0001', names the shard, and the file name, which includes the sample id, is the key within the shard.
+
+    A shard archive consists of two files in its directory:
+    - the data file, the encoded samples one after another, each compressed on its own if the store has a codec.
+      It is only appended to.
+    - the offset index, one line per written sample with its key, its offset in the data file, and its size. It
+      is only appended to as well. A sample that is written again is appended anew and the last line counts.
+
+    The offset index of a shard is read once and then only the lines appended since, so samples written by other
+    processes are found as well. The data file is locked while a sample is appended, where the platform supports
+    it. A sample that is not in its shard is read from its single file, so the single files of a project can be
+    read until they have been packed, see 'pack'.
+    """
+
+    root: Path
+    """The directory the paths are relative to."""
+    codec: str
+    """The codec samples are written with."""
+    _indices: Dict[str, Tuple[int, Dict[str, Tuple[int, int]]]]
+    """Maps the shards to the number of bytes of their offset index read so far and to the offsets and sizes of
+    their samples, by key."""
+    _files: Dict[str, BinaryIO]
+    """The open data files of the shards, for reading."""
+    _lock: threading.RLock
+    """Guards the indices and the open data files, so threads can share the store."""
+    _created: Set[str]
+    """The shards whose directories are known to exist."""
+
+    def __init__(self, root: Path, codec: str = NONE) -> None:
+        self.root = root
+        self.codec = codec
+        self._indices = dict()
+        self._files = dict()
+        self._lock = threading.RLock()
+        self._created = set()
+
+    def __getstate__(self) -> Dict:
+        # open files and locks do not survive pickling for worker processes
+        return {'root': self.root, 'codec': self.codec}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(state['root'], state['codec'])
+
+    def exists(self, sub_path: str | PurePath) -> bool:
+        """
+        returns: bool
+        True if there is a sample at the path, in its shard or as single file.
+        """
+        shard, key = _split(sub_path)
+        return self._find(shard, key) is not None or Path(self.root, sub_path).is_file()
+
+    def stamp(self, sub_path: str | PurePath) -> str | None:
+        """
+        returns: str | None
+        A stamp of the current content of the sample, its offset and size in its shard, or, if it has not been
+        packed, the stamp of its single file. It changes when the sample is written again, as the data file is
+        only appended to. None if there is no such sample.
+        """
+        shard, key = _split(sub_path)
+        entry = self._find(shard, key)
+        if entry is None:
+            return FileStore(self.root).stamp(sub_path)
+        return f'@{entry[0]}:{entry[1]}'
+
+    def version(self) -> str | None:
+        """
+        returns: str | None
+        A version of the samples in the subdirectories of the root, made of the mtime of each subdirectory and the
+        size of the offset index of its shard. The offset index grows with every sample written, so writing a
+        sample changes the version. None if a subdirectory has been modified too recently to tell.
+        """
+        return _version(self.root, True)
+
+    def read(self, sub_path: str | PurePath) -> str:
+        """
+        Reads a sample. Does not take care of I/O errors!
+
+        sub_path: str | PurePath
+        Path of the sample, relative to the root.
+
+        returns: str
+        The content of the sample.
+
+        raises FileNotFoundError:
+        If there is no such sample.
+        """
+        shard, key = _split(sub_path)
+        if self._find(shard, key) is None:
+            with FileStore(self.root).open_read(sub_path) as file:
+                return file.read()
+        return self.read_bytes(sub_path).decode(_ENCODING)
+
+    def read_bytes(self, sub_path: str | PurePath) -> bytes:
+        """
+        Reads the encoded sample and decompresses it. A single file is read as it is, but decompressed as well.
+        Does not take care of I/O errors!
+
+        raises FileNotFoundError:
+        If there is no such sample.
+        """
+        shard, key = _split(sub_path)
+        entry = self._find(shard, key)
+        if entry is None:
+            with open(Path(self.root, sub_path), 'rb') as file:
+                return decompress(file.read())
+        offset, size = entry
+        with self._lock:
+            file = self._files.get(shard)
+            if file is None:
+                file = open(Path(self.root, shard, _DATA), 'rb')
+                self._files[shard] = file
+            file.seek(offset)
+            content = file.read(size)
+        if len(content) != size:
+            raise IOError(f'shard {shard} is truncated at {key}')
+        return decompress(content)
+
+    def write(self, sub_path: str | PurePath, text: str) -> None:
+        """
+        Appends a sample to its shard. A sample written before at the same path is superseded. Does not take care
+        of I/O errors!
+
+        sub_path: str | PurePath
+        Path of the sample, relative to the root. Missing directories are created.
+
+        text: str
+        The content of the sample.
+        """
+        self.write_bytes(sub_path, text.encode(_ENCODING))
+
+    def write_bytes(self, sub_path: str | PurePath, content: bytes) -> None:
+        """
+        Appends an encoded sample to its shard, compressed by the codec of the store. Does not take care of I/O
+        errors!
+
+        raises ValueError:
+        If the file name of the path contains a tab or a line break.
+        """
+        self._append(sub_path, io.BytesIO(compress(content, self.codec)))
+
+    def _append(self, sub_path: str | PurePath, record: BinaryIO) -> None:
+        """
+        Appends the rest of a stream, the sample as it is stored, to the shard of the sample. The stream is
+        copied in chunks.
+        """
+        shard, key = _split(sub_path)
+        if '\t' in key or '\n' in key:
+            raise ValueError(f'invalid sample name {key}')
+        directory = Path(self.root, shard)
+        if shard not in self._created:
+            directory.mkdir(parents=True, exist_ok=True)
+            Path(self.root, _MARKER).touch()
+            _save_codec(self.root, self.codec)
+            self._created.add(shard)
+        with self._lock, open(Path(directory, _DATA), 'ab') as data:
+            if fcntl is not None:
+                fcntl.flock(data, fcntl.LOCK_EX)  # released when the file is closed
+            offset = data.seek(0, os.SEEK_END)
+            shutil.copyfileobj(record, data, _COPY_BYTES)
+            size = data.tell() - offset
+            data.flush()
+            # the data is in place before the index points to it
+            with open(Path(directory, _INDEX), 'ab') as index:
+                index.write(f'{key}\t{offset}\t{size}\n'.encode(_ENCODING))
+            if shard in self._indices:
+                self._refresh(shard)  # a sample written again supersedes the known one
+
+    def open_read(self, sub_path: str | PurePath) -> TextIO:
+        """
+        Opens a sample for reading it as text. The sample is streamed from its byte range in the data file and
+        decompressed while it is read, so chunked reading still needs little memory.
+        """
+        return io.TextIOWrapper(self.open_binary(sub_path), encoding=_ENCODING)
+
+    def open_binary(self, sub_path: str | PurePath) -> BinaryIO:
+        """
+        Opens a sample for reading its bytes. The sample is streamed from its byte range in the data file and
+        decompressed while it is read.
+        """
+        shard, key = _split(sub_path)
+        entry = self._find(shard, key)
+        if entry is None:
+            return FileStore(self.root).open_binary(sub_path)
+        record = io.BufferedReader(_Record(Path(self.root, shard, _DATA), entry[0], entry[1], key))
+        codec = _detect(record.peek(len(_MAGIC[LZMA])))
+        if codec == GZIP:
+            return _GzipRecord(record)
+        if codec == LZMA:
+            return _LzmaRecord(record)
+        return record
+
+    def open_write(self, sub_path: str | PurePath) -> TextIO:
+        """
+        Opens a sample for writing it as text. The text is compressed while it is written and spooled to a
+        temporary file beyond a megabyte. It is appended to the shard when the file is closed without an error.
+        """
+        return _ShardWriter(self, sub_path)
+
+    def pack(self, sub_path: str | PurePath, remove: bool = True) -> bool:
+        """
+        Moves a sample from its single file into its shard.
+
+        sub_path: str | PurePath
+        Path of the sample, relative to the root.
+
+        remove: bool = True
+        Delete the single file afterwards.
+
+        returns: bool
+        True if there has been a single file.
+        """
+        path = Path(self.root, sub_path)
+        if not path.is_file():
+            return False
+        with open(path, 'rb') as file:
+            self.write_bytes(sub_path, decompress(file.read()))
+        if remove:
+            path.unlink()
+        return True
+
+    def close(self) -> None:
+        """
+        Closes the data files opened for reading. The store can still be used afterwards.
+        """
+        with self._lock:
+            for file in self._files.values():
+                file.close()
+            self._files = dict()
+
+    def _find(self, shard: str, key: str) -> Tuple[int, int] | None:
+        """
+        Looks a sample up in the offset index of its shard. The lines appended to the index since it has been read
+        last are read first if the sample is not known.
+        """
+        with self._lock:
+            entry = self._indices.get(shard, (0, dict()))[1].get(key)
+            if entry is None:
+                entry = self._refresh(shard).get(key)
+            return entry
+
+    def _refresh(self, shard: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Reads the lines appended to the offset index of a shard since it has been read last.
+        """
+        read_bytes, entries = self._indices.get(shard, (0, dict()))
+        try:
+            with open(Path(self.root, shard, _INDEX), 'rb') as file:
+                file.seek(read_bytes)
+                appended = file.read()
+        except FileNotFoundError:
+            return entries
+        # a line that is still being written is read the next time
+        end = appended.rfind(b'\n') + 1
+        for line in appended[:end].decode(_ENCODING).splitlines():
+            name, offset, size = line.split('\t')
+            entries[name] = (int(offset), int(size))
+        self._indices[shard] = (read_bytes + end, entries)
+        return entries
+
+
+class _FileWriter(io.TextIOWrapper):
+    """
+    Writes the text of a sample, compressed by a codec, to a temporary file next to it, and replaces the sample
+    with it when closed, unless writing has failed. A sample is thus never left half written.
+    """
+
+    def __init__(self, path: Path, codec: str) -> None:
+        self._path = path
+        self._tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        self._failed = False
+        if codec == NONE:
+            file = open(self._tmp_path, 'wb')
+        else:
+            file = _open_compressed(self._tmp_path, codec, 'wb')
+        super().__init__(file, encoding=_ENCODING)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._failed = exc_type is not None
+        return super().__exit__(exc_type, exc_value, traceback)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            super().close()
+        except BaseException:
+            self._tmp_path.unlink(missing_ok=True)
+            raise
+        if self._failed:
+            self._tmp_path.unlink(missing_ok=True)
+        else:
+            os.replace(self._tmp_path, self._path)
+
+
+class _ShardWriter(io.TextIOWrapper):
+    """
+    Encodes the text of a sample into a '_RecordWriter', which appends it to its shard when closed.
+    """
+
+    def __init__(self, store: ShardStore, sub_path: str | PurePath) -> None:
+        self._record = _RecordWriter(store, sub_path)
+        super().__init__(io.BufferedWriter(self._record), encoding=_ENCODING)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._record.failed = exc_type is not None
+        return super().__exit__(exc_type, exc_value, traceback)
+
+
+class _RecordWriter(io.RawIOBase):
+    """
+    Compresses a sample by the codec of its store into a temporary file, spooled in memory up to a megabyte, and
+    appends it to its shard when closed, unless writing has failed.
+    """
+
+    failed: bool
+    """True if the sample must not be appended."""
+
+    def __init__(self, store: ShardStore, sub_path: str | PurePath) -> None:
+        super().__init__()
+        self.failed = False
+        self._store = store
+        self._sub_path = sub_path
+        self._spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES)
+        self._compressor: BinaryIO | None = None
+        if store.codec == GZIP:
+            self._compressor = gzip.GzipFile(fileobj=self._spool, mode='wb',  # type: ignore
+                                             compresslevel=_GZIP_LEVEL, mtime=0)
+        elif store.codec == LZMA:
+            self._compressor = lzma.LZMAFile(self._spool, 'wb')  # type: ignore
+        elif store.codec != NONE:
+            raise ValueError(f'unknown codec {store.codec}')
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, content) -> int:
+        (self._compressor or self._spool).write(content)
+        return len(content)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._compressor is not None:
+                self._compressor.close()  # the spool stays open
+            if not self.failed:
+                self._spool.seek(0)
+                self._store._append(self._sub_path, self._spool)  # type: ignore
+        finally:
+            self._spool.close()
+            super().close()
+
+
+class _Record(io.RawIOBase):
+    """
+    Reads the byte range of a sample in the data file of its shard, with a file handle of its own.
+    """
+
+    def __init__(self, path: Path, offset: int, size: int, key: str) -> None:
+        super().__init__()
+        self._file = open(path, 'rb')
+        self._file.seek(offset)
+        self._left = size
+        self._key = key
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._left == 0:
+            return 0
+        count = self._file.readinto(memoryview(buffer)[:min(len(buffer), self._left)])
+        if count == 0:
+            raise IOError(f'shard is truncated at {self._key}')
+        self._left -= count
+        return count
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+class _GzipRecord(gzip.GzipFile):
+    """
+    Decompresses a gzip compressed record and closes it along.
+    """
+
+    def __init__(self, record: BinaryIO) -> None:
+        super().__init__(fileobj=record, mode='rb')
+        self._record = record
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._record.close()
+
+
+class _LzmaRecord(lzma.LZMAFile):
+    """
+    Decompresses an lzma compressed record and closes it along.
+    """
+
+    def __init__(self, record: BinaryIO) -> None:
+        super().__init__(record)
+        self._record = record
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._record.close()
+
+
+def _detect(head: bytes) -> str | None:
+    """
+    Recognizes the codec of compressed content by its first bytes. None if the content is not compressed.
+    """
+    for codec, magic in _MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def _open_compressed(path: Path, codec: str, mode: str):
+    encoding = None if 'b' in mode else _ENCODING
+    if codec == GZIP:
+        if 'w' in mode:
+            return gzip.open(path, mode, compresslevel=_GZIP_LEVEL, encoding=encoding)
+        return gzip.open(path, mode, encoding=encoding)
+    if codec == LZMA:
+        return lzma.open(path, mode, encoding=encoding)
+    raise ValueError(f'unknown codec {codec}')
+
+
+def _version(root: Path, with_index: bool) -> str | None:
+    """
+    Computes the version of a store from a stat of each subdirectory of its root, and, with the index, of the
+    offset index of the shard in it. None if a subdirectory has been modified too recently to tell.
+    """
+    now = time.time_ns()
+    digest = sha256()
+    try:
+        with os.scandir(root) as entries:
+            dirs = sorted((entry.name, entry.stat().st_mtime_ns) for entry in entries if entry.is_dir())
+    except FileNotFoundError:
+        dirs = []
+    for name, mtime in dirs:
+        if now - mtime < _RACY_NS:
+            return None
+        size = -1
+        if with_index:
+            try:
+                size = os.stat(Path(root, name, _INDEX)).st_size
+            except FileNotFoundError:
+                pass
+        digest.update(f'{name}\0{mtime}\0{size}\n'.encode(_ENCODING))
+    return digest.hexdigest()
+
+
+def _save_codec(root: Path, codec: str) -> bool:
+    """
+    Notes the codec down in the root directory, so the store is opened with the same codec later on. Nothing is
+    noted down for uncompressed samples in a directory without codec.
+
+    returns: bool
+    True if the codec is noted down in the root directory.
+    """
+    if codec == NONE and not Path(root, _CODEC_FILE).exists():
+        return False
+    if read_codec(root) != codec:
+        Path(root, _CODEC_FILE).write_text(codec)
+    return True
+
+
+def _split(sub_path: str | PurePath) -> Tuple[str, str]:
+    """
+    Splits the path of a sample into its shard and its key.
+    """
+    path = PurePath(sub_path)
+    return path.parent.as_posix(), path.name
@@ -0,0 +1,96 @@
+from time import perf_counter
+from typing import Callable, Dict, List
+from rate_texts.doc_process import html_cleaning
+
+_WORDS = 'the quick brown fox jumps over the lazy dog'.split()
+
+
+def make_nested_html(size: int, depth: int = 200) -> str:
+    """
+    Creates an html document of about 'size' characters that consists of blocks of deeply nested divs.
+
+    size: int
+    Approximate number of characters of the document.
+
+    depth: int = 200
+    Nesting depth of the divs in each block.
+    """
+    words = ' '.join(_WORDS)
+    opening = ''.join(f'<div class="level{level}">{words}' for level in range(depth))
+    block = opening + '</div>' * depth
+    repeat = max(1, size // len(block))
+    return '<html><head><title>nested</title></head><body>' + block * repeat + '</body></html>'
+
+
+def make_malformed_html(size: int) -> str:
+    """
+    Creates an html document of about 'size' characters with tags that are never closed, lonely
+    brackets, and scripts and comments in between.
+
+    size: int
+    Approximate number of characters of the document.
+    """
+    words = ' '.join(_WORDS)
+    block = f'<p>{words} <span class="x">{words} <img src="a.png"> 1 < 2 <!-- {words} --> <b>{words}' \
+        f'<script>var a = "<p>";</script> <li>{words}'
+    repeat = max(1, size // len(block))
+    return '<html><body>' + block * repeat
+
+
+def measure(clean: Callable[[str], str], html: str, repeat: int = 3) -> float:
+    """
+    Measures the throughput of a cleaning function.
+
+    clean: Callable[[str], str]
+    The cleaning function.
+
+    html: str
+    The document that is cleaned.
+
+    repeat: int = 3
+    The best of this many runs is taken.
+
+    returns: float
+    Throughput in MB/s.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        clean(html)
+        best = min(best, perf_counter() - start)
+    return len(html) / 1e6 / best
+
+
+def run(sizes: List[int] = [10_000, 100_000, 1_000_000], regex_limit: int = 100_000) -> List[Dict]:
+    """
+    Compares the throughput of 'clean_html' with the former, regex based implementation
+    'clean_html_regex' on nested and on malformed documents. Prints a table to sout.
+
+    sizes: List[int] = [10_000, 100_000, 1_000_000]
+    Document sizes in characters.
+
+    regex_limit: int = 100_000
+    The regex based implementation is skipped for larger documents, as it takes very long on them.
+
+    returns: List[Dict]
+    One entry per measurement.
+    """
+    makers = {'nested': make_nested_html, 'malformed': make_malformed_html}
+    results = []
+    print(f'{"input":>10} {"size":>10} {"streaming MB/s":>15} {"regex MB/s":>12}')
+    for kind, make in makers.items():
+        for size in sizes:
+            html = make(size)
+            streaming = measure(html_cleaning.clean_html, html)
+            if len(html) <= regex_limit:
+                regex = measure(html_cleaning.clean_html_regex, html, repeat=1)
+            else:
+                regex = float('nan')
+            results.append({'input': kind, 'size': len(html),
+                           'streaming': streaming, 'regex': regex})
+            print(f'{kind:>10} {len(html):>10} {streaming:>15.2f} {regex:>12.2f}')
+    return results
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,77 @@
+from typing import Dict, List
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ['tensorflow', 'keras', 'sklearn', 'joblib', 'nltk', 'snowballstemmer', 'tkinter', 'tkinterweb']
+"""Packages that take long to import and must only be imported once they are actually used."""
+
+BUDGET = 1.0
+"""Seconds a cold import of the modules measured by default may take at most."""
+
+_CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:
+    rss = float('nan')
+print(json.dumps({{'seconds': seconds, 'rss': rss, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+'''
+
+
+def measure(module: str) -> Dict:
+    """
+    Imports a module in a fresh interpreter.
+
+    module: str
+    The module that is imported.
+
+    returns: Dict
+    The seconds the import took, the peak resident memory in MB (on Linux), and the heavy modules that have been
+    imported along.
+    """
+    script = _CHILD.format(module=module, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(modules: List[str] = ['rate_texts.core.project', 'rate_texts.core.rate_texts'], repeat: int = 5,
+        budget: float = BUDGET) -> List[Dict]:
+    """
+    Measures how long importing each module takes in a fresh interpreter, which is what every CLI invocation and
+    every worker process pays before doing anything. The fastest of the repetitions is taken, the others are
+    disturbed by the file system cache warming up. Prints a table to sout.
+
+    modules: List[str] = ['rate_texts.core.project', 'rate_texts.core.rate_texts']
+    The modules measured.
+
+    repeat: int = 5
+    Number of imports per module.
+
+    budget: float = 1.0
+    Seconds an import may take at most.
+
+    returns: List[Dict]
+    One entry per module, with the keys 'module', 'seconds', 'rss', 'heavy', and 'ok'. An entry is not ok if the
+    import exceeds the budget or imports any of the heavy modules.
+    """
+    results = []
+    print(f'{"module":>28} {"import s":>9} {"RSS MB":>7}  heavy modules')
+    for module in modules:
+        measurements = [measure(module) for _ in range(repeat)]
+        best = min(measurements, key=lambda measurement: measurement['seconds'])
+        ok = best['seconds'] <= budget and len(best['heavy']) == 0
+        results.append({'module': module, 'seconds': best['seconds'], 'rss': best['rss'], 'heavy': best['heavy'],
+                        'ok': ok})
+        print(f'{module:>28} {best["seconds"]:>9.3f} {best["rss"]:>7.1f}  {", ".join(best["heavy"]) or "-"}'
+              f'{"" if ok else "  (over budget)"}')
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
@@ -0,0 +1,114 @@
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+import os
+import tempfile
+from rate_texts.core import sample_store
+from rate_texts.core.sample_store import FileStore, ShardStore
+from rate_texts.dev_tools.sample_generator import SampleGenerator
+
+
+def make_page(text: str, links: int = 150) -> str:
+    """
+    Wraps a text into the kind of boilerplate scraped pages come with: styles, scripts, a navigation bar, and a
+    footer, which take up most of the page.
+
+    text: str
+    The text of the page.
+
+    links: int = 150
+    Number of links in the navigation bar.
+    """
+    style = ''.join(f'.c{idx} {{ margin: {idx % 7}px; color: #{idx % 256:02x}a0b0; }}\n' for idx in range(60))
+    script = 'function track(e) { window.dataLayer.push({"event": e, "page": location.href}); }\n' * 20
+    nav = ''.join(f'<li class="nav-item"><a href="/section/{idx}/index.html" class="c{idx % 60}">Section {idx}</a>'
+                  '</li>\n' for idx in range(links))
+    footer = '<p class="legal">All rights reserved. Terms of use, privacy policy, and cookie settings.</p>\n' * 10
+    return f'<html><head><style>{style}</style><script>{script}</script></head><body><ul class="nav">{nav}</ul>' \
+        f'<div class="content"><p class="text">{text}</p></div><footer>{footer}</footer></body></html>'
+
+
+def drop_cache(root: Path) -> bool:
+    """
+    Asks the operating system to drop the cached content of all files below 'root', so they are read from the
+    disk again. Only possible where 'os.posix_fadvise' is available.
+
+    returns: bool
+    True if the cache has been dropped.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    os.sync()
+    for directory, _, names in os.walk(root):
+        for name in names:
+            fd = os.open(Path(directory, name), os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+    return True
+
+
+def run(n_samples: int = 5_000, codecs: List[str] = [sample_store.NONE, sample_store.GZIP, sample_store.LZMA],
+        directory: Path | None = None) -> List[Dict]:
+    """
+    Writes the same raw samples with each codec, as single files and as shard archives, and reads them back
+    with a cold and with a warm file system cache. Prints a table to sout. The throughput refers to the
+    uncompressed samples.
+
+    n_samples: int = 5000
+    Number of samples.
+
+    codecs: List[str] = ['none', 'gzip', 'lzma']
+    The codecs compared.
+
+    directory: Path | None = None
+    Where the samples are written, a temporary directory if None. Use a directory on the disk of interest, like a
+    network file system, as the temporary directory may reside in memory.
+
+    returns: List[Dict]
+    One entry per measurement.
+    """
+    generator = SampleGenerator()
+    pages = []
+    for _ in range(n_samples):
+        generator.generate_sample()
+        pages.append(make_page(generator.text))
+    paths = [f'{idx // 300:04d}/s{idx}-raw.html' for idx in range(n_samples)]
+    megabytes = sum(len(page.encode('utf-8')) for page in pages) / 2**20
+
+    results = []
+    print(f'{"store":>6} {"codec":>6} {"disk MB":>8} {"ratio":>6} {"write s":>8} {"cold MB/s":>10} {"warm MB/s":>10}')
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for codec in codecs:
+            for name, store_class in [('files', FileStore), ('shards', ShardStore)]:
+                root = Path(tmp, f'{name}-{codec}')
+                store = store_class(root, codec)
+                start = perf_counter()
+                for path, page in zip(paths, pages):
+                    store.write(path, page)
+                write = perf_counter() - start
+                disk = sum(Path(directory, file).stat().st_size
+                           for directory, _, files in os.walk(root) for file in files) / 2**20
+
+                speeds = []
+                for cold in [True, False]:
+                    if cold and not drop_cache(root):
+                        speeds.append(float('nan'))
+                        continue
+                    reader = store_class(root, codec)
+                    start = perf_counter()
+                    for path in paths:
+                        reader.read(path)
+                    speeds.append(megabytes / (perf_counter() - start))
+                    if isinstance(reader, ShardStore):
+                        reader.close()
+                results.append({'store': name, 'codec': codec, 'disk': disk, 'ratio': megabytes / disk,
+                                'write': write, 'cold': speeds[0], 'warm': speeds[1]})
+                print(f'{name:>6} {codec:>6} {disk:>8.1f} {megabytes / disk:>6.1f} {write:>8.2f} {speeds[0]:>10.1f} '
+                      f'{speeds[1]:>10.1f}')
+    return results
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,117 @@
+from time import perf_counter
+from typing import Dict, List
+from scipy import sparse
+import numpy as np
+from rate_texts.doc_process import vocab_extraction
+
+
+def make_matrix(n_words: int, n_docs: int = 2000, seed: int = 0) -> sparse.csc_matrix:
+    """
+    Creates a random binary document term matrix. The document frequencies of the words follow Zipf's law,
+    as they do in natural texts, so most words are rare and a few appear in most documents.
+
+    n_words: int
+    Number of words, i.e. columns.
+
+    n_docs: int = 2000
+    Number of documents, i.e. rows.
+
+    seed: int = 0
+    Seed of the random generator.
+    """
+    rng = np.random.default_rng(seed)
+    df = np.minimum(n_docs, np.maximum(1, (0.5 * n_docs / np.arange(1, n_words + 1)).astype(int)))
+    rng.shuffle(df)
+    rows = np.concatenate([rng.choice(n_docs, size=count, replace=False) for count in df])
+    cols = np.repeat(np.arange(n_words), df)
+    data = np.ones(len(rows))
+    return sparse.csc_matrix((data, (rows, cols)), shape=(n_docs, n_words))
+
+
+def run(sizes: List[int] = [1_000, 10_000, 50_000], thresholds: List[float] = [0.98, 0.999],
+        pairwise_limit: int = 1_000) -> List[Dict]:
+    """
+    Compares the run time of 'find_redundant' with the former, pairwise implementation
+    'find_redundant_pairwise' on random document term matrices. Prints a table to sout.
+
+    sizes: List[int] = [1_000, 10_000, 50_000]
+    Vocabulary sizes.
+
+    thresholds: List[float] = [0.98, 0.999]
+    The thresholds of the pruning. The higher one drops fewer words, so more pairs are compared.
+
+    pairwise_limit: int = 1_000
+    The pairwise implementation is skipped for larger vocabularies, as it takes very long on them.
+
+    returns: List[Dict]
+    One entry per measurement.
+    """
+    results = []
+    print(f'{"words":>8} {"threshold":>10} {"dropped":>8} {"blockwise s":>12} {"pairwise s":>11}')
+    for n_words in sizes:
+        matrix = make_matrix(n_words)
+        for threshold in thresholds:
+            start = perf_counter()
+            droplist = vocab_extraction.find_redundant(matrix, threshold)
+            blockwise = perf_counter() - start
+            if n_words <= pairwise_limit:
+                start = perf_counter()
+                expect = vocab_extraction.find_redundant_pairwise(matrix, threshold)
+                pairwise = perf_counter() - start
+                assert expect == droplist, 'implementations disagree'
+            else:
+                pairwise = float('nan')
+            results.append({'words': n_words, 'threshold': threshold, 'dropped': len(droplist),
+                            'blockwise': blockwise, 'pairwise': pairwise})
+            print(f'{n_words:>8} {threshold:>10} {len(droplist):>8} {blockwise:>12.3f} {pairwise:>11.3f}')
+    return results
+
+
+def run_approximate(sizes: List[int] = [10_000, 50_000, 200_000], n_docs: List[int] = [2_000, 200_000],
+                    threshold: float = 0.999, exact_limit: int = 50_000) -> List[Dict]:
+    """
+    Compares 'find_redundant_lsh' with the exact 'find_redundant'. Prints a table to sout with the run times, the
+    number of pairs the approximate version compared, and how many of the words dropped by the exact version it
+    dropped as well.
+
+    sizes: List[int] = [10_000, 50_000, 200_000]
+    Vocabulary sizes.
+
+    n_docs: List[int] = [2_000, 200_000]
+    Numbers of documents. With many documents and a high threshold, few words are dropped, and the exact version
+    has to compare almost all pairs.
+
+    threshold: float = 0.999
+    The threshold of the pruning.
+
+    exact_limit: int = 50_000
+    The exact version is skipped for larger vocabularies.
+
+    returns: List[Dict]
+    One entry per measurement.
+    """
+    results = []
+    print(f'{"words":>8} {"docs":>8} {"exact s":>8} {"lsh s":>8} {"examined":>10} {"dropped":>8} {"recall":>7}')
+    for n_words in sizes:
+        for docs in n_docs:
+            matrix = make_matrix(n_words, docs)
+            start = perf_counter()
+            droplist, examined = vocab_extraction.find_redundant_lsh(matrix, threshold)
+            approximate = perf_counter() - start
+            if n_words <= exact_limit:
+                start = perf_counter()
+                expect = vocab_extraction.find_redundant(matrix, threshold)
+                exact = perf_counter() - start
+                recall = len(set(expect) & set(droplist)) / len(expect) if len(expect) > 0 else 1.
+            else:
+                exact = recall = float('nan')
+            results.append({'words': n_words, 'docs': docs, 'exact': exact, 'approximate': approximate,
+                            'examined': examined, 'dropped': len(droplist), 'recall': recall})
+            print(f'{n_words:>8} {docs:>8} {exact:>8.2f} {approximate:>8.2f} {examined:>10} {len(droplist):>8} '
+                  f'{recall:>7.3f}')
+    return results
+
+
+if __name__ == '__main__':
+    run()
+    run_approximate()
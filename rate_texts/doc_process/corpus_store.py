@@ -0,0 +1,434 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+import json
+import os
+import numpy as np
+import numpy.typing as npt
+from scipy import sparse
+
+_META = 'meta.json'
+_IDS = 'token_ids.bin'
+_OFFSETS = 'offsets.npy'
+_BATCH_TOKENS = 1 << 22
+"""Maximum number of tokens turned into ngrams at once. Bounds the memory used per batch."""
+_COMPACT_FRACTION = 0.5
+"""The token id file is rewritten when more than this fraction of its token ids is no longer referenced."""
+
+
+class CorpusStore():
+    """
+    Keeps the prepared documents of a project as token ids, so they do not have to be read from their files and
+    tokenized again. A global dictionary maps the tokens to ids. The token ids of all documents are concatenated
+    into a single file of int32 values, and the documents are located in it by their offsets. The file is memory
+    mapped for reading.
+
+    The tokens are found exactly the way the vectorizers of scikit-learn find them, so the ngrams built from
+    consecutive token ids are the same terms that 'vocab_extraction.extract_vocab' and 'tools.FeatureExtractor'
+    see. The token id file is only appended to. If a document is added again or removed, its former token ids
+    remain in the file, but are no longer referenced. Once they make up more than half of the file, the file is
+    rewritten with the referenced token ids only, see 'write'.
+    """
+
+    directory: Path
+    """Directory the store is written to."""
+    _tokens: List[str]
+    """The tokens, by their ids."""
+    _token_ids: Dict[str, int]
+    """Maps the tokens to their ids."""
+    _rows: Dict[str, int]
+    """Maps the rows of the sample file index to the positions of their documents in '_offsets'."""
+    _stamps: Dict[str, str]
+    """Stamps of the prepared files the documents have been made from, by row, see 'FileStore.stamp'."""
+    _offsets: List[Tuple[int, int]]
+    """Start and end of the token ids of each document."""
+    _ids: npt.NDArray[np.int32]
+    """The token ids that have been written, memory mapped."""
+    _pending: List[npt.NDArray[np.int32]]
+    """Token ids added since the store has been written or read."""
+    _all_ids: npt.NDArray[np.int32] | None
+    """The written and the pending token ids put together, if they have been needed since the last change."""
+    _length: int
+    """Total number of token ids, written or pending."""
+    _analyzer: Callable[[str], List[str]] | None
+    """Splits a text into its tokens. None until the first document is added."""
+
+    def __init__(self, directory: Path) -> None:
+        """
+        directory: Path
+        Directory the store is written to. It is created when the store is written.
+        """
+        self.directory = directory
+        self._tokens = []
+        self._token_ids = dict()
+        self._rows = dict()
+        self._stamps = dict()
+        self._offsets = []
+        self._ids = np.zeros(0, dtype=np.int32)
+        self._pending = []
+        self._all_ids = None
+        self._length = 0
+        self._analyzer = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, row: str) -> bool:
+        return row in self._rows
+
+    def add(self, row: str, text: str, stamp: str | None = None) -> None:
+        """
+        Adds a document. A document that has been added for the same row before is replaced.
+
+        row: str
+        Index of the document in the sample file index.
+
+        text: str
+        The prepared text of the document.
+
+        stamp: str | None = None
+        Stamp of the prepared file the text has been read from, to recognize a file that has been written again.
+        """
+        if self._analyzer is None:
+            # the same tokens as the ones of the vectorizers, ngrams are built from the token ids. scikit-learn is
+            # only imported once it is needed
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._analyzer = TfidfVectorizer().build_analyzer()
+        ids = []
+        for token in self._analyzer(text):
+            token_id = self._token_ids.get(token)
+            if token_id is None:
+                token_id = len(self._tokens)
+                self._token_ids[token] = token_id
+                self._tokens.append(token)
+            ids.append(token_id)
+        self._rows[row] = len(self._offsets)
+        self._stamps.pop(row, None)
+        if stamp is not None:
+            self._stamps[row] = stamp
+        self._offsets.append((self._length, self._length + len(ids)))
+        self._pending.append(np.array(ids, dtype=np.int32))
+        self._all_ids = None
+        self._length += len(ids)
+
+    def remove(self, row: str) -> None:
+        """
+        Removes a document, if there is one for the row. Its token ids are no longer referenced.
+
+        row: str
+        Index of the document in the sample file index.
+        """
+        self._rows.pop(row, None)
+        self._stamps.pop(row, None)
+
+    def get_stamp(self, row: str) -> str | None:
+        """
+        returns: str | None
+        The stamp of the prepared file the document of the row has been made from. None if there is no document
+        or it has been added without a stamp.
+        """
+        return self._stamps.get(row)
+
+    def get_tokens(self) -> npt.NDArray[np.str_]:
+        """
+        returns: numpy.NDArray[numpy.str_]
+        All tokens, by their ids.
+        """
+        return np.array(self._tokens, dtype=str)
+
+    def get_ids(self, row: str) -> npt.NDArray[np.int32]:
+        """
+        row: str
+        Index of the document in the sample file index.
+
+        returns: numpy.NDArray[numpy.int32]
+        The token ids of the document, in the order of the text.
+
+        raises KeyError:
+        If there is no document for the row.
+        """
+        start, end = self._offsets[self._rows[row]]
+        return self._get_all_ids()[start:end]
+
+    def get_rows(self) -> List[str]:
+        """
+        returns: List[str]
+        The rows of all documents, in the order they have been added.
+        """
+        return list(self._rows.keys())
+
+    def get_term_matrix(self, ngram_range: Tuple[int, int] = (1, 1), rows: Iterable[str] | None = None) -> Tuple[npt.NDArray[np.str_], sparse.csr_matrix]:
+        """
+        Puts the binary document term matrix of all ngrams of the documents together, without any tokenization.
+
+        ngram_range: Tuple[int, int] = (1, 1)
+        The ngrams that are the terms.
+
+        rows: Iterable[str] | None = None
+        The documents, by their rows in the sample file index. Rows without a document are skipped. All documents
+        if None.
+
+        returns: Tuple[numpy.NDArray[numpy.str_], scipy.sparse.csr_matrix]
+        The terms that appear in the documents, and the matrix with one row per document and one column per term.
+        """
+        positions = self._get_positions(rows)
+        n_tokens = max(1, len(self._tokens))
+        tokens = self.get_tokens()
+        terms: List[npt.NDArray[np.str_]] = []
+        indices: List[npt.NDArray[np.int64]] = []
+        docs_all: List[npt.NDArray[np.int64]] = []
+        n_terms = 0
+        for size in range(ngram_range[0], ngram_range[1] + 1):
+            _check_ngram_size(n_tokens, size)
+            docs, keys = self._get_ngram_keys(positions, size, n_tokens)
+            unique, columns = np.unique(keys, return_inverse=True)
+            terms.append(_decode(tokens, unique, size, n_tokens))
+            indices.append(n_terms + columns.ravel())
+            docs_all.append(docs)
+            n_terms += len(unique)
+
+        docs = np.concatenate(docs_all) if len(docs_all) > 0 else np.zeros(0, dtype=np.int64)
+        columns = np.concatenate(indices) if len(indices) > 0 else np.zeros(0, dtype=np.int64)
+        data = np.ones(len(docs), dtype=np.float64)
+        matrix = sparse.csr_matrix((data, (docs, columns)), shape=(len(positions), n_terms))
+        vocab = np.concatenate(terms) if len(terms) > 0 else np.zeros(0, dtype=str)
+        return vocab, matrix
+
+    def transform(self, vocab: npt.NDArray[np.str_], ngram_range: Tuple[int, int] = (1, 1), rows: Iterable[str] | None = None) -> sparse.csr_matrix:
+        """
+        Computes the features of the documents, like 'tools.FeatureExtractor.transform' does from their texts,
+        without any tokenization.
+
+        vocab: numpy.NDArray[numpy.str_]
+        The vocabulary.
+
+        ngram_range: Tuple[int, int] = (1, 1)
+        The ngram range the vocabulary is made of.
+
+        rows: Iterable[str] | None = None
+        The documents, by their rows in the sample file index. All documents if None.
+
+        returns: scipy.sparse.csr_matrix
+        One row per document, one column per word of the vocabulary. An entry is 1 if the word appears in the
+        document, and 0 otherwise.
+
+        raises KeyError:
+        If there is no document for one of the rows.
+        """
+        positions = self._get_positions(rows, strict=True)
+        n_tokens = max(1, len(self._tokens))
+
+        docs_all: List[npt.NDArray[np.int64]] = []
+        columns_all: List[npt.NDArray[np.int64]] = []
+        for size in range(ngram_range[0], ngram_range[1] + 1):
+            _check_ngram_size(n_tokens, size)
+            # the words of the vocabulary as keys, words with unknown tokens cannot appear in any document
+            words, word_keys = [], []
+            for column, word in enumerate(vocab):
+                parts = str(word).split(' ')
+                ids = [self._token_ids.get(part) for part in parts]
+                if len(parts) != size or None in ids:
+                    continue
+                key = 0
+                for token_id in ids:
+                    key = key * n_tokens + token_id  # type: ignore
+                words.append(column)
+                word_keys.append(key)
+            if len(words) == 0:
+                continue
+            order = np.argsort(word_keys)
+            sorted_keys = np.array(word_keys, dtype=np.int64)[order]
+            sorted_columns = np.array(words, dtype=np.int64)[order]
+
+            docs, keys = self._get_ngram_keys(positions, size, n_tokens)
+            found = np.searchsorted(sorted_keys, keys)
+            found[found >= len(sorted_keys)] = 0
+            hit = sorted_keys[found] == keys
+            docs_all.append(docs[hit])
+            columns_all.append(sorted_columns[found[hit]])
+
+        docs = np.concatenate(docs_all) if len(docs_all) > 0 else np.zeros(0, dtype=np.int64)
+        columns = np.concatenate(columns_all) if len(columns_all) > 0 else np.zeros(0, dtype=np.int64)
+        data = np.ones(len(docs), dtype=np.float64)
+        matrix = sparse.csr_matrix((data, (docs, columns)), shape=(len(positions), len(vocab)))
+        matrix.sort_indices()
+        return matrix
+
+    def write(self) -> None:
+        """
+        Writes the store to its directory. The token ids added since the last write are appended to the token id
+        file, and the store is memory mapped from it afterwards. If most token ids are no longer referenced, the
+        file is rewritten instead, see 'compact'.
+        """
+        referenced = sum(self._offsets[pos][1] - self._offsets[pos][0] for pos in self._rows.values())
+        if self._length - referenced > _COMPACT_FRACTION * self._length:
+            self.compact()
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = Path(self.directory, _IDS)
+        written = len(self._ids)
+        with open(path, 'ab') as file:
+            # drop what a write that has not been completed may have left behind
+            file.truncate(written * np.dtype(np.int32).itemsize)
+            for ids in self._pending:
+                file.write(ids.tobytes())
+        self._write_meta()
+        self._pending = []
+        self._map_ids()
+
+    def compact(self) -> None:
+        """
+        Writes the store to its directory with the token ids of the current documents only, dropping the ones of
+        removed and replaced documents. The token id file is written anew next to the old one and replaces it,
+        document by document, so the token ids are not held in memory at once.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        all_ids = self._get_all_ids()
+        tmp_path = Path(self.directory, f'{_IDS}.tmp')
+        offsets: List[Tuple[int, int]] = []
+        length = 0
+        with open(tmp_path, 'wb') as file:
+            for position in self._rows.values():
+                start, end = self._offsets[position]
+                file.write(np.ascontiguousarray(all_ids[start:end]).tobytes())
+                offsets.append((length, length + end - start))
+                length += end - start
+        # the memory map of the old file is released before the file is replaced
+        del all_ids
+        self._ids = np.zeros(0, dtype=np.int32)
+        self._all_ids = None
+        self._pending = []
+        # the old meta file claims more token ids than the new file holds, a store left behind by a crash in
+        # between fails to be read instead of being read wrong
+        os.replace(tmp_path, Path(self.directory, _IDS))
+        self._rows = {row: position for position, row in enumerate(self._rows)}
+        self._offsets = offsets
+        self._length = length
+        self._write_meta()
+        self._map_ids()
+
+    def read(self) -> bool:
+        """
+        Reads the store from its directory, if it has been written before. Replaces the current content. The
+        token ids are memory mapped.
+
+        returns: bool
+        True if the store has been read.
+        """
+        path = Path(self.directory, _META)
+        if not path.exists():
+            return False
+        with open(path, 'rt') as file:
+            meta = json.load(file)
+        offsets = np.load(Path(self.directory, _OFFSETS))
+
+        self._tokens = meta['tokens']
+        self._token_ids = {token: token_id for token_id, token in enumerate(self._tokens)}
+        self._rows = dict(zip(meta['rows'], meta['positions']))
+        self._stamps = {row: stamp for row, stamp in zip(meta['rows'], meta.get('stamps', [])) if stamp is not None}
+        self._offsets = [(int(start), int(end)) for start, end in offsets]
+        self._length = meta['length']
+        self._pending = []
+        self._map_ids()
+        return True
+
+    def _write_meta(self) -> None:
+        np.save(Path(self.directory, _OFFSETS), np.array(self._offsets, dtype=np.int64).reshape(-1, 2))
+        # the meta file comes last, the token ids it does not know of do not count
+        meta = {'length': self._length, 'rows': list(self._rows.keys()),
+                'positions': list(self._rows.values()), 'tokens': self._tokens,
+                'stamps': [self._stamps.get(row) for row in self._rows]}
+        with open(Path(self.directory, _META), 'wt') as file:
+            json.dump(meta, file)
+
+    def _map_ids(self) -> None:
+        """
+        Memory maps the token ids that have been written.
+        """
+        self._all_ids = None
+        if self._length == 0:
+            self._ids = np.zeros(0, dtype=np.int32)
+            return
+        self._ids = np.memmap(Path(self.directory, _IDS), dtype=np.int32,
+                              mode='r', shape=(self._length,))
+
+    def _get_all_ids(self) -> npt.NDArray[np.int32]:
+        """
+        Provides the token ids of all documents, written or pending.
+        """
+        if len(self._pending) == 0:
+            return self._ids
+        if self._all_ids is None:
+            self._all_ids = np.concatenate([self._ids] + self._pending)
+        return self._all_ids
+
+    def _get_positions(self, rows: Iterable[str] | None, strict: bool = False) -> List[int]:
+        if rows is None:
+            return list(self._rows.values())
+        if strict:
+            return [self._rows[row] for row in rows]
+        return [self._rows[row] for row in rows if row in self._rows]
+
+    def _get_ngram_keys(self, positions: List[int], size: int, n_tokens: int) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+        """
+        Finds the distinct ngrams of the given size in each document. An ngram is encoded as a single number, its
+        token ids taken as digits to the base 'n_tokens'. The documents are processed in batches.
+
+        returns: Tuple[numpy.NDArray[numpy.int64], numpy.NDArray[numpy.int64]]
+        For each distinct ngram of each document, the index of the document in 'positions' and the ngram.
+        """
+        all_ids = self._get_all_ids()
+        docs_parts: List[npt.NDArray[np.int64]] = [np.zeros(0, dtype=np.int64)]
+        keys_parts: List[npt.NDArray[np.int64]] = [np.zeros(0, dtype=np.int64)]
+        batch: List[int] = []
+        batch_tokens = 0
+        for idx, position in enumerate(positions + [-1]):
+            if position >= 0:
+                start, end = self._offsets[position]
+                batch.append(idx)
+                batch_tokens += end - start
+                if batch_tokens < _BATCH_TOKENS:
+                    continue
+            if len(batch) == 0:
+                continue
+
+            segments = [self._offsets[positions[doc]] for doc in batch]
+            lengths = np.array([end - start for start, end in segments], dtype=np.int64)
+            ids = np.concatenate([all_ids[start:end] for start, end in segments]).astype(np.int64)
+            docs = np.repeat(np.array(batch, dtype=np.int64), lengths)
+            count = len(ids) - size + 1
+            if count > 0:
+                keys = np.zeros(count, dtype=np.int64)
+                for shift in range(size):
+                    keys = keys * n_tokens + ids[shift:shift + count]
+                # ngrams must not reach into the next document
+                same_doc = docs[:count] == docs[size - 1:]
+                docs, keys = docs[:count][same_doc], keys[same_doc]
+                order = np.lexsort((keys, docs))
+                docs, keys = docs[order], keys[order]
+                distinct = np.r_[True, (docs[1:] != docs[:-1]) | (keys[1:] != keys[:-1])][:len(keys)]
+                docs_parts.append(docs[distinct])
+                keys_parts.append(keys[distinct])
+            batch = []
+            batch_tokens = 0
+        return np.concatenate(docs_parts), np.concatenate(keys_parts)
+
+
+def _check_ngram_size(n_tokens: int, size: int) -> None:
+    """
+    Makes sure the ngrams of the given size can be encoded in 64 bits.
+    """
+    if n_tokens ** size >= 2**63:
+        raise ValueError(f'too many tokens for encoding ngrams of {size} tokens')
+
+
+def _decode(tokens: npt.NDArray[np.str_], keys: npt.NDArray[np.int64], size: int, n_tokens: int) -> npt.NDArray[np.str_]:
+    """
+    Turns encoded ngrams back into their terms.
+    """
+    digits = []
+    for _ in range(size):
+        digits.append(keys % n_tokens)
+        keys = keys // n_tokens
+    parts = [tokens[digit] for digit in reversed(digits)]
+    terms = [' '.join(words) for words in zip(*parts)]
+    return np.array(terms, dtype=str)
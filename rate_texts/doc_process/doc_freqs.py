@@ -0,0 +1,200 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+import json
+import numpy as np
+import numpy.typing as npt
+from scipy import sparse
+
+_META = 'meta.json'
+_INDPTR = 'indptr.npy'
+_INDICES = 'indices.npy'
+
+
+class DocumentFrequencyStore():
+    """
+    Keeps track of the terms of the prepared documents of a project, so vocabularies can be derived without
+    tokenizing all documents again. For each document, the distinct terms are noted down, and for each term, the
+    number of documents it appears in. Documents can be added at any time, only the new documents are tokenized.
+
+    The terms are found exactly the way 'vocab_extraction.extract_vocab' finds them, for all ngrams within
+    'ngram_range'. The terms of a document are kept as term ids. Together they form the binary document term
+    matrix, from which the co-occurrences of terms are computed when a vocabulary is pruned.
+    """
+
+    directory: Path
+    """Directory the store is written to."""
+    ngram_range: Tuple[int, int]
+    """The ngrams that are counted."""
+    _terms: List[str]
+    """The terms, by their ids."""
+    _term_ids: Dict[str, int]
+    """Maps the terms to their ids."""
+    _df: List[int]
+    """Document frequencies, by term id."""
+    _rows: Dict[str, int]
+    """Maps the rows of the sample file index to the positions of their documents in '_docs'."""
+    _stamps: Dict[str, str]
+    """Stamps of the prepared files the documents have been made from, by row, see 'FileStore.stamp'."""
+    _docs: List[npt.NDArray[np.int32] | None]
+    """The term ids of each document. None for documents that have been removed."""
+    _analyzer: Callable[[str], List[str]] | None
+    """Splits a text into its terms. None until the first document is added."""
+
+    def __init__(self, directory: Path, ngram_range: Tuple[int, int] = (1, 2)) -> None:
+        """
+        directory: Path
+        Directory the store is written to. It is created when the store is written.
+
+        ngram_range: Tuple[int, int] = (1, 2)
+        The ngrams that are counted. A vocabulary can be derived for any ngram range within this one.
+        """
+        self.directory = directory
+        self._set_ngram_range(ngram_range)
+        self._terms = []
+        self._term_ids = dict()
+        self._df = []
+        self._rows = dict()
+        self._stamps = dict()
+        self._docs = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, row: str) -> bool:
+        return row in self._rows
+
+    def add(self, row: str, text: str, stamp: str | None = None) -> None:
+        """
+        Adds a document. A document that has been added for the same row before is replaced.
+
+        row: str
+        Index of the document in the sample file index.
+
+        text: str
+        The prepared text of the document.
+
+        stamp: str | None = None
+        Stamp of the prepared file the text has been read from, to recognize a file that has been written again.
+        """
+        self.remove(row)
+        if self._analyzer is None:
+            # the same analyzer as the one of the vectorizer in 'vocab_extraction.extract_vocab', scikit-learn is
+            # only imported once it is needed
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._analyzer = TfidfVectorizer(ngram_range=self.ngram_range).build_analyzer()
+        ids = []
+        for term in set(self._analyzer(text)):
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                term_id = len(self._terms)
+                self._term_ids[term] = term_id
+                self._terms.append(term)
+                self._df.append(0)
+            self._df[term_id] += 1
+            ids.append(term_id)
+        self._rows[row] = len(self._docs)
+        if stamp is not None:
+            self._stamps[row] = stamp
+        self._docs.append(np.array(sorted(ids), dtype=np.int32))
+
+    def remove(self, row: str) -> None:
+        """
+        Removes a document, if there is one for the row.
+
+        row: str
+        Index of the document in the sample file index.
+        """
+        position = self._rows.pop(row, None)
+        self._stamps.pop(row, None)
+        if position is None:
+            return
+        for term_id in self._docs[position]:  # type: ignore
+            self._df[term_id] -= 1
+        self._docs[position] = None
+
+    def get_stamp(self, row: str) -> str | None:
+        """
+        returns: str | None
+        The stamp of the prepared file the document of the row has been made from. None if there is no document
+        or it has been added without a stamp.
+        """
+        return self._stamps.get(row)
+
+    def get_terms(self) -> npt.NDArray[np.str_]:
+        """
+        returns: numpy.NDArray[numpy.str_]
+        All terms that have been seen, by their ids. Terms of removed documents remain with a document frequency
+        of zero.
+        """
+        return np.array(self._terms, dtype=str)
+
+    def get_df(self) -> npt.NDArray[np.int64]:
+        """
+        returns: numpy.NDArray[numpy.int64]
+        The number of documents each term appears in, by term id.
+        """
+        return np.array(self._df, dtype=np.int64)
+
+    def get_matrix(self, rows: Iterable[str] | None = None) -> sparse.csr_matrix:
+        """
+        Puts the binary document term matrix together.
+
+        rows: Iterable[str] | None = None
+        The documents, by their rows in the sample file index. Rows without a document are skipped. All
+        documents if None.
+
+        returns: scipy.sparse.csr_matrix
+        One row per document, one column per term id.
+        """
+        if rows is None:
+            positions = list(self._rows.values())
+        else:
+            positions = [self._rows[row] for row in rows if row in self._rows]
+        docs: List[npt.NDArray[np.int32]] = [self._docs[pos] for pos in positions]  # type: ignore
+        indptr = np.zeros(len(docs) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(doc) for doc in docs])
+        indices = np.concatenate(docs) if len(docs) > 0 else np.zeros(0, dtype=np.int32)
+        data = np.ones(len(indices), dtype=np.float64)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(docs), len(self._terms)))
+
+    def write(self) -> None:
+        """
+        Writes the store to its directory. Removed documents are left out.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        rows = list(self._rows.keys())
+        matrix = self.get_matrix(rows)
+        np.save(Path(self.directory, _INDPTR), matrix.indptr)
+        np.save(Path(self.directory, _INDICES), matrix.indices.astype(np.int32))
+        meta = {'ngram_range': list(self.ngram_range), 'rows': rows, 'terms': self._terms,
+                'stamps': [self._stamps.get(row) for row in rows]}
+        with open(Path(self.directory, _META), 'wt') as file:
+            json.dump(meta, file)
+
+    def read(self) -> bool:
+        """
+        Reads the store from its directory, if it has been written before. Replaces the current content.
+
+        returns: bool
+        True if the store has been read.
+        """
+        path = Path(self.directory, _META)
+        if not path.exists():
+            return False
+        with open(path, 'rt') as file:
+            meta = json.load(file)
+        indptr = np.load(Path(self.directory, _INDPTR))
+        indices = np.load(Path(self.directory, _INDICES))
+
+        self._set_ngram_range(tuple(meta['ngram_range']))  # type: ignore
+        self._terms = meta['terms']
+        self._term_ids = {term: term_id for term_id, term in enumerate(self._terms)}
+        self._df = np.bincount(indices, minlength=len(self._terms)).tolist()
+        self._rows = {row: position for position, row in enumerate(meta['rows'])}
+        self._stamps = {row: stamp for row, stamp in zip(meta['rows'], meta.get('stamps', [])) if stamp is not None}
+        self._docs = [indices[indptr[pos]:indptr[pos + 1]] for pos in range(len(meta['rows']))]
+        return True
+
+    def _set_ngram_range(self, ngram_range: Tuple[int, int]) -> None:
+        self.ngram_range = ngram_range
+        self._analyzer = None
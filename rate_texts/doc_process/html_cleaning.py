@@ -1,12 +1,220 @@
 import re
+from typing import Iterator, List, TextIO
+
+_WORD = re.compile(r'\w+')
+"""A word is a run of word characters. Anything else separates words."""
+_TAG_NAME = re.compile(r'/?\s*([\w!?-]*)')
+"""Name of a tag, as found right after the opening '<'."""
+_RAW_TEXT_TAGS = ('style', 'script', 'title')
+"""Tags that are dropped together with whatever they embrace."""
+_COMMENT_START = '<!--'
+_COMMENT_END = '-->'
+
+
+class HtmlTextExtractor():
+    """
+    Event driven extractor for the words of an html document that are visible on the webpage. The
+    document is scanned once from the front to the back, so the cost is linear in the length of the
+    document, no matter how deeply the tags are nested or if they are closed at all.
+
+    The document can be fed in chunks of arbitrary size. Unfinished tags, comments, script blocks,
+    and words at the end of a chunk are carried over to the next chunk.
+
+    The output matches the contract of 'clean_html': words in lower case, without punctuation.
+    Comments, tags, and the content of style, script, and title elements are dropped. Everything
+    else that is not a word character separates words.
+    """
+
+    _buffer: str
+    """The part of the document that has been fed but not been consumed yet."""
+    _skip_until: str | None
+    """The text that ends the comment or the raw text element the extractor is currently in, if any."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forgets about everything that has been fed so far.
+        """
+        self._buffer = ''
+        self._skip_until = None
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Feeds the next chunk of the document.
+
+        chunk: str
+        The next piece of the html document.
+
+        returns: List[str]
+        The words completed by this chunk. Words that might be continued by the next chunk are kept back.
+        """
+        self._buffer += chunk.lower()  # do not mess with upper case or lower case tags
+        return self._consume(False)
+
+    def close(self) -> List[str]:
+        """
+        Signals the end of the document. The extractor is reset afterwards and can be used for the next document.
+
+        returns: List[str]
+        The words that have been kept back so far.
+        """
+        words = self._consume(True)
+        self.reset()
+        return words
+
+    def _consume(self, final: bool) -> List[str]:
+        """
+        Consumes the buffer as far as possible.
+
+        final: bool
+        If there is no more chunk to come. Unfinished tags are dropped then and pending words are emitted.
+
+        returns: List[str]
+        The words found.
+        """
+        text = self._buffer
+        length = len(text)
+        pos = 0
+        visible: List[str] = []
+        while pos < length:
+            if self._skip_until is not None:
+                # inside of a comment or a style, script, or title element
+                end = text.find(self._skip_until, pos)
+                if end < 0:
+                    # keep just enough for recognizing the end in the next chunk
+                    pos = length if final else max(
+                        pos, length - len(self._skip_until) + 1)
+                    break
+                if self._skip_until == _COMMENT_END:
+                    pos = end + len(_COMMENT_END)
+                else:
+                    close = text.find('>', end)
+                    if close < 0:
+                        pos = length if final else end
+                        break
+                    pos = close + 1
+                self._skip_until = None
+                visible.append(' ')
+                continue
+
+            start = text.find('<', pos)
+            if start < 0:
+                if final:
+                    visible.append(text[pos:])
+                    pos = length
+                else:
+                    # the last word might go on in the next chunk
+                    cut = length
+                    while cut > pos and (text[cut-1].isalnum() or text[cut-1] == '_'):
+                        cut -= 1
+                    visible.append(text[pos:cut])
+                    pos = cut
+                break
+
+            visible.append(text[pos:start])
+            pos = start
+            if not final and length - start < len(_COMMENT_START) and _COMMENT_START.startswith(text[start:]):
+                break  # cannot tell a comment from a tag yet
+            if text.startswith(_COMMENT_START, start):
+                self._skip_until = _COMMENT_END
+                pos = start + len(_COMMENT_START)
+                visible.append(' ')
+                continue
+
+            follower = text[start+1:start+2]
+            if follower != '' and not follower.isalpha() and follower not in '/!?':
+                # not a tag, just a lonely '<', which counts as punctuation
+                visible.append(' ')
+                pos = start + 1
+                continue
+
+            close = text.find('>', start)
+            if close < 0:
+                # unfinished tag, drop it if there is nothing more to come
+                pos = length if final else start
+                break
+
+            tag = text[start+1:close]
+            name = _TAG_NAME.match(tag).group(1)  # type: ignore
+            if name in _RAW_TEXT_TAGS and not tag.startswith('/') and not tag.endswith('/'):
+                self._skip_until = '</' + name
+            visible.append(' ')
+            pos = close + 1
+
+        self._buffer = text[pos:]
+        return _WORD.findall(''.join(visible))
+
+
+def extract_words(html: str) -> List[str]:
+    """
+    Extracts the words visible on the webpage from an html source text. See 'clean_html'.
+
+    html:str
+    Text that may or may not contain html tags.
+
+    returns: List[str]
+    The visible words, in lower case and without punctuation.
+    """
+    extractor = HtmlTextExtractor()
+    words = extractor.feed(html)
+    words.extend(extractor.close())
+    return words
+
+
+def iter_words(file: TextIO, chunk_size: int = 1 << 16) -> Iterator[List[str]]:
+    """
+    Reads an html document from a file in chunks and extracts the words visible on the webpage.
+    Only one chunk is held in memory at a time, plus an unfinished tag or word at its end.
+
+    file: TextIO
+    The file the html document is read from.
+
+    chunk_size: int = 65536
+    Number of characters read at once.
+
+    returns: Iterator[List[str]]
+    The visible words, in lower case and without punctuation, batch by batch.
+    """
+    extractor = HtmlTextExtractor()
+    while True:
+        chunk = file.read(chunk_size)
+        if len(chunk) == 0:
+            break
+        words = extractor.feed(chunk)
+        if len(words) > 0:
+            yield words
+    words = extractor.close()
+    if len(words) > 0:
+        yield words
 
 
 def clean_html(html: str) -> str:
     """
-    Strips an html source text from the html tags. Tags that come with an
-    opening and a closing tag are detected even when the text contains
-    custom tags. For custom singular tags, similar to <br>, this is
-    not the case. Also sets the text to LOWER CASE.
+    Strips an html source text from the html tags. The text is scanned in a single pass, so the
+    cost is linear in the length of the text. Tags are removed even if they are custom tags or if
+    they are never closed. Comments and the content of style, script, and title tags are removed,
+    too. Also sets the text to LOWER CASE.
+
+    html:str
+    Text that may or may not contain html tags.
+
+    return:str
+    Processed lower case text without the html tags.
+    """
+    return ' '.join(extract_words(html))
+
+
+def clean_html_regex(html: str) -> str:
+    """
+    The former, regex based implementation of 'clean_html'. It is kept as reference for benchmarks.
+    Each pattern is applied repeatedly until it does not match anymore, which rescans the whole text
+    once per nesting level of the tags.
+
+    Tags that come with an opening and a closing tag are detected even when the text contains
+    custom tags. For custom singular tags, similar to <br>, this is not the case. Also sets the
+    text to LOWER CASE.
 
     html:str
     Text that may or may not contain html tags.
@@ -1,5 +1,122 @@
-from nltk.corpus import stopwords
-from typing import List
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+_UNKNOWN = 'unknown'
+_MAX_LANGS = 64
+"""The languages of a word are noted down in the bits of a 64 bit integer."""
+
+
+class LanguageDetector():
+    """
+    Simple language detection, like 'detect_lang', but the stop word lists of all languages are loaded once
+    into a single index. The index maps each stop word to a bit mask that tells in which of the languages
+    the word is a stop word.
+    """
+
+    langs: List[str]
+    """The languages taken into account, in the order of their bits in the masks."""
+    _index: Dict[str, int]
+    """Maps a stop word to the bit mask of the languages it is a stop word in."""
+
+    def __init__(self, langs: List[str]) -> None:
+        """
+        langs: List[str]
+        The languages taken into account. If two languages score the same, the one listed first wins.
+
+        raises ValueError:
+        If more than 64 languages are given.
+        """
+        if len(langs) > _MAX_LANGS:
+            raise ValueError(
+                f'at most {_MAX_LANGS} languages are supported')  # TODO: localize message
+
+        from nltk.corpus import stopwords
+        self.langs = list(langs)
+        self._index = dict()
+        for bit, lang in enumerate(self.langs):
+            for word in stopwords.words(lang):
+                self._index[word] = self._index.get(word, 0) | (1 << bit)
+
+    def detect(self, text: str, threshold: float = 0) -> str:
+        """
+        Derives the language of 'text' by computing the fraction of stop words in the text for each language.
+
+        text:str
+        The text of yet unknown language.
+
+        threshold: float = 0 |
+        A number ranging from zero to unity. The fraction of stop words in the assumed language must exceeds
+        the given threshold, or 'unkown' is returned.
+
+        returns:
+        Assumed language, or 'unknown'. See 'detect_lang'.
+        """
+        return self.detect_batch([text], threshold=threshold)[0]
+
+    def detect_batch(self, texts: Iterable[str], threshold: float = 0) -> List[str]:
+        """
+        Derives the languages of several texts at once. Each distinct word is looked up once in the index,
+        then the stop word fractions of all texts and all languages are computed in one go.
+
+        texts: Iterable[str]
+        The texts of yet unknown language.
+
+        threshold: float = 0 |
+        A number ranging from zero to unity. The fraction of stop words in the assumed language must exceeds
+        the given threshold, or 'unkown' is returned for the text.
+
+        returns: List[str]
+        Assumed language for each text, in the order of the texts. See 'detect_lang'.
+        """
+        masks: List[int] = []
+        doc_ids: List[int] = []
+        sizes: List[int] = []
+        lookup = self._index.get
+        for doc_id, text in enumerate(texts):
+            words = set(text.split())
+            sizes.append(len(words))
+            for word in words:
+                mask = lookup(word, 0)
+                if mask != 0:
+                    masks.append(mask)
+                    doc_ids.append(doc_id)
+
+        num_docs = len(sizes)
+        num_langs = len(self.langs)
+        if num_langs == 0:
+            return [_UNKNOWN for _ in range(num_docs)]
+
+        # count stop words per text and language
+        bits = np.arange(num_langs, dtype=np.uint64)
+        hits = (np.array(masks, dtype=np.uint64)[:, None] >> bits) & np.uint64(1)
+        cells = np.array(doc_ids, dtype=np.intp)[:, None] * num_langs + np.arange(num_langs)
+        counts = np.bincount(cells.ravel(), weights=hits.ravel(),
+                             minlength=num_docs * num_langs).reshape(num_docs, num_langs)
+
+        # the first language with the highest fraction wins, as in 'detect_lang'
+        sizes_arr = np.array(sizes, dtype=np.float64)
+        fractions = counts / np.maximum(sizes_arr, 1)[:, None]
+        best = np.argmax(fractions, axis=1)
+        best_fractions = fractions[np.arange(num_docs), best]
+
+        return [_UNKNOWN if sizes[doc] == 0 or best_fractions[doc] < threshold else self.langs[best[doc]]
+                for doc in range(num_docs)]
+
+
+@lru_cache(maxsize=8)
+def get_detector(langs: Tuple[str, ...]) -> LanguageDetector:
+    """
+    Gets a language detector for the given languages. Detectors are kept for later calls, so the stop word
+    lists are loaded only once.
+
+    langs: Tuple[str, ...]
+    The languages taken into account.
+
+    returns: LanguageDetector
+    The detector.
+    """
+    return LanguageDetector(list(langs))
 
 
 def detect_lang(text: str, langs: List[str], threshold: float = 0) -> str:
@@ -18,21 +135,7 @@ def detect_lang(text: str, langs: List[str], threshold: float = 0) -> str:
     Assumed language. Returns 'unknown' if the fraction of stop words even for the assumed language does
     not exceeds 'threshold'... or if you show up with no text or no languages in the arguments.
     """
-    cur_lang: str = "unknown"
-    cur_freq: float = -1
-    words = set(text.split())
-    if len(words) == 0 or len(langs) == 0:
-        return cur_lang
-
-    for lang in langs:
-        stops = stopwords.words(lang)
-        stopped_words = [word for word in words if word in stops]
-        fraction = len(stopped_words) / len(words)
-        if fraction > cur_freq:
-            cur_freq = fraction
-            cur_lang = lang
-
-    if cur_freq < threshold:
-        return "unknown"  # TODO: replace by None
-
-    return cur_lang
+    # no words, no detector needed, which also spares loading the stop word lists
+    if len(langs) == 0 or len(text.strip()) == 0:
+        return _UNKNOWN  # TODO: replace by None
+    return get_detector(tuple(langs)).detect(text, threshold=threshold)
@@ -0,0 +1,291 @@
+from hashlib import sha256
+from time import perf_counter
+import json
+from typing import Callable, Dict, Iterator, List, Set, TextIO
+import pandas as pd
+from rate_texts.doc_process import html_cleaning
+from rate_texts.doc_process.lang_detection import get_detector
+from rate_texts.doc_process.stops_removal import StopwordRegistry
+from rate_texts.doc_process.stemming import StemLexicon
+
+UNKNOWN = 'unknown'
+"""Language of documents whose language could not be detected."""
+_VERSION = 1
+"""Version of the preprocessing. Increase it when a change alters the prepared texts."""
+_HTML_CLEANING = 'html cleaning'
+_SECONDS = 'seconds'
+_FRACTION = 'fraction'
+
+
+class Document():
+    """
+    What the pipeline knows about the document it currently processes.
+    """
+
+    origin: str | None
+    """Origin of the document, if any."""
+    language: str | None
+    """Language of the document. None if it still has to be detected."""
+
+    def __init__(self, origin: str | None = None, language: str | None = None) -> None:
+        self.origin = origin
+        self.language = language
+
+
+class Stage():
+    """
+    A step of the preprocessing pipeline. A stage receives the words of the document and returns the
+    words for the next stage.
+    """
+
+    name: str
+    """Name of the stage in the timing report."""
+
+    def process(self, words: List[str], doc: Document) -> List[str]:
+        """
+        Processes the words.
+
+        words: List[str]
+        The words as they come from the previous stage.
+
+        doc: Document
+        What is known about the document.
+
+        returns: List[str]
+        The words for the next stage.
+        """
+        return words
+
+    def fingerprint(self) -> str:
+        """
+        returns: str
+        Describes the configuration of the stage. Two stages with the same fingerprint process words the same way.
+        """
+        return self.name
+
+
+class LanguageDetection(Stage):
+    """
+    Detects the language of the document if it is not known yet. The stop words of the origin of the document
+    do not count. If the language cannot be detected, it is set to 'unknown' and the pipeline stops.
+    """
+
+    langs: List[str]
+    """The languages taken into account."""
+    registry: StopwordRegistry
+    """Provides the stop words of the origins."""
+    threshold: float
+    """Minimum fraction of stop words in the detected language."""
+
+    def __init__(self, langs: List[str], registry: StopwordRegistry, threshold: float = 0.1) -> None:
+        self.name = 'language detection'
+        self.langs = langs
+        self.registry = registry
+        self.threshold = threshold
+
+    def process(self, words: List[str], doc: Document) -> List[str]:
+        if doc.language is None:
+            self.detect(set(words), doc)
+        return words
+
+    def detect(self, words: Set[str], doc: Document) -> None:
+        """
+        Detects the language from the distinct words of the document and notes it down in 'doc'.
+
+        words: Set[str]
+        The distinct words of the document.
+
+        doc: Document
+        The document.
+        """
+        words = words - self.registry.get_stopwords(doc.origin)
+        doc.language = get_detector(tuple(self.langs)).detect(
+            ' '.join(words), threshold=self.threshold)
+
+    def fingerprint(self) -> str:
+        return json.dumps([self.name, self.langs, self.threshold, self.registry.origins], sort_keys=True)
+
+
+class StopwordRemoval(Stage):
+    """
+    Removes the stop words of the origin and of the language of the document in a single pass.
+    """
+
+    registry: StopwordRegistry
+    """Provides the stop words."""
+
+    def __init__(self, registry: StopwordRegistry) -> None:
+        self.name = 'stop word removal'
+        self.registry = registry
+
+    def process(self, words: List[str], doc: Document) -> List[str]:
+        return self.registry.remove(words, doc.origin, doc.language)
+
+    def fingerprint(self) -> str:
+        return json.dumps([self.name, self.registry.origins], sort_keys=True)
+
+
+class Stemming(Stage):
+    """
+    Stems the words in the language of the document.
+    """
+
+    lexicon: StemLexicon
+    """Stems the words and memoizes the stems."""
+
+    def __init__(self, lexicon: StemLexicon) -> None:
+        self.name = 'stemming'
+        self.lexicon = lexicon
+
+    def process(self, words: List[str], doc: Document) -> List[str]:
+        return self.lexicon.stem_words(words, lang=str(doc.language))
+
+
+class Pipeline():
+    """
+    Preprocesses html documents. The html is reduced to the words visible on the webpage, then the words run
+    through the stages one after another. The words are passed on as a list, so the document is tokenized only
+    once, and the text is put together only once, when it is written.
+
+    The time spent in each stage is summed up over all documents.
+    """
+
+    stages: List[Stage]
+    """The stages after the html cleaning, in the order they are applied."""
+    timings: Dict[str, float]
+    """Seconds spent in the html cleaning and in each stage."""
+    documents: int
+    """Number of documents processed."""
+
+    def __init__(self, stages: List[Stage]) -> None:
+        """
+        stages: List[Stage]
+        The stages after the html cleaning, in the order they are applied.
+        """
+        self.stages = stages
+        self.reset_timings()
+
+    def reset_timings(self) -> None:
+        """
+        Sets the timings and the document counter to zero.
+        """
+        self.timings = {_HTML_CLEANING: 0.}
+        for stage in self.stages:
+            self.timings[stage.name] = 0.
+        self.documents = 0
+
+    def fingerprint(self) -> str:
+        """
+        returns: str
+        Hash of the configuration of all stages. Two pipelines with the same fingerprint prepare the same text
+        from the same html.
+        """
+        stages = [stage.fingerprint() for stage in self.stages]
+        return sha256(json.dumps([_VERSION, stages]).encode('utf-8')).hexdigest()
+
+    def process(self, html: str, doc: Document) -> List[str]:
+        """
+        Preprocesses a document.
+
+        html: str
+        The html source of the document.
+
+        doc: Document
+        What is known about the document. The detected language is noted down here.
+
+        returns: List[str]
+        The preprocessed words. Empty if the language of the document is unknown.
+        """
+        self.documents += 1
+        start = perf_counter()
+        words = html_cleaning.extract_words(html)
+        self.timings[_HTML_CLEANING] += perf_counter() - start
+        return self._run_stages(words, doc, self.stages)
+
+    def detect_language_in_file(self, open_raw: Callable[[], TextIO], doc: Document, chunk_size: int) -> None:
+        """
+        Detects the language of a document that is read from a file in chunks, if the language is not known yet and
+        if there is a language detection stage. The file is read completely, but only the distinct words are kept.
+
+        open_raw: Callable[[], TextIO]
+        Opens the file with the html source of the document.
+
+        doc: Document
+        What is known about the document. The detected language is noted down here.
+
+        chunk_size: int
+        Number of characters read at once.
+        """
+        detections = [idx for idx, stage in enumerate(
+            self.stages) if isinstance(stage, LanguageDetection)]
+        if doc.language is not None or len(detections) == 0:
+            return
+
+        detection: LanguageDetection = self.stages[detections[0]]  # type: ignore
+        before = self.stages[:detections[0]]
+        words: Set[str] = set()
+        with open_raw() as raw:
+            for batch in self._clean_chunks(raw, chunk_size):
+                words.update(self._run_stages(batch, doc, before))
+        start = perf_counter()
+        detection.detect(words, doc)
+        self.timings[detection.name] += perf_counter() - start
+
+    def process_file(self, open_raw: Callable[[], TextIO], doc: Document, chunk_size: int) -> Iterator[List[str]]:
+        """
+        Preprocesses a document that is read from a file in chunks. Call 'detect_language_in_file' first if the
+        language of the document is unknown.
+
+        open_raw: Callable[[], TextIO]
+        Opens the file with the html source of the document.
+
+        doc: Document
+        What is known about the document.
+
+        chunk_size: int
+        Number of characters read at once.
+
+        returns: Iterator[List[str]]
+        The preprocessed words, chunk by chunk. Nothing if the language of the document is unknown.
+        """
+        self.documents += 1
+        if doc.language == UNKNOWN:
+            return
+        with open_raw() as raw:
+            for batch in self._clean_chunks(raw, chunk_size):
+                yield self._run_stages(batch, doc, self.stages)
+
+    def timing_report(self) -> pd.DataFrame:
+        """
+        returns: pandas.DataFrame
+        The seconds spent in the html cleaning and in each stage, and their fractions of the total time.
+        """
+        report = pd.DataFrame({_SECONDS: pd.Series(self.timings)})
+        total = report[_SECONDS].sum()
+        report[_FRACTION] = report[_SECONDS] / total if total > 0 else 0.
+        return report
+
+    def _clean_chunks(self, raw: TextIO, chunk_size: int) -> Iterator[List[str]]:
+        """
+        Reduces the html source read from 'raw' to the visible words, chunk by chunk, and times it.
+        """
+        batches = html_cleaning.iter_words(raw, chunk_size)
+        while True:
+            start = perf_counter()
+            batch = next(batches, None)
+            self.timings[_HTML_CLEANING] += perf_counter() - start
+            if batch is None:
+                return
+            yield batch
+
+    def _run_stages(self, words: List[str], doc: Document, stages: List[Stage]) -> List[str]:
+        """
+        Passes the words through the given stages. Stops as soon as the language turns out to be unknown.
+        """
+        for stage in stages:
+            start = perf_counter()
+            words = stage.process(words, doc)
+            self.timings[stage.name] += perf_counter() - start
+            if doc.language == UNKNOWN:
+                return []
+        return words
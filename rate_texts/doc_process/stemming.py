@@ -1,9 +1,149 @@
-import snowballstemmer
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
+import json
+
+if TYPE_CHECKING:
+    from snowballstemmer.basestemmer import BaseStemmer
+
+
+class StemLexicon():
+    """
+    Stems words with the snowballstemmer. There is one stemmer per language, and the stems are memoized.
+    As the words of a corpus follow Zipf's law, most words are looked up instead of being stemmed again.
+
+    For each language, at most 'max_size' words are kept. If there are more, the word that has not been
+    looked up for the longest time is evicted.
+    """
+
+    max_size: int
+    """Maximum number of words kept per language."""
+    hits: int
+    """Number of words whose stem has been looked up."""
+    misses: int
+    """Number of words that had to be stemmed."""
+    _stemmers: Dict[str, 'BaseStemmer']
+    """The stemmer for each language."""
+    _lexicons: Dict[str, OrderedDict[str, str]]
+    """Maps words to their stems, for each language. The most recently used words are at the end."""
+
+    def __init__(self, max_size: int = 100_000) -> None:
+        """
+        max_size: int = 100000
+        Maximum number of words kept per language.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._stemmers = dict()
+        self._lexicons = dict()
+
+    def stem_words(self, words: List[str], lang: str = 'english') -> List[str]:
+        """
+        Stems the words.
+
+        words: List[str]
+        Words to be stemmed.
+
+        lang: str = 'english'
+        Language used for the stemming.
+
+        returns: List[str]
+        The stems, in the order of the words.
+        """
+        # may cause a key error if 'lang' is not an available language
+        # may cause an AttributeError when 'lang' is not valid
+        try:
+            stemmer = self._stemmers[lang]
+            lexicon = self._lexicons[lang]
+        except KeyError:
+            import snowballstemmer
+            stemmer = snowballstemmer.stemmer(lang)
+            self._stemmers[lang] = stemmer
+            lexicon = self._lexicons.setdefault(lang, OrderedDict())
+
+        stems = []
+        for word in words:
+            try:
+                stem = lexicon[word]
+                lexicon.move_to_end(word)
+                self.hits += 1
+            except KeyError:
+                stem = stemmer.stemWord(word)
+                lexicon[word] = stem
+                if len(lexicon) > self.max_size:
+                    lexicon.popitem(last=False)
+                self.misses += 1
+            stems.append(stem)
+        return stems
+
+    def stem(self, text: str, lang: str = 'english') -> str:
+        """
+        Returns a stemmed version of 'text'.
+
+        text: str
+        Text to be stemmed.
+
+        lang: str = 'english'
+        Language used for the stemming.
+
+        returns: str
+        The text with the words stemmed.
+        """
+        return ' '.join(self.stem_words(text.split(), lang=lang))
+
+    def hit_rate(self) -> float:
+        """
+        returns: float
+        Fraction of the words whose stem has been looked up instead of being stemmed. Zero if no word has been
+        stemmed yet.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.
+
+    def reset_counters(self) -> None:
+        """
+        Sets the hit and miss counters to zero.
+        """
+        self.hits = 0
+        self.misses = 0
+
+    def write(self, path: Path) -> None:
+        """
+        Writes the lexicon as json to disk.
+
+        path: Path
+        The file the lexicon is written to.
+        """
+        with open(path, 'wt') as file:
+            json.dump(self._lexicons, file)
+
+    def read(self, path: Path) -> None:
+        """
+        Reads a lexicon from disk and adds its words. Does not take care of I/O errors!
+
+        path: Path
+        The file the lexicon is read from.
+        """
+        with open(path, 'rt') as file:
+            lexicons: Dict[str, Dict[str, str]] = json.load(file)
+
+        for lang, words in lexicons.items():
+            lexicon = self._lexicons.setdefault(lang, OrderedDict())
+            for word, stem in words.items():
+                lexicon[word] = stem
+            while len(lexicon) > self.max_size:
+                lexicon.popitem(last=False)
+
+
+_lexicon = StemLexicon()
+"""Lexicon used by 'stem'."""
 
 
 def stem(text: str, lang: str = 'english') -> str:
     """
-    Returns a stemmed version of 'text' using the snowballstemmer.
+    Returns a stemmed version of 'text' using the snowballstemmer. The stems are memoized in a
+    module wide lexicon.
 
     text: str
     Text to be stemmed.
@@ -14,9 +154,4 @@ def stem(text: str, lang: str = 'english') -> str:
     returns: str
     The text with the words stemmed.
     """
-    # may cause a key error if 'lang' is not an available language
-    # may cause an AttributeError when 'lang' is not valid
-    stemmer = snowballstemmer.stemmer(lang)
-    stemmed = stemmer.stemWords(text.split())
-
-    return ' '.join(stemmed)
+    return _lexicon.stem(text, lang=lang)
@@ -1,5 +1,23 @@
-from nltk.corpus import stopwords
-from typing import List
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+_NO_STOPWORDS: FrozenSet[str] = frozenset()
+
+
+@lru_cache(maxsize=None)
+def get_language_stopwords(lang: str) -> FrozenSet[str]:
+    """
+    Gets the stop words of a language from nltk. The set is loaded once per language.
+
+    lang: str
+    The language.
+
+    returns: FrozenSet[str]
+    The stop words.
+    """
+    # nltk is imported on the first call, it takes a while to import
+    from nltk.corpus import stopwords as nltk_stopwords
+    return frozenset(nltk_stopwords.words(lang))
 
 
 def remove_stop_words(text: str, lang: str = 'english') -> str:
@@ -15,27 +33,146 @@ def remove_stop_words(text: str, lang: str = 'english') -> str:
     returns:
     Text without the stop words.
     """
-    sw = stopwords.words(lang)
+    sw = get_language_stopwords(lang)
     shortened_text = remove_given_stopwords(text, sw)
     return shortened_text
 
 
-def remove_given_stopwords(text: str, stopwords: List[str] | None = None) -> str:
+def remove_given_stopwords(text: str, stopwords: Iterable[str] | None = None) -> str:
     """
     Removes the words in the stop word list from the text.
 
     text:str
     Text to be cleanded. Words are separated by blank spaces.
 
-    stopwords: List[str] | None
-    List of words to be removed from the text. if 'None' is passed, the method does nothing
+    stopwords: Iterable[str] | None
+    Words to be removed from the text. if 'None' is passed, the method does nothing
     but returning 'text' itself.
 
     returns: str
     Stripped text.
     """
     if stopwords is not None:
-        shortlist = [word for word in text.split() if word not in stopwords]
+        stops = stopwords if isinstance(stopwords, (set, frozenset)) else set(stopwords)
+        shortlist = [word for word in text.split() if word not in stops]
         return ' '.join(shortlist)
     else:
         return text
+
+
+class StopwordRegistry():
+    """
+    Keeps the stop words of the origins, taken from the configuration, and the stop words of the
+    languages, taken from nltk. For each pair of origin and language, the union of both is built
+    once as a frozen set. This way, both kinds of stop words are removed in a single pass.
+
+    The cached sets are dropped when new origins are set. If the configured origins are modified in place
+    instead, 'changed' must be called.
+    """
+
+    origins: List[Dict]
+    """The origins as configured. Each origin is a dict with the keys 'origin' and 'stopwords'."""
+    _sets: Dict[Tuple[str | None, str | None], FrozenSet[str]]
+    """The stop words per pair of origin and language."""
+
+    def __init__(self, origins: List[Dict] | None = None) -> None:
+        """
+        origins: List[Dict] | None = None
+        The origins as configured.
+        """
+        self.origins = origins if origins is not None else []
+        self._sets = dict()
+
+    def set_origins(self, origins: List[Dict]) -> None:
+        """
+        Sets the configured origins and drops the cached sets.
+
+        origins: List[Dict]
+        The origins as configured.
+        """
+        self.origins = origins
+        self.changed()
+
+    def changed(self) -> None:
+        """
+        Drops the cached sets, so they are built again from the origins. To be called after the configured
+        origins have been modified in place.
+        """
+        self._sets = dict()
+
+    def get_stopwords(self, origin: str | None = None, lang: str | None = None) -> FrozenSet[str]:
+        """
+        Gets the stop words of the origin and the language.
+
+        origin: str | None = None
+        Name of the origin. If None or if the origin is not configured properly, no origin stop words are added.
+
+        lang: str | None = None
+        The language. If None, no language stop words are added.
+
+        returns: FrozenSet[str]
+        The union of the stop words of the origin and of the language.
+        """
+        key = (origin, lang)
+        try:
+            return self._sets[key]
+        except KeyError:
+            pass
+
+        if origin is None:
+            stops = _NO_STOPWORDS
+        else:
+            try:
+                stops = frozenset(self._find_origin_stopwords(origin))
+            except KeyError:
+                # origin misconfigured. Could be mistake, could be purpose, simply skip its stop words
+                stops = _NO_STOPWORDS
+        if lang is not None:
+            stops = stops | get_language_stopwords(lang)
+
+        self._sets[key] = stops
+        return stops
+
+    def remove(self, words: Iterable[str], origin: str | None = None, lang: str | None = None) -> List[str]:
+        """
+        Removes the stop words of the origin and of the language in one pass.
+
+        words: Iterable[str]
+        The words.
+
+        origin: str | None = None
+        Name of the origin.
+
+        lang: str | None = None
+        The language.
+
+        returns: List[str]
+        The words that are not a stop word, in their original order.
+        """
+        stops = self.get_stopwords(origin, lang)
+        return [word for word in words if word not in stops]
+
+    def _find_origin_stopwords(self, name: str) -> List[str]:
+        """
+        Gets the stopword list of the given origin from the configuration.
+
+        name:
+        Name of the origin.
+
+        returns:
+        The list of stopwords for this origin, or empty list if no origin of the given name is found.
+
+        raises KeyError:
+        When a json object of an origin does not have a name key (indicates a misconfiguration). Or when the
+        json object of the correct origin does not have a stopword list (indicates a misconfiguration, too).
+        """
+        for origin in self.origins:
+            # get name (might missing due to misconfiguration, raising an error then)
+            if origin['origin'] != name:
+                continue
+
+            # now we have the correct json object
+            # get list (might be missing due to misconfiguration, raising an error in this case)
+            return origin['stopwords']
+
+        return []
@@ -1,22 +1,43 @@
-from typing import List, Tuple
-from sklearn.feature_extraction.text import TfidfVectorizer
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Tuple
+from scipy import sparse
 import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from rate_texts.doc_process.doc_freqs import DocumentFrequencyStore
+from rate_texts.doc_process.corpus_store import CorpusStore
 
+if TYPE_CHECKING:
+    # only for the type hints, the project module imports the heavy model libraries
+    from rate_texts.core.project import Project
 
-def extract_vocab(docs: List[str], min_df=1, ngram_range: Tuple[int, int] = (1, 1), threshold: float = 0.98, verbose: bool = True, skip_dropping: bool = False):
+_BLOCK_ELEMENTS = 1 << 22
+"""Maximum number of word pairs compared at once. Bounds the memory used per block."""
+_PRIME = (1 << 31) - 1
+"""Modulus of the hash functions of the MinHash signatures."""
+
+
+def extract_vocab(docs: 'Iterable[str] | Project', min_df=1, ngram_range: Tuple[int, int] = (1, 1), threshold: float = 0.98, verbose: bool = True, skip_dropping: bool = False,
+                  approximate: bool = False, num_hashes: int = 64, bands: int = 16, usage: str | None = None, file_data: pd.DataFrame | None = None):
     """
-    Extracts the vocabulary from the list of documents. The appearance or non appearance of the
+    Extracts the vocabulary from the documents. The appearance or non appearance of the
     words from this vocabulary in a document are the features that are eventually analyzed.
 
     In the standard settings, the algorithm checks the correlation of the apearances of each pair of words.
     If the appearance of two words across all documents correlates or anticorrelates with each other, one
     of the words is dropped from the vocabulary.
 
-    docs: List[str]
-    The documents.
+    The documents are streamed: they are tokenized one after another and only their distinct terms are kept, as
+    term ids, see 'DocumentFrequencyStore'. The texts themselves are never held in memory all at once, so a
+    generator or the prepared samples of a project can be passed for corpora that do not fit into memory.
+
+    docs: Iterable[str] | Project
+    The documents, or a project whose prepared training samples are read from disk one by one.
 
     min_df (default 1):
-    A word is omitted for the vocabulary if it appears in less documents than this value is set to.
+    A word is omitted for the vocabulary if it appears in less documents than this value is set to. A float is
+    taken as fraction of the documents.
 
     ngram_range: Tuple[int, int] = (1,1)
     The n-grams that make up the vocabulary.
@@ -31,19 +52,411 @@ def extract_vocab(docs: List[str], min_df=1, ngram_range: Tuple[int, int] = (1,
     skip_dropping: bool = False:
     Determines if the dropping of words thats appearance strongly (anti)correlates with another words
     shall be omitted.
+
+    approximate: bool = False:
+    If True, only the pairs of words found by locality sensitive hashing are compared, see
+    'find_redundant_lsh'. Meant for vocabularies too large for comparing all pairs.
+
+    num_hashes: int = 64:
+    Length of the MinHash signatures in the approximate mode.
+
+    bands: int = 16:
+    Number of bands of the signatures in the approximate mode. More bands find more pairs, but also more pairs
+    that have to be compared.
+
+    usage: str | None = None
+    Only if 'docs' is a project: the usage of the samples, like 'train'. All labeled samples if None.
+
+    file_data: pandas.DataFrame | None = None
+    Only if 'docs' is a project: the sample file index. It is read from the project if None.
+
+    raises ValueError:
+    If 'docs' is a single string.
+    """
+    vocabs = extract_vocabs(docs, [ngram_range], min_df, threshold, verbose,
+                            approximate, num_hashes, bands, usage, file_data)
+    return vocabs[0][0]
+
+
+def extract_vocabs(docs: 'Iterable[str] | Project', ngram_ranges: List[Tuple[int, int]], min_df: int | float | List[int | float] = 1,
+                   threshold: float = 0.98, verbose: bool = True, approximate: bool = False, num_hashes: int = 64, bands: int = 16,
+                   usage: str | None = None, file_data: pd.DataFrame | None = None) -> List[Tuple[npt.NDArray[np.str_], sparse.csr_matrix]]:
+    """
+    Extracts several vocabularies at once, one for each ngram range. Each document is tokenized only once, for
+    all ngrams within the smallest range covering all of 'ngram_ranges'. Each vocabulary is the same as the one
+    'extract_vocab' extracts for its ngram range and its 'min_df'.
+
+    docs: Iterable[str] | Project
+    The documents, or a project whose prepared training samples are read from disk one by one.
+
+    ngram_ranges: List[Tuple[int, int]]
+    The n-grams of each vocabulary.
+
+    min_df: int | float | List[int | float] = 1
+    Either the same value for all vocabularies, or one value per vocabulary. See 'extract_vocab'.
+
+    threshold, verbose, approximate, num_hashes, bands, usage, file_data:
+    See 'extract_vocab'.
+
+    returns: List[Tuple[numpy.NDArray[numpy.str_], scipy.sparse.csr_matrix]]
+    For each ngram range, the vocabulary and the binary document term matrix of its words, one row per document
+    in the order of 'docs'.
+
+    raises ValueError:
+    If 'docs' is a single string, or if the number of 'min_df' values does not match 'ngram_ranges'.
     """
-    vect = TfidfVectorizer(min_df=min_df, use_idf=False,
-                           binary=True, norm=None, ngram_range=ngram_range)
+    if isinstance(docs, str):
+        raise ValueError('an iterable of documents is expected, not a single string')
+    min_dfs = min_df if isinstance(min_df, list) else [min_df] * len(ngram_ranges)
+    if len(min_dfs) != len(ngram_ranges):
+        raise ValueError(
+            f'{len(min_dfs)} values of min_df for {len(ngram_ranges)} ngram ranges')
+    if not isinstance(docs, Iterable):
+        if file_data is None:
+            file_data = docs.read_training_index()
+        texts: Iterable[str] = (text for _, text in docs.iter_training_samples(file_data, usage))
+    else:
+        texts = docs
 
     print_to_console(verbose, 'getting vocab', end='')
-    matrix = vect.fit_transform(docs)
-    vocab = vect.get_feature_names_out()
+    covering = (min(low for low, _ in ngram_ranges), max(high for _, high in ngram_ranges))
+    store = DocumentFrequencyStore(Path(), covering)
+    for row, text in enumerate(texts):
+        store.add(str(row), text)
+
+    terms = store.get_terms()
+    matrix = store.get_matrix()
+    df = store.get_df()
+    return [_extract(terms, df, matrix, min_df, ngram_range, threshold, verbose, approximate, num_hashes, bands)
+            for ngram_range, min_df in zip(ngram_ranges, min_dfs)]
+
+
+def extract_vocab_from_store(store: DocumentFrequencyStore, min_df=1, ngram_range: Tuple[int, int] = (1, 1), threshold: float = 0.98,
+                             verbose: bool = True, rows: Iterable[str] | None = None, approximate: bool = False, num_hashes: int = 64,
+                             bands: int = 16) -> npt.NDArray[np.str_]:
+    """
+    Extracts the vocabulary like 'extract_vocab' does, but from the terms noted down in a document frequency
+    store instead of from the texts. No document is tokenized. For the same documents, the vocabulary is the same
+    as the one of 'extract_vocab'.
+
+    store: DocumentFrequencyStore
+    The store. Its ngram range must cover 'ngram_range'.
+
+    min_df (default 1):
+    A word is omitted for the vocabulary if it appears in less documents than this value is set to. A float is
+    taken as fraction of the documents.
+
+    ngram_range: Tuple[int, int] = (1,1)
+    The n-grams that make up the vocabulary.
+
+    threshold: float = 0.98:
+    See 'extract_vocab'.
+
+    verbose: bool = True:
+    If and only if, a progress indicator is printed to sout.
+
+    rows: Iterable[str] | None = None
+    The documents taken into account, by their rows in the sample file index. All documents of the store if None.
+
+    approximate, num_hashes, bands:
+    See 'extract_vocab'.
+
+    raises ValueError:
+    If the ngram range of the store does not cover 'ngram_range'.
+    """
+    if ngram_range[0] < store.ngram_range[0] or ngram_range[1] > store.ngram_range[1]:
+        raise ValueError(
+            f'the store counts the ngrams {store.ngram_range}, not {ngram_range}')
+
+    matrix = store.get_matrix(rows)
+    df = np.asarray(matrix.sum(axis=0)).ravel() if rows is not None else store.get_df()
+    vocab, _ = _extract(store.get_terms(), df, matrix, min_df, ngram_range,
+                        threshold, verbose, approximate, num_hashes, bands)
+    return vocab
+
+
+def extract_vocab_from_corpus(corpus: CorpusStore, min_df=1, ngram_range: Tuple[int, int] = (1, 1), threshold: float = 0.98,
+                              verbose: bool = True, rows: Iterable[str] | None = None, approximate: bool = False, num_hashes: int = 64,
+                              bands: int = 16) -> npt.NDArray[np.str_]:
+    """
+    Extracts the vocabulary like 'extract_vocab' does, but from the token ids of a corpus store. The ngrams are
+    built from the token ids, no document is read or tokenized. For the same documents, the vocabulary is the same
+    as the one of 'extract_vocab'.
+
+    corpus: CorpusStore
+    The corpus store.
+
+    min_df, ngram_range, threshold, verbose, rows, approximate, num_hashes, bands:
+    See 'extract_vocab_from_store'.
+    """
+    terms, matrix = corpus.get_term_matrix(ngram_range, rows)
+    df = np.diff(sparse.csc_matrix(matrix).indptr)
+    vocab, _ = _extract(terms, df, matrix, min_df, ngram_range,
+                        threshold, verbose, approximate, num_hashes, bands)
+    return vocab
+
+
+def _extract(terms: npt.NDArray[np.str_], df: npt.NDArray[np.int64], matrix: sparse.csr_matrix, min_df: int | float,
+             ngram_range: Tuple[int, int], threshold: float, verbose: bool, approximate: bool, num_hashes: int,
+             bands: int) -> Tuple[npt.NDArray[np.str_], sparse.csr_matrix]:
+    """
+    Picks the terms of the vocabulary from all terms of a document term matrix and drops the redundant ones.
+    Returns the vocabulary and the columns of the matrix that belong to it.
+    """
+    if isinstance(min_df, float):
+        # like the vectorizers of scikit-learn
+        min_df = min_df * matrix.shape[0]
+    lengths = np.char.count(terms, ' ') + 1 if len(terms) > 0 else np.zeros(0, dtype=int)
+    picked = (df >= min_df) & (lengths >= ngram_range[0]) & (lengths <= ngram_range[1])
+    # the vectorizer of scikit-learn sorts the vocabulary alphabetically
+    columns = np.flatnonzero(picked)
+    columns = columns[np.argsort(terms[columns], kind='stable')]
+    vocab = terms[columns]
+    matrix = matrix[:, columns]
+
+    if approximate:
+        droplist, examined = find_redundant_lsh(
+            matrix, threshold, num_hashes, bands, verbose=verbose)
+        print_to_console(verbose, f'\rexamined {examined} pairs of words', end='')
+    else:
+        droplist = find_redundant(matrix, threshold, verbose)
+    print_to_console(verbose)  # new line in console
+
+    keep = np.ones(len(vocab), dtype=bool)
+    keep[droplist] = False
+    return vocab[keep], sparse.csr_matrix(matrix[:, keep])
+
+
+def find_redundant(matrix: sparse.spmatrix, threshold: float = 0.98, verbose: bool = False) -> List[int]:
+    """
+    Finds the words that are dropped from the vocabulary. The words are visited in the order of their columns.
+    A word that appears in all documents is dropped. Otherwise, all later words that have the same value as this
+    word in more than the fraction 'threshold' of the documents are dropped. Words that have been dropped
+    already are not visited.
+
+    The words are compared block by block. For a block of words, the number of documents in which they appear
+    together with each of the later words is computed by a sparse matrix product. Together with the document
+    frequencies, this gives the number of documents in which two words agree, as two binary columns agree in all
+    documents except for those where exactly one of the words appears. Words dropped in earlier blocks are left
+    out of the later blocks.
 
+    matrix: scipy.sparse.spmatrix
+    Binary document term matrix, one row per document and one column per word.
+
+    threshold: float = 0.98
+    Minimum fraction of documents in which two words agree for the later one to be dropped.
+
+    verbose: bool = False
+    If and only if, a progress indicator is printed to sout.
+
+    returns: List[int]
+    Columns of the dropped words, in the order they were dropped.
+    """
+    n_docs, n_words = matrix.shape
+    matrix = sparse.csc_matrix(matrix, dtype=np.float64)
+    df = np.asarray(matrix.sum(axis=0)).ravel()
+    dropped = np.zeros(n_words, dtype=bool)
+    droplist: List[int] = []
+
+    # the last word is never checked on its own
+    start = 0
+    while start < n_words - 1:
+        print_to_console(
+            verbose, f'\rchecking word {start+1} of {n_words-1}, dropped {len(droplist)} words so far', end='')
+        cols = start + np.flatnonzero(~dropped[start:])
+        rows = cols[cols < n_words - 1]
+        if len(rows) == 0:
+            break
+        rows = rows[:max(1, _BLOCK_ELEMENTS // len(cols))]
+
+        together = (matrix[:, rows].T @ matrix[:, cols]).toarray()
+        agree = n_docs - df[rows][:, None] - df[cols][None, :] + 2 * together
+        similar = agree / n_docs > threshold
+
+        for idx, word in enumerate(rows):
+            if dropped[word]:
+                continue
+            if df[word] >= n_docs:
+                # word appears in all documents
+                dropped[word] = True
+                droplist.append(int(word))
+                continue
+            others = cols[similar[idx] & (cols > word) & ~dropped[cols]]
+            dropped[others] = True
+            droplist.extend(others.tolist())
+        start = rows[-1] + 1
+
+    return droplist
+
+
+def find_redundant_lsh(matrix: sparse.spmatrix, threshold: float = 0.98, num_hashes: int = 64, bands: int = 16, anchors: int = 8,
+                       seed: int = 0, verbose: bool = False) -> Tuple[List[int], int]:
+    """
+    Approximate version of 'find_redundant' that does not compare all pairs of words.
+
+    Each word is signed with a MinHash signature of the set of documents it appears in. The signatures are cut
+    into 'bands', and words whose signatures are identical in at least one band become candidate pairs. Only the
+    candidate pairs are compared exactly, the greedy order of 'find_redundant' is kept. Two words with a Jaccard
+    similarity s share a bucket with probability 1 - (1 - s^r)^bands, where r = num_hashes / bands. To keep the
+    number of pairs linear in the size of a bucket, each word of a bucket is only paired with the first 'anchors'
+    words of the bucket, which are the ones that drop it if they are similar.
+
+    Words that appear in very few documents agree with each other in almost all documents, even if their sets of
+    documents do not overlap at all, so MinHash does not find them. All pairs of words that appear in so few
+    documents that they agree in more than the fraction 'threshold' of the documents in any case are taken as
+    similar without comparing them. The same goes for words that are missing in very few documents. Pairs of
+    such a word and a word in more documents are only found by chance.
+
+    matrix: scipy.sparse.spmatrix
+    Binary document term matrix, one row per document and one column per word.
+
+    threshold: float = 0.98
+    Minimum fraction of documents in which two words agree for the later one to be dropped.
+
+    num_hashes: int = 64
+    Length of the signatures. Rounded down to a multiple of 'bands'.
+
+    bands: int = 16
+    Number of bands. More bands find more pairs, but also more pairs that have to be compared.
+
+    anchors: int = 8
+    Number of words of a bucket each word of the bucket is paired with.
+
+    seed: int = 0
+    Seed of the random hash functions.
+
+    verbose: bool = False
+    If and only if, a progress indicator is printed to sout.
+
+    returns: Tuple[List[int], int]
+    Columns of the dropped words in the order they were dropped, and the number of pairs compared.
+    """
+    n_docs, n_words = matrix.shape
+    matrix = sparse.csc_matrix(matrix, dtype=np.float64)
+    df = np.asarray(matrix.sum(axis=0)).ravel()
+
+    # words that agree with each other in any case
+    rare = (n_docs - 2 * df) / n_docs > threshold
+    common = (n_docs - 2 * (n_docs - df)) / n_docs > threshold
+
+    print_to_console(verbose, '\rsigning words', end='')
+    signatures = _sign(matrix, num_hashes - num_hashes % bands, seed)
+    print_to_console(verbose, '\rfinding candidate pairs', end='')
+    candidates = _find_candidates(signatures, bands, anchors, rare | common)
+    print_to_console(
+        verbose, f'\rcomparing {len(candidates)} pairs of words', end='')
+    similar = candidates[_compare(matrix, df, candidates, threshold)]
+
+    # similar pairs as adjacency lists, the later word of a pair is the one that may be dropped
+    similar = similar[np.lexsort((similar[:, 1], similar[:, 0]))]
+    starts = np.searchsorted(similar[:, 0], np.arange(n_words + 1))
+
+    dropped = np.zeros(n_words, dtype=bool)
+    droplist: List[int] = []
+    for word in range(n_words - 1):
+        if dropped[word]:
+            continue
+        if df[word] >= n_docs:
+            # word appears in all documents
+            dropped[word] = True
+            droplist.append(word)
+            continue
+        others = similar[starts[word]:starts[word + 1], 1]
+        for group in [rare, common]:
+            if group[word]:
+                others = np.union1d(others, word + 1 +
+                                    np.flatnonzero(group[word + 1:]))
+        others = others[~dropped[others]]
+        dropped[others] = True
+        droplist.extend(others.tolist())
+
+    return droplist, len(candidates)
+
+
+def _sign(matrix: sparse.csc_matrix, num_hashes: int, seed: int) -> np.ndarray:
+    """
+    Computes the MinHash signatures of the columns. Returns an array with one row per hash function and one
+    column per word. Words that appear in no document get the signature _PRIME everywhere.
+    """
+    rng = np.random.default_rng(seed)
+    factors = rng.integers(1, _PRIME, size=num_hashes, dtype=np.int64)
+    offsets = rng.integers(0, _PRIME, size=num_hashes, dtype=np.int64)
+    n_words = matrix.shape[1]
+    signatures = np.full((num_hashes, n_words), _PRIME, dtype=np.int64)
+    filled = np.flatnonzero(np.diff(matrix.indptr) > 0)
+    if len(filled) == 0:
+        return signatures
+    docs = matrix.indices.astype(np.int64)
+    for idx in range(num_hashes):
+        hashed = (factors[idx] * docs + offsets[idx]) % _PRIME
+        signatures[idx, filled] = np.minimum.reduceat(
+            hashed, matrix.indptr[filled])
+    return signatures
+
+
+def _find_candidates(signatures: np.ndarray, bands: int, anchors: int, skip: np.ndarray) -> np.ndarray:
+    """
+    Finds the pairs of words whose signatures are identical in at least one band. In each bucket, the words are
+    paired with the first 'anchors' words of the bucket only. Words marked in 'skip' are left out. Returns an
+    array with one row per pair, the earlier word first.
+    """
+    n_words = signatures.shape[1]
+    words = np.flatnonzero(~skip)
+    rows = signatures.shape[0] // bands
+    pairs = [np.zeros((0, 2), dtype=np.int64)]
+    for band in range(bands):
+        # a band is reduced to a single number, a collision only costs a needless comparison
+        keys = np.zeros(len(words), dtype=np.uint64)
+        for row in signatures[band * rows:(band + 1) * rows, words]:
+            keys = keys * np.uint64(_PRIME) + row.astype(np.uint64)
+        order = np.lexsort((words, keys))
+        keys = keys[order]
+        firsts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        sizes = np.diff(np.r_[firsts, len(keys)])
+        ranks = np.arange(len(keys)) - np.repeat(firsts, sizes)
+        group_firsts = np.repeat(firsts, sizes)
+        for anchor in range(anchors):
+            later = np.flatnonzero(ranks > anchor)
+            if len(later) == 0:
+                break
+            pairs.append(np.stack([words[order[group_firsts[later] + anchor]],
+                                   words[order[later]]], axis=1))
+
+    # the same pair may be found in several bands
+    codes = np.sort(np.concatenate(pairs) @ np.array([n_words, 1]))
+    codes = codes[np.r_[True, codes[1:] != codes[:-1]][:len(codes)]]
+    return np.stack([codes // n_words, codes % n_words], axis=1)
+
+
+def _compare(matrix: sparse.csc_matrix, df: np.ndarray, pairs: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Tells for each pair of words if they agree in more than the fraction 'threshold' of the documents.
+    """
+    n_docs = matrix.shape[0]
+    similar = np.zeros(len(pairs), dtype=bool)
+    step = max(1, _BLOCK_ELEMENTS // max(1, n_docs))
+    for start in range(0, len(pairs), step):
+        first = pairs[start:start + step, 0]
+        second = pairs[start:start + step, 1]
+        together = np.asarray(matrix[:, first].multiply(
+            matrix[:, second]).sum(axis=0)).ravel()
+        agree = n_docs - df[first] - df[second] + 2 * together
+        similar[start:start + step] = agree / n_docs > threshold
+    return similar
+
+
+def find_redundant_pairwise(matrix: sparse.spmatrix, threshold: float = 0.98, verbose: bool = False) -> List[int]:
+    """
+    Former implementation of 'find_redundant', which compares the words pair by pair. It is kept as a reference
+    for the tests and the benchmark only, as it takes hours on large vocabularies.
+    """
+    matrix = sparse.csc_matrix(matrix)
+    n_words = matrix.shape[1]
     droplist = []
 
-    for word in range(len(vocab)-1):
+    for word in range(n_words-1):
         print_to_console(
-            verbose, f'\rchecking word {word+1} of {len(vocab)-1}, dropped {len(droplist)} words so far', end='')
+            verbose, f'\rchecking word {word+1} of {n_words-1}, dropped {len(droplist)} words so far', end='')
         if word in droplist:
             continue
 
@@ -53,7 +466,7 @@ def extract_vocab(docs: List[str], min_df=1, ngram_range: Tuple[int, int] = (1,
             droplist.append(word)
             continue
 
-        for other in range(word+1, len(vocab)):
+        for other in range(word+1, n_words):
             if other in droplist:
                 continue
             # check if (almost) all values in an array are the same
@@ -64,13 +477,7 @@ def extract_vocab(docs: List[str], min_df=1, ngram_range: Tuple[int, int] = (1,
             if len(x[same_values_at]) / len(x) > threshold:
                 droplist.append(other)
 
-    print_to_console(verbose)  # new line in console
-
-    arr = np.array([True for _ in range(len(vocab))])
-    arr[droplist] = False
-
-    shortlist = vocab[arr]
-    return shortlist
+    return droplist
 
 
 def print_to_console(verbose: bool, text: str = '', end: str | None = None) -> None:
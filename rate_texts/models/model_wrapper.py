@@ -1,11 +1,15 @@
+import json
+from typing import Dict
 import pandas as pd
 import numpy as np
 import numpy.typing as npt
-from sklearn.metrics import precision_score, accuracy_score, recall_score, f1_score
 from scipy.sparse import spmatrix
 from pathlib import Path
 from rate_texts.tools import keys
 
+FEATURES_SUFFIX = '.features.json'
+"""Suffix of the file next to a model that describes its features, after the model name."""
+
 
 class ModelWrapper():
 
@@ -17,9 +21,12 @@ class ModelWrapper():
     """A spreadsheet with the training scores"""
     test_scores: pd.DataFrame
     """A spreadsheet with the test scores"""
+    features: Dict | None
+    """Describes the features the model works on, like the feature mode. None if unknown."""
 
     def __init__(self, name: str) -> None:
         self.name = name
+        self.features = None
         self.train_scores = pd.DataFrame([], columns=[
             keys.ACCURACY, keys.PRECISION, keys.RECALL, keys.F1], index=[0, 1, 2, 3, 4, 5, 'avg'])
         self.test_scores = pd.DataFrame([], columns=[
@@ -102,6 +109,7 @@ class ModelWrapper():
         The label-specific precisions, with the precision of 0 star ratings at index 0, of 5 star ratings
         at index 5, and the average precision at index 6.
         """
+        from sklearn.metrics import precision_score
         label_prec = precision_score(
             labels, pred, labels=np.arange(categories), average=None)
         avg = np.mean(label_prec)
@@ -138,6 +146,7 @@ class ModelWrapper():
             idxTN = np.logical_not(idx1) & np.logical_not(idx2)
             acc_label = (len(pred[idxTP]) + len(pred[idxTN])) / len(pred)
             acc.append(acc_label)
+        from sklearn.metrics import accuracy_score
         acc_mean = accuracy_score(labels, pred)
         acc.append(acc_mean)
         return np.array(acc)
@@ -164,6 +173,7 @@ class ModelWrapper():
         The label-specific recalls, with the recall of 0 star ratings at index 0, of 5 star ratings
         at index 5, and the average recall at index 6 (if categories=6).
         """
+        from sklearn.metrics import recall_score
         label_rec = recall_score(
             labels, pred, labels=np.arange(categories), average=None)
         avg = np.mean(label_rec)
@@ -191,6 +201,7 @@ class ModelWrapper():
         The label-specific f1s, with the f1 of 0 star ratings at index 0, of 5 star ratings
         at index 5, and the average f1 at index 6 (if categories=6).
         """
+        from sklearn.metrics import f1_score
         label_f1 = f1_score(
             labels, pred, labels=np.arange(categories), average=None)
         avg = np.mean(label_f1)
@@ -204,3 +215,42 @@ class ModelWrapper():
         The directory in which the model is saved.
         """
         pass
+
+    def write_features(self, dir: Path) -> None:
+        """
+        Saves the description of the features next to the model, if there is one.
+
+        dir:
+        The directory in which the model is saved.
+        """
+        if self.features is None:
+            return
+        with open(Path(dir, f'{self.name}{FEATURES_SUFFIX}'), 'wt') as file:
+            json.dump(self.features, file)
+
+    def read_features(self, dir: Path) -> None:
+        """
+        Loads the description of the features saved next to the model, if there is one.
+
+        dir:
+        The directory in which the model is saved.
+        """
+        path = Path(dir, f'{self.name}{FEATURES_SUFFIX}')
+        if path.exists():
+            with open(path, 'rt') as file:
+                self.features = json.load(file)
+
+    def fits_features(self, features: Dict | None) -> bool:
+        """
+        Checks if the model works on the given features. Only the descriptions are compared, for a vocabulary its
+        hash, so no vocabulary has to be read.
+
+        features:
+        Description of the features, like the one of the feature extractor that computed them.
+
+        returns:
+        False if both descriptions are known and differ, True otherwise.
+        """
+        if self.features is None or features is None:
+            return True
+        return self.features == features
@@ -27,3 +27,4 @@ class SklearnModel(ModelWrapper):
     def write_model(self, dir: Path) -> None:
         path = Path(dir, f'{self.name}.sklearn')
         dump(self.model, path)
+        self.write_features(dir)
@@ -34,3 +34,4 @@ class TfKerasModel(ModelWrapper):
     def write_model(self, dir: Path) -> None:
         path = Path(dir, f'{self.name}.keras')
         self.model.save(path)
+        self.write_features(dir)
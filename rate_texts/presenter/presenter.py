@@ -4,6 +4,7 @@ from rate_texts.presenter.rating_controller import RatingController
 from pandas import DataFrame
 import numpy as np
 from rate_texts.core.project import Project
+from rate_texts.core.sample_store import FileStore, ShardStore
 from rate_texts.tools import keys
 from pathlib import Path
 from numpy import isnan
@@ -18,13 +19,16 @@ class Presenter(RatingController):
     """
 
     dir: Path
+    store: FileStore | ShardStore
+    """Reads the raw files of the samples."""
     rat_win: RatingWindow
     data: DataFrame
     cur_idx: int
 
-    def __init__(self, data: DataFrame, dir: Path) -> None:
+    def __init__(self, data: DataFrame, dir: Path, store: FileStore | ShardStore | None = None) -> None:
         self.data = data
         self.dir = dir
+        self.store = store if store is not None else FileStore(dir)
         if len(data) > 0:
             self.cur_idx = 0
         else:
@@ -67,18 +71,19 @@ class Presenter(RatingController):
 
     def _update_html(self) -> None:
         """
-        Updates the html panel with the current html file. If loading fails or if there
-        is no data, a message is displayed instead.
+        Updates the html panel with the html of the current raw file, as read from the store. Relative links in
+        the html are resolved against the location of the file, also for a sample packed into its shard, as
+        its directory stays in place. If loading fails or if there is no data, a message is displayed instead.
         """
         if self.cur_idx < 0 or self.cur_idx >= len(self.data):
             html = '<html><head></head><body><h1>No data around</h1></body></html>'
             self.rat_win.load_html(html)
             return
 
-        sub_path = self.data[keys.RAW_FILE][self.cur_idx]
-        full_path = Path(self.dir, sub_path)
+        sub_path = self.data[keys.RAW_FILE].iloc[self.cur_idx]
         try:
-            self.rat_win.load_file(str(full_path))
+            base_url = Path(self.store.root, sub_path).absolute().as_uri()
+            self.rat_win.load_html(self.store.read(sub_path), base_url)
         except:
             html = '<html><head></head><body><h1>Exception</h1></body></html>'
             self.rat_win.load_html(html)
@@ -100,13 +100,18 @@ class RatingWindow(Tk):
 
     # _______________  passing calls to the HtmlFrame within  _______________
 
-    def load_html(self, html: str) -> None:
+    def load_html(self, html: str, base_url: str | None = None) -> None:
         """
         Loads the given *html* into the frame.
         -----
+        html:
         The html string.
+
+        base_url:
+        The url relative links, images, and style sheets in the html are resolved against, like the file url of
+        the sample. None for none.
         """
-        self.web.load_html(html)
+        self.web.load_html(html, base_url=base_url)
 
     def load_file(self, path: str) -> None:
         """
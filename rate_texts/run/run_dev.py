@@ -2,18 +2,22 @@ from pathlib import Path
 from rate_texts.run import run_gen
 import pandas as pd
 from rate_texts.dev_tools.sample_generator import SampleGenerator as SG
-from rate_texts.doc_process import html_cleaning, stops_removal, stemming, vocab_extraction
+from rate_texts.doc_process import vocab_extraction
+from rate_texts.doc_process.stemming import StemLexicon
+from rate_texts.doc_process.stops_removal import StopwordRegistry
+from rate_texts.doc_process.pipeline import Pipeline, Document, StopwordRemoval, Stemming
 from sklearn.model_selection import train_test_split
 from rate_texts.core.project import Project
-from rate_texts.tools import keys
+from rate_texts.tools import keys, vocab_file
 
 
-def create_dev_project(size: int, name: str, parent: Path) -> Project:
-    prj = run_gen.create_project_folders(name, parent)
+def create_dev_project(size: int, name: str, parent: Path, persist_stems: bool = False, sample_format: str | None = None, codec: str | None = None) -> Project:
+    prj = run_gen.create_project_folders(name, parent, sample_format, codec)
     sg = SG()
+    lexicon = StemLexicon()
+    pipeline = Pipeline([StopwordRemoval(StopwordRegistry()), Stemming(lexicon)])
     cols = []
     file_data = []
-    docs = []
     successes = 0
     train_dir = Path(prj.root_dir, prj.training_dir).absolute()
     print('writing to '+str(train_dir))
@@ -35,28 +39,19 @@ def create_dev_project(size: int, name: str, parent: Path) -> Project:
         sample_id = prj.create_sample_id()
         raw_sub_path = Path(sample_id['path'] + '-raw.html')
         prep_sub_path = Path(sample_id['path'] + '-cleaned.txt')
-        sub_dir = Path(train_dir, sample_id['dir'])
 
         # write html file to disc
-        full_path = Path(train_dir, raw_sub_path)
-        sub_dir.mkdir(exist_ok=True, parents=True)
         try:
-            with open(full_path, 'wt') as file:
-                file.write(html)
-                ok = True
+            prj.write_sample_file(raw_sub_path, html)
+            ok = True
         except BaseException as be:
             print(be)
             ok = False
 
         # generate preprocessed document and write it to disc
-        prepared = html_cleaning.clean_html(html)
-        prepared = stops_removal.remove_stop_words(prepared, lang=lang)
-        prepared = stemming.stem(prepared, lang=lang)
-        full_path = Path(train_dir, prep_sub_path)
+        prepared = ' '.join(pipeline.process(html, Document(language=lang)))
         try:
-            with open(full_path, 'wt') as file:
-                file.write(prepared)
-                docs.append(prepared)
+            prj.write_sample_file(prep_sub_path, prepared)
         except BaseException as be:
             print(be)
             prep_sub_path = pd.NA  # write NA instead of the sub path
@@ -76,6 +71,11 @@ def create_dev_project(size: int, name: str, parent: Path) -> Project:
             successes += 1
 
     print(f'wrote {successes} out of {size} files successfully')
+    print(
+        f'stem lexicon: {lexicon.hits} hits, {lexicon.misses} misses, hit rate {lexicon.hit_rate():.3f}')
+    if persist_stems:
+        prj.write_stem_lexicon(lexicon)
+    print(pipeline.timing_report())
 
     if len(file_data) < 1:
         return prj
@@ -93,10 +93,10 @@ def create_dev_project(size: int, name: str, parent: Path) -> Project:
     file_data.loc[test, 'usage'] = 'test'
     file_data.loc[val, 'usage'] = 'validation'
 
-    # determine two vocabularies
-    print('number of docs: '+str(len(docs)))
-    vocab1 = vocab_extraction.extract_vocab(docs, min_df=3)
-    vocab2 = vocab_extraction.extract_vocab(docs, min_df=3, ngram_range=(2, 2))
+    # determine two vocabularies in a single pass, the prepared files are streamed from disk
+    print('number of docs: '+str(successes))
+    (vocab1, _), (vocab2, _) = vocab_extraction.extract_vocabs(
+        prj, [(1, 1), (2, 2)], min_df=3, file_data=file_data)
 
     # out
     prj.write_training_index(file_data)
@@ -105,11 +105,11 @@ def create_dev_project(size: int, name: str, parent: Path) -> Project:
 
     prj.write_vocab(vocab1, 'vocab_monograms')
     print()
-    print('monogram vocabulary:')
+    print(f'monogram vocabulary, written to vocab_monograms{vocab_file.SUFFIX}:')
     print(vocab1)
     prj.write_vocab(vocab2, 'vocab_bigrams')
     print()
-    print('bigram vocabulary:')
+    print(f'bigram vocabulary, written to vocab_bigrams{vocab_file.SUFFIX}:')
     print(vocab2)
 
     return prj
@@ -2,7 +2,7 @@ from pathlib import Path
 from rate_texts.core.project import Project
 
 
-def create_project_folders(name: str, parent: Path) -> Project:
+def create_project_folders(name: str, parent: Path, sample_format: str | None = None, codec: str | None = None) -> Project:
     """
     Creates the pathlib.Path objects of the project.
 
@@ -11,7 +11,13 @@ def create_project_folders(name: str, parent: Path) -> Project:
 
     parent:
     Directory in which the root directory of the project is created.
+
+    sample_format:
+    How the samples are stored, 'files' or 'shards', see 'Project'.
+
+    codec:
+    How the samples are compressed, 'none', 'gzip', or 'lzma', see 'Project'.
     """
     # TODO: check for any file/dir related problems
-    prj = Project(name, parent)
+    prj = Project(name, parent, sample_format=sample_format, codec=codec)
     return prj
@@ -4,6 +4,8 @@ TRAIN = 'train'
 """This sample is used as train sample."""
 TEST = 'test'
 """This sample is used as test sample."""
+VALIDATION = 'validation'
+"""This sample is used as validation sample."""
 RAW_FILE = 'raw file'
 """
 Column in the sample files index: holds the names of the rae sample files. These files require some preparation before
@@ -49,6 +51,8 @@ TEST_REC = 'test recall'
 """Column in the model index: holds the test recall score"""
 TEST_F1 = 'test f1'
 """Column in the model index: holds the test f1 score"""
+FEATURES = 'features'
+"""Column in the model index: holds the description of the features the model works on, as json"""
 
 ACCURACY = 'accuracy'
 PRECISION = 'precision'
@@ -1,19 +1,194 @@
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from typing import TYPE_CHECKING, Dict, Iterable, Tuple, List
 import pandas as pd
 import numpy as np
 import numpy.typing as npt
-from sklearn.feature_extraction.text import TfidfVectorizer as TFV
 from rate_texts.tools import keys
-from typing import Tuple, List
+from scipy import sparse
 from scipy.sparse import spmatrix
 
+if TYPE_CHECKING:
+    # scikit-learn takes about a second to import, it is only imported once a vectorizer is made
+    from sklearn.feature_extraction.text import TfidfVectorizer as TFV, HashingVectorizer
 
-def get_features_labels(vocab: npt.NDArray[np.str_], docs: pd.Series, file_data: pd.DataFrame, ngram_range: Tuple[int, int] = (1, 1)) -> Tuple[spmatrix, pd.Series]:
+VOCABULARY = 'vocabulary'
+"""Feature mode: the features are the words of a vocabulary."""
+HASHED = 'hashed'
+"""Feature mode: the words are hashed into a feature space of fixed width."""
+
+
+def hash_vocab(vocab: Iterable[str]) -> str:
+    """
+    Computes a hash of a vocabulary. Two vocabularies have the same hash if they consist of the same words in
+    the same order.
+
+    vocab: Iterable[str]
+    The vocabulary.
+
+    returns: str
+    The hash as hex string.
+    """
+    digest = sha256()
+    for word in vocab:
+        digest.update(str(word).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class FeatureExtractor():
+    """
+    Transforms documents into features, i.e., the appearance or non appearance of the words of a vocabulary. The
+    vectorizer is set up once, so transforming new batches of documents does not build and validate the
+    vocabulary again.
+    """
+
+    vocab: npt.NDArray[np.str_]
+    """The vocabulary. These are the features."""
+    vocab_hash: str
+    """Hash of the vocabulary."""
+    ngram_range: Tuple[int, int]
+    """The ngram range the vocabulary is made of."""
+    _vect: 'TFV'
+    """The fitted vectorizer."""
+
+    def __init__(self, vocab: npt.NDArray[np.str_], ngram_range: Tuple[int, int] = (1, 1), vocab_hash: str | None = None) -> None:
+        """
+        vocab: numpy.NDArray[numpy.str_]
+        The vocabulary.
+
+        ngram_range: Tuple[int, int] = (1, 1)
+        The ngram range passed to the TfidfVectorizer.
+
+        vocab_hash: str | None = None
+        Hash of the vocabulary, if it is known already.
+        """
+        self.vocab = vocab
+        self.vocab_hash = vocab_hash if vocab_hash is not None else hash_vocab(
+            vocab)
+        self.ngram_range = ngram_range
+        from sklearn.feature_extraction.text import TfidfVectorizer as TFV
+        self._vect = TFV(use_idf=False, binary=True, norm=None,
+                         vocabulary=vocab, ngram_range=ngram_range)
+        # with a given vocabulary, fitting only validates the vocabulary
+        self._vect.fit([''])
+
+    def transform(self, docs: Iterable[str], workers: int = 1) -> spmatrix:
+        """
+        Transforms documents into a feature matrix.
+
+        docs: Iterable[str]
+        The documents.
+
+        workers: int = 1
+        Number of worker processes the documents are spread over in shards.
+
+        returns: scipy.sparse.spmatrix
+        One row per document, one column per word of the vocabulary. An entry is 1 if the word appears in the
+        document, and 0 otherwise.
+        """
+        return _transform_in_shards(self._vect, docs, workers)
+
+    def fingerprint(self) -> str:
+        """
+        returns: str
+        Identifies the feature space. Two extractors with the same fingerprint produce the same features.
+        """
+        return self.vocab_hash
+
+    def describe(self) -> Dict:
+        """
+        returns: Dict
+        Description of the features that can be stored along with a model.
+        """
+        return {'mode': VOCABULARY, 'vocab_hash': self.vocab_hash, 'n_features': len(self.vocab),
+                'ngram_range': list(self.ngram_range)}
+
+
+class HashedFeatureExtractor():
+    """
+    Transforms documents into features without a vocabulary. Each ngram is hashed into one of 'n_features'
+    columns, and a column is 1 if any of its ngrams appears in the document. Nothing is learned from the
+    documents, so there is no need to go over the corpus first, new words are taken into account right away, and
+    the documents can be transformed in independent shards.
+    """
+
+    n_features: int
+    """Width of the feature space."""
+    ngram_range: Tuple[int, int]
+    """The ngrams that are hashed."""
+    _vect: 'HashingVectorizer'
+    """The vectorizer."""
+
+    def __init__(self, n_features: int = 2**20, ngram_range: Tuple[int, int] = (1, 1)) -> None:
+        """
+        n_features: int = 1048576
+        Width of the feature space. Fewer features mean more ngrams sharing a column.
+
+        ngram_range: Tuple[int, int] = (1, 1)
+        The ngrams that are hashed.
+        """
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self._vect = HashingVectorizer(n_features=n_features, ngram_range=ngram_range, binary=True, norm=None,
+                                       alternate_sign=False, dtype=np.float64)
+
+    def transform(self, docs: Iterable[str], workers: int = 1) -> spmatrix:
+        """
+        Transforms documents into a feature matrix.
+
+        docs: Iterable[str]
+        The documents.
+
+        workers: int = 1
+        Number of worker processes the documents are spread over in shards.
+
+        returns: scipy.sparse.spmatrix
+        One row per document, 'n_features' columns.
+        """
+        return _transform_in_shards(self._vect, docs, workers)
+
+    def fingerprint(self) -> str:
+        """
+        returns: str
+        Identifies the feature space. Two extractors with the same fingerprint produce the same features.
+        """
+        return f'{HASHED}-{self.n_features}'
+
+    def describe(self) -> Dict:
+        """
+        returns: Dict
+        Description of the features that can be stored along with a model.
+        """
+        return {'mode': HASHED, 'n_features': self.n_features, 'ngram_range': list(self.ngram_range)}
+
+
+def _transform_in_shards(vect: 'TFV | HashingVectorizer', docs: Iterable[str], workers: int, shard_size: int = 1000) -> spmatrix:
+    """
+    Transforms the documents with the vectorizer. With more than one worker, the documents are cut into shards
+    that are transformed in a pool of processes, and the rows are put together in the order of the documents.
+    """
+    if workers <= 1:
+        return vect.transform(docs)
+    docs = list(docs)
+    shards = [docs[start:start + shard_size]
+              for start in range(0, len(docs), shard_size)]
+    if len(shards) <= 1:
+        return vect.transform(docs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        matrices = list(pool.map(vect.transform, shards))
+    return sparse.vstack(matrices, format='csr')
+
+
+def get_features_labels(vocab: npt.NDArray[np.str_] | None, docs: pd.Series, file_data: pd.DataFrame, ngram_range: Tuple[int, int] = (1, 1),
+                        extractor: FeatureExtractor | HashedFeatureExtractor | None = None, workers: int = 1) -> Tuple[spmatrix, pd.Series]:
     """
     Transforms the input documents into a feature matrix with their associated labels. The indices of 'docs' also
     appear in 'file_data'. This way, a label is linked to a sample.
 
     vocab:
-    Vocabulary taken into account. These are the features.
+    Vocabulary taken into account. These are the features. Not needed if an extractor is given.
 
     docs:
     The texts the features are extracted from. These are the samples.
@@ -23,10 +198,17 @@ def get_features_labels(vocab: npt.NDArray[np.str_], docs: pd.Series, file_data:
 
     ngram_range:
     The ngram range passed to the TfidfVectorizer
+
+    extractor:
+    A feature extractor for 'vocab' and 'ngram_range' to be used instead of setting up a new one. This can also
+    be a HashedFeatureExtractor, which does not need a vocabulary.
+
+    workers:
+    Number of worker processes the documents are spread over.
     """
-    vect = TFV(use_idf=False, binary=True, norm=None,
-               vocabulary=vocab, ngram_range=ngram_range)
-    features = vect.fit_transform(docs)
+    if extractor is None:
+        extractor = FeatureExtractor(vocab, ngram_range)  # type: ignore
+    features = extractor.transform(docs, workers)
     labels = file_data.loc[docs.index, keys.RATING]
     return (features, labels)
 
@@ -39,6 +221,7 @@ def make_model_index(index: List = []) -> pd.DataFrame:
     The new model index.
     """
     model_data = pd.DataFrame([], columns=[keys.DESC, keys.TRAIN_ACC, keys.TRAIN_PREC,
-                              keys.TRAIN_REC, keys.TRAIN_F1, keys.TEST_ACC, keys.TEST_PREC, keys.TEST_REC, keys.TEST_F1],
+                              keys.TRAIN_REC, keys.TRAIN_F1, keys.TEST_ACC, keys.TEST_PREC, keys.TEST_REC, keys.TEST_F1,
+                              keys.FEATURES],
                               index=index)
     return model_data
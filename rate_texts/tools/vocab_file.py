@@ -0,0 +1,181 @@
+from hashlib import blake2b, sha256
+from pathlib import Path
+from typing import Iterable, Iterator, List
+import mmap
+import os
+import struct
+import numpy as np
+import numpy.typing as npt
+
+SUFFIX = '.vocab'
+"""File suffix of binary vocabularies."""
+_MAGIC = b'RTVOCAB1'
+_HEADER = struct.Struct('<8sQQQ32s')
+"""Magic bytes, number of words, size of the string table, number of hash slots, and the hash of the vocabulary."""
+_ENCODING = 'utf-8'
+
+
+def write_vocab_file(path: Path, vocab: Iterable[str]) -> str:
+    """
+    Writes a vocabulary in the binary format read by 'VocabFile'. The file holds, after a header,
+    - the offsets of the words in the string table, one more than there are words,
+    - a hash table with open addressing that maps the hashes of the words to their positions,
+    - the string table, i.e. the words encoded as utf-8, one after another in the order of the vocabulary.
+
+    The words keep their order, as the position of a word is its feature column. Extracted vocabularies are
+    sorted alphabetically, so their string table is sorted as well.
+
+    path: Path
+    The file. It is replaced as a whole, never left half written.
+
+    vocab: Iterable[str]
+    The vocabulary.
+
+    returns: str
+    The hash of the vocabulary, the same as the one of 'tools.hash_vocab'.
+    """
+    words = [str(word).encode(_ENCODING) for word in vocab]
+    digest = sha256()
+    for word in words:
+        digest.update(word)
+        digest.update(b'\0')
+
+    offsets = np.zeros(len(words) + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(word) for word in words])
+    n_slots = 1
+    while n_slots < 2 * len(words):
+        n_slots *= 2
+    slots = np.full(n_slots, -1, dtype=np.int64)
+    for position, word in enumerate(words):
+        slot = _hash(word) & (n_slots - 1)
+        while slots[slot] >= 0:
+            slot = (slot + 1) & (n_slots - 1)
+        slots[slot] = position
+
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, len(words), int(offsets[-1]), n_slots, digest.digest()))
+        file.write(offsets.tobytes())
+        file.write(slots.tobytes())
+        for word in words:
+            file.write(word)
+    os.replace(tmp_path, path)
+    return digest.hexdigest()
+
+
+class VocabFile():
+    """
+    A vocabulary in the binary format written by 'write_vocab_file'. The file is memory mapped, nothing but the
+    header is read when it is opened. Words are decoded on access, and looked up by the hash table stored in the
+    file, so a large vocabulary takes neither the time to parse it nor the memory of a fixed width array.
+    """
+
+    path: Path
+    """The file."""
+    vocab_hash: str
+    """Hash of the vocabulary, the same as the one of 'tools.hash_vocab'."""
+    _map: mmap.mmap | None
+    """The memory mapped file. None once it has been closed."""
+    _offsets: npt.NDArray[np.uint64]
+    """Offsets of the words in the string table."""
+    _slots: npt.NDArray[np.int64]
+    """The hash table. Positions of the words, -1 for empty slots."""
+    _strings: int
+    """Offset of the string table in the file."""
+
+    def __init__(self, path: Path) -> None:
+        """
+        path: Path
+        The file.
+
+        raises ValueError:
+        If the file is not a binary vocabulary.
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            header = file.read(_HEADER.size)
+            if len(header) < _HEADER.size or header[:len(_MAGIC)] != _MAGIC:
+                raise ValueError(f'{path.name} is not a binary vocabulary')
+            _, n_words, _, n_slots, digest = _HEADER.unpack(header)
+            self.vocab_hash = digest.hex()
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = np.frombuffer(self._map, dtype=np.uint64, count=n_words + 1, offset=_HEADER.size)
+        self._slots = np.frombuffer(self._map, dtype=np.int64, count=n_slots,
+                                    offset=_HEADER.size + self._offsets.nbytes)
+        self._strings = _HEADER.size + self._offsets.nbytes + self._slots.nbytes
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, position: int) -> str:
+        if position < 0:
+            position += len(self)
+        if position < 0 or position >= len(self):
+            raise IndexError(f'no word at position {position}')
+        return self._get_bytes(position).decode(_ENCODING)
+
+    def __iter__(self) -> Iterator[str]:
+        for position in range(len(self)):
+            yield self._get_bytes(position).decode(_ENCODING)
+
+    def __contains__(self, word: str) -> bool:
+        return self.index(word) is not None
+
+    def index(self, word: str) -> int | None:
+        """
+        Looks a word up in the hash table.
+
+        word: str
+        The word.
+
+        returns: int | None
+        Position of the word in the vocabulary, i.e. its feature column, or None if it is not in the vocabulary.
+        """
+        if len(self) == 0:
+            return None
+        encoded = word.encode(_ENCODING)
+        mask = len(self._slots) - 1
+        slot = _hash(encoded) & mask
+        while True:
+            position = int(self._slots[slot])
+            if position < 0:
+                return None
+            if self._get_bytes(position) == encoded:
+                return position
+            slot = (slot + 1) & mask
+
+    def to_list(self) -> List[str]:
+        """
+        returns: List[str]
+        The words, in the order of the vocabulary.
+        """
+        return list(self)
+
+    def to_array(self) -> npt.NDArray[np.str_]:
+        """
+        returns: numpy.NDArray[numpy.str_]
+        The words, in the order of the vocabulary.
+        """
+        return np.array(self.to_list(), dtype=str)
+
+    def close(self) -> None:
+        """
+        Releases the memory map. The vocabulary cannot be accessed anymore.
+        """
+        self._offsets = np.zeros(1, dtype=np.uint64)
+        self._slots = np.zeros(0, dtype=np.int64)
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _get_bytes(self, position: int) -> bytes:
+        start = self._strings + int(self._offsets[position])
+        end = self._strings + int(self._offsets[position + 1])
+        return self._map[start:end]  # type: ignore
+
+
+def _hash(word: bytes) -> int:
+    """
+    Hash of an encoded word for the hash table. Unlike the built-in hash, it is the same in every process.
+    """
+    return int.from_bytes(blake2b(word, digest_size=8).digest(), 'little')
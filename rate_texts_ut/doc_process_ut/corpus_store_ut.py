@@ -0,0 +1,108 @@
+import tempfile
+from pathlib import Path
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.doc_process import vocab_extraction as ve
+from rate_texts.doc_process.corpus_store import CorpusStore
+# autopep8: on
+
+_DOCS = ['although bart coughed', 'Bart coughed dramatically', 'bart ate', 'although bart ate dramatically',
+         'coughed loudly', 'a']
+
+
+def make_store(tmp: str) -> CorpusStore:
+    store = CorpusStore(Path(tmp, 'corpus'))
+    for idx, doc in enumerate(_DOCS):
+        store.add(str(idx), doc)
+    return store
+
+
+class TestCorpusStore(unittest.TestCase):
+
+    def test_ids(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            tokens = store.get_tokens()
+            self.assertEqual(['bart', 'coughed', 'dramatically'], tokens[store.get_ids('1')].tolist())
+            self.assertEqual(0, len(store.get_ids('5')))  # single characters are no tokens
+            store.add('1', 'loudly')  # replaces the document
+            self.assertEqual(['loudly'], tokens[store.get_ids('1')].tolist())
+            self.assertEqual(6, len(store))
+
+    def test_write_read(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            store.write()
+            store.add('6', 'bart coughed loudly')
+            store.write()
+            other = CorpusStore(store.directory)
+            self.assertTrue(other.read())
+            self.assertIsInstance(other._ids, np.memmap)
+            self.assertEqual(store.get_rows(), other.get_rows())
+            for row in store.get_rows():
+                self.assertEqual(store.get_ids(row).tolist(), other.get_ids(row).tolist())
+
+    def test_remove(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = CorpusStore(Path(tmp))
+            for idx, doc in enumerate(_DOCS):
+                store.add(str(idx), doc, stamp=f'stamp{idx}')
+            store.write()
+            expect = {row: store.get_tokens()[store.get_ids(row)].tolist() for row in ['2', '4']}
+            for row in ['0', '3']:
+                store.remove(row)
+            store.write()
+            self.assertEqual(14 * 4, Path(tmp, 'token_ids.bin').stat().st_size)
+
+            # more than half of the token ids are no longer referenced
+            store.remove('1')
+            store.write()
+            self.assertEqual(4 * 4, Path(tmp, 'token_ids.bin').stat().st_size)
+            other = CorpusStore(Path(tmp))
+            self.assertTrue(other.read())
+            self.assertEqual(['2', '4', '5'], other.get_rows())
+            for row, tokens in expect.items():
+                self.assertEqual(tokens, other.get_tokens()[other.get_ids(row)].tolist())
+            self.assertEqual('stamp2', other.get_stamp('2'))
+            self.assertIsNone(other.get_stamp('0'))
+
+    def test_term_matrix(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            for ngram_range in [(1, 1), (2, 2), (1, 2)]:
+                vect = TfidfVectorizer(ngram_range=ngram_range, binary=True, use_idf=False, norm=None)
+                expect = vect.fit_transform(_DOCS)
+                terms, matrix = store.get_term_matrix(ngram_range)
+                order = np.argsort(terms)
+                self.assertEqual(vect.get_feature_names_out().tolist(), terms[order].tolist())
+                self.assertEqual(0, (expect != matrix[:, order]).nnz)
+
+    def test_transform(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            vocab = np.array(['ate', 'bart coughed', 'coughed', 'unknown', 'loudly'])
+            vect = TfidfVectorizer(vocabulary=vocab, ngram_range=(1, 2), binary=True, use_idf=False, norm=None)
+            expect = vect.fit_transform(_DOCS)
+            rows = [str(idx) for idx in range(len(_DOCS))]
+            self.assertEqual(0, (expect != store.transform(vocab, (1, 2), rows)).nnz)
+            self.assertEqual(0, (expect[[4, 0]] != store.transform(vocab, (1, 2), ['4', '0'])).nnz)
+            with self.assertRaises(KeyError):
+                store.transform(vocab, (1, 2), ['7'])
+
+    def test_vocab(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            for ngram_range in [(1, 1), (2, 2), (1, 2)]:
+                expect = ve.extract_vocab(_DOCS, ngram_range=ngram_range, threshold=0.7, verbose=False)
+                vocab = ve.extract_vocab_from_corpus(store, ngram_range=ngram_range, threshold=0.7, verbose=False)
+                self.assertEqual(list(expect), list(vocab))
+
+
+if __name__ == '__main__':
+    unittest.main()
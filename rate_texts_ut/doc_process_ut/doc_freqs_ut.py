@@ -0,0 +1,75 @@
+import tempfile
+from pathlib import Path
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.doc_process import vocab_extraction as ve
+from rate_texts.doc_process.doc_freqs import DocumentFrequencyStore
+# autopep8: on
+
+_DOCS = ['although bart coughed', 'bart coughed dramatically', 'bart ate', 'although bart ate dramatically',
+         'coughed loudly']
+
+
+def make_store(tmp: str) -> DocumentFrequencyStore:
+    store = DocumentFrequencyStore(Path(tmp, 'df'))
+    for idx, doc in enumerate(_DOCS):
+        store.add(str(idx), doc)
+    return store
+
+
+def get_df(store: DocumentFrequencyStore) -> dict:
+    return dict(zip(store.get_terms(), store.get_df()))
+
+
+class TestDocumentFrequencyStore(unittest.TestCase):
+
+    def test_df(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            df = get_df(store)
+            self.assertEqual(4, df['bart'])
+            self.assertEqual(2, df['bart coughed'])
+            self.assertEqual(1, df['coughed loudly'])
+
+            store.add('1', 'loudly')  # replaces the document
+            store.remove('4')
+            df = get_df(store)
+            self.assertEqual(1, df['bart coughed'])
+            self.assertEqual(1, df['loudly'])
+            self.assertEqual(0, df['coughed loudly'])
+            self.assertEqual(4, len(store))
+
+    def test_write_read(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            store.remove('2')
+            store.write()
+            other = DocumentFrequencyStore(store.directory, (1, 1))
+            self.assertTrue(other.read())
+            self.assertEqual((1, 2), other.ngram_range)
+            self.assertEqual(get_df(store), get_df(other))
+            self.assertEqual(store.get_matrix(['0', '3']).toarray().tolist(),
+                             other.get_matrix(['0', '3']).toarray().tolist())
+
+    def test_vocab(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = make_store(tmp)
+            for ngram_range in [(1, 1), (2, 2), (1, 2)]:
+                expect = ve.extract_vocab(_DOCS, ngram_range=ngram_range, threshold=0.7, verbose=False)
+                vocab = ve.extract_vocab_from_store(store, ngram_range=ngram_range, threshold=0.7, verbose=False)
+                self.assertEqual(list(expect), list(vocab))
+
+            expect = ve.extract_vocab(_DOCS[1:4], min_df=2, verbose=False)
+            vocab = ve.extract_vocab_from_store(store, min_df=2, verbose=False, rows=['1', '2', '3'])
+            self.assertEqual(list(expect), list(vocab))
+
+            with self.assertRaises(ValueError):
+                ve.extract_vocab_from_store(store, ngram_range=(1, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 import sys
 sys.path.append('..')
@@ -46,6 +47,44 @@ class TestHtmlCleaning(unittest.TestCase):
         text = cl.clean_html(html)
         self.assertEqual(expect, text)
 
+    def test_script_style_title_and_comments(self):
+        html = '<html><head><title>Title</title><style>p {color: red;}</style><script>let a = "<b>x</b>";</script></head><body>aaa<!-- <p>bbb</p> -->ccc</body></html>'
+        expect = 'aaa ccc'
+        text = cl.clean_html(html)
+        self.assertEqual(expect, text)
+
+    def test_unclosed_tags(self):
+        html = '<div><p>aaa<img src="pic.jpg" alt="a car"><div>bbb<span>ccc'
+        expect = 'aaa bbb ccc'
+        text = cl.clean_html(html)
+        self.assertEqual(expect, text)
+
+    def test_lonely_angle_bracket(self):
+        html = '<p>1 < 2</p>'
+        expect = '1 2'
+        text = cl.clean_html(html)
+        self.assertEqual(expect, text)
+
+    def test_chunks(self):
+        html = '<!DOCTYPE html><html><head><title>Title</title><script>let a = "</b>";</script></head><body class="headless">AAA<strong>BBB</strong>1<br>2<!-- comment -->3<br />4<em class="seas">ccc</em>ddd</body></html>'
+        expect = cl.clean_html(html)
+        for size in range(1, 12):
+            extractor = cl.HtmlTextExtractor()
+            words = []
+            for pos in range(0, len(html), size):
+                words.extend(extractor.feed(html[pos:pos+size]))
+            words.extend(extractor.close())
+            self.assertEqual(expect, ' '.join(words), f'wrong result for chunk size {size}')
+
+    def test_iter_words(self):
+        html = '<html><head><title>Title</title></head><body>' + \
+            '<p>Hello <b>World</b>!</p><!-- bye -->' * 100 + '</body></html>'
+        expect = cl.clean_html(html)
+        batches = list(cl.iter_words(io.StringIO(html), chunk_size=16))
+        self.assertTrue(len(batches) > 1, 'document not processed in chunks')
+        words = [word for batch in batches for word in batch]
+        self.assertEqual(expect, ' '.join(words))
+
 
 if __name__ == '__main__':
     unittest.main()
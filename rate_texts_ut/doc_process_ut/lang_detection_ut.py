@@ -110,6 +110,27 @@ class TestStopsRemoval(unittest.TestCase):
         lang = ld.detect_lang(text, ['english'], threshold=0.501)
         self.assertEqual(expect, lang)
 
+    def test_detector_batch(self):
+        texts = ["Wikipedia is a free online encyclopedia that anyone can edit, and millions already have.",
+                 "Das Ziel der Wikipedia ist der Aufbau einer Enzyklopädie durch freiwillige und ehrenamtliche Autorinnen und Autoren.",
+                 "",
+                 "abra cadabra"]
+        detector = ld.LanguageDetector(self.langs)
+        expect = [ld.detect_lang(text, self.langs, threshold=0.1)
+                  for text in texts]
+        langs = detector.detect_batch(texts, threshold=0.1)
+        self.assertEqual(expect, langs)
+        self.assertEqual(['english', 'german', 'unknown', 'unknown'], langs)
+
+    def test_detector_no_languages(self):
+        detector = ld.LanguageDetector([])
+        langs = detector.detect_batch(['abra cadabra', 'the end'])
+        self.assertEqual(['unknown', 'unknown'], langs)
+
+    def test_detector_too_many_languages(self):
+        with self.assertRaises(ValueError):
+            ld.LanguageDetector(self.langs * 9)
+
 
 if __name__ == '__main__':
     unittest.main()
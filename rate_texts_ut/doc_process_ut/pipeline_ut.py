@@ -0,0 +1,74 @@
+import io
+from typing import List
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.doc_process import html_cleaning, stops_removal, stemming
+from rate_texts.doc_process import pipeline as pl
+from rate_texts.doc_process.stops_removal import StopwordRegistry
+from rate_texts.doc_process.stemming import StemLexicon
+# autopep8: on
+
+_HTML = '<html><head><title>A story</title></head><body><p class="text">Harriet walks along the road. ' + \
+    'She was very happy because of the sunshine.</p><p class="end">The End ~</p></body></html>'
+
+
+class Upper(pl.Stage):
+
+    def __init__(self) -> None:
+        self.name = 'upper'
+
+    def process(self, words: List[str], doc: pl.Document) -> List[str]:
+        return [word.upper() for word in words]
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_same_as_chain(self):
+        expect = html_cleaning.clean_html(_HTML)
+        expect = stops_removal.remove_stop_words(expect, lang='english')
+        expect = stemming.stem(expect, lang='english')
+        pipeline = pl.Pipeline([pl.StopwordRemoval(StopwordRegistry()),
+                                pl.Stemming(StemLexicon())])
+        words = pipeline.process(_HTML, pl.Document(language='english'))
+        self.assertEqual(expect, ' '.join(words))
+
+    def test_custom_stage(self):
+        origins = [{'origin': 'tales', 'stopwords': ['the', 'end']}]
+        pipeline = pl.Pipeline(
+            [pl.StopwordRemoval(StopwordRegistry(origins)), Upper()])
+        words = pipeline.process(
+            '<p>The End of the story</p>', pl.Document(origin='tales'))
+        self.assertEqual(['OF', 'STORY'], words)
+
+        report = pipeline.timing_report()
+        self.assertEqual(['html cleaning', 'stop word removal',
+                         'upper'], report.index.tolist())
+        self.assertEqual(1, pipeline.documents)
+
+    def test_unknown_language(self):
+        pipeline = pl.Pipeline([pl.LanguageDetection([], StopwordRegistry()), Upper()])
+        doc = pl.Document()
+        words = pipeline.process(_HTML, doc)
+        self.assertEqual(pl.UNKNOWN, doc.language)
+        self.assertEqual([], words)
+
+    def test_chunks(self):
+        pipeline = pl.Pipeline([Upper()])
+        expect = pipeline.process(_HTML, pl.Document(language='english'))
+        doc = pl.Document(language='english')
+
+        def open_raw():
+            return io.StringIO(_HTML)
+
+        pipeline.detect_language_in_file(open_raw, doc, 10)
+        batches = list(pipeline.process_file(open_raw, doc, 10))
+        self.assertTrue(len(batches) > 1, 'document not processed in chunks')
+        self.assertEqual(expect, [word for batch in batches for word in batch])
+
+
+if __name__ == '__main__':
+    unittest.main()
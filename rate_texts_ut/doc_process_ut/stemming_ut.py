@@ -0,0 +1,60 @@
+import snowballstemmer
+import tempfile
+from pathlib import Path
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.doc_process import stemming as st
+# autopep8: on
+
+
+class TestStemming(unittest.TestCase):
+
+    def test_stem(self):
+        text = 'the cats were running along the running dogs'
+        expect = ' '.join(snowballstemmer.stemmer(
+            'english').stemWords(text.split()))
+        self.assertEqual(expect, st.stem(text))
+
+    def test_lexicon_counters(self):
+        lexicon = st.StemLexicon()
+        lexicon.stem('running dogs running')
+        self.assertEqual(1, lexicon.hits)
+        self.assertEqual(2, lexicon.misses)
+        lexicon.stem('dogs')
+        self.assertEqual(2, lexicon.hits)
+        self.assertAlmostEqual(.5, lexicon.hit_rate())
+        lexicon.reset_counters()
+        self.assertEqual(0, lexicon.hits + lexicon.misses)
+
+    def test_lexicon_eviction(self):
+        lexicon = st.StemLexicon(max_size=2)
+        lexicon.stem('running dogs')
+        lexicon.stem('running')  # dogs is the least recently used word now
+        lexicon.stem('cats')
+        lexicon.reset_counters()
+        lexicon.stem('running cats dogs')
+        self.assertEqual(2, lexicon.hits)
+        self.assertEqual(1, lexicon.misses)
+
+    def test_lexicon_persistence(self):
+        lexicon = st.StemLexicon()
+        expect = lexicon.stem('the cats were running', lang='english')
+        expect_de = lexicon.stem('die katzen liefen', lang='german')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, 'lexicon.json')
+            lexicon.write(path)
+            warm = st.StemLexicon()
+            warm.read(path)
+
+        self.assertEqual(expect, warm.stem('the cats were running'))
+        self.assertEqual(expect_de, warm.stem(
+            'die katzen liefen', lang='german'))
+        self.assertEqual(0, warm.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
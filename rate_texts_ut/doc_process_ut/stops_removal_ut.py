@@ -29,6 +29,44 @@ class TestStopsRemoval(unittest.TestCase):
         destopped = sr.remove_given_stopwords(text, stopwords)
         self.assertEqual(text, destopped)
 
+    def test_registry_origin(self):
+        origins = [{'origin': 'news', 'stopwords': ['b', 'c']},
+                   {'origin': 'shop', 'stopwords': ['e']}]
+        registry = sr.StopwordRegistry(origins)
+        words = list('abcdefg')
+        self.assertEqual(list('adefg'), registry.remove(words, 'news'))
+        self.assertEqual(list('abcdfg'), registry.remove(words, 'shop'))
+        self.assertEqual(words, registry.remove(words, 'unknown origin'))
+        self.assertEqual(words, registry.remove(words))
+
+    def test_registry_misconfigured_origin(self):
+        origins = [{'origin': 'news'}]
+        registry = sr.StopwordRegistry(origins)
+        words = list('abcdefg')
+        self.assertEqual(words, registry.remove(words, 'news'))
+
+    def test_registry_origins_changed(self):
+        origins = [{'origin': 'news', 'stopwords': ['b', 'c']}]
+        registry = sr.StopwordRegistry(origins)
+        words = list('abcdefg')
+        self.assertEqual(list('adefg'), registry.remove(words, 'news'))
+
+        origins[0]['stopwords'].append('d')
+        self.assertEqual(list('adefg'), registry.remove(words, 'news'))  # not noticed until told
+        registry.changed()
+        self.assertEqual(list('aefg'), registry.remove(words, 'news'))
+
+        registry.set_origins([{'origin': 'news', 'stopwords': ['g']}])
+        self.assertEqual(list('abcdef'), registry.remove(words, 'news'))
+
+    def test_registry_origin_and_language(self):
+        origins = [{'origin': 'news', 'stopwords': ['harriet', 'sunshine.']}]
+        registry = sr.StopwordRegistry(origins)
+        text = 'harriet walks along the road. she was very happy because of the sunshine.'
+        expect = 'walks along road. happy'
+        destopped = registry.remove(text.split(), 'news', 'english')
+        self.assertEqual(expect, ' '.join(destopped))
+
 
 if __name__ == '__main__':
     unittest.main()
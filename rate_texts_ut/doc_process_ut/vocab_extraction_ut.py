@@ -1,6 +1,8 @@
 import numpy as np
 import numpy.typing as npt
 from functools import reduce
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
 import unittest
 import sys
 sys.path.append('..')
@@ -61,6 +63,71 @@ class TestVocabExtraction(unittest.TestCase):
         self.assertFalse(np.equal(vocab, 'although').any() and
                          np.equal(vocab, 'coughed').any(), 'both words still present')
 
+    def test_blockwise_as_pairwise(self):
+        rng = np.random.default_rng(7)
+        dense = rng.random((40, 60)) < 0.05
+        dense[:, 10] = True  # appears in all documents
+        dense[:, 20] = dense[:, 30]
+        matrix = sparse.csc_matrix(dense, dtype=float)
+        block_elements = ve._BLOCK_ELEMENTS
+        try:
+            for elements in [block_elements, 100]:
+                ve._BLOCK_ELEMENTS = elements
+                for threshold in [0.9, 0.98]:
+                    self.assertEqual(ve.find_redundant_pairwise(matrix, threshold),
+                                     ve.find_redundant(matrix, threshold))
+        finally:
+            ve._BLOCK_ELEMENTS = block_elements
+
+    def test_lsh(self):
+        rng = np.random.default_rng(7)
+        dense = rng.random((200, 80)) < 0.3
+        dense[:, 50] = dense[:, 10]
+        dense[:, 60] = dense[:, 20]
+        dense[:, 61] = dense[:, 20]
+        dense[:, 70:75] = False
+        dense[rng.integers(0, 200, size=5), np.arange(70, 75)] = True  # rare words
+        dense[:, 75] = True  # appears in all documents
+        matrix = sparse.csc_matrix(dense, dtype=float)
+
+        droplist, examined = ve.find_redundant_lsh(matrix, 0.98)
+        self.assertEqual(ve.find_redundant(matrix, 0.98), droplist)
+        self.assertEqual([50, 60, 61, 71, 72, 73, 74, 75], droplist)
+        self.assertTrue(0 < examined < 80 * 79 / 2)
+
+    def test_streamed(self):
+        rng = np.random.default_rng(3)
+        words = [f'word{idx}' for idx in range(30)]
+        docs = [' '.join(rng.choice(words, size=8)) for _ in range(50)]
+        for ngram_range, min_df in [((1, 1), 2), ((2, 2), 1), ((1, 2), 0.05)]:
+            # same vocabulary as the vectorizer, as long as no word is dropped
+            vect = TfidfVectorizer(min_df=min_df, ngram_range=ngram_range)
+            expect = vect.fit(docs).get_feature_names_out()
+            vocab = ve.extract_vocab((doc for doc in docs), min_df=min_df, ngram_range=ngram_range,
+                                     threshold=1., verbose=False)
+            self.assertEqual(expect.tolist(), vocab.tolist())
+            # a generator gives the same as a list
+            self.assertEqual(ve.extract_vocab(docs, min_df=min_df, ngram_range=ngram_range, verbose=False).tolist(),
+                             ve.extract_vocab(iter(docs), min_df=min_df, ngram_range=ngram_range, verbose=False).tolist())
+        with self.assertRaises(ValueError):
+            ve.extract_vocab('although bart', verbose=False)
+
+    def test_several(self):
+        rng = np.random.default_rng(5)
+        words = [f'word{idx}' for idx in range(20)]
+        docs = [' '.join(rng.choice(words, size=6)) for _ in range(40)]
+        ngram_ranges = [(1, 1), (2, 2), (1, 2)]
+        min_dfs = [2, 1, 3]
+        vocabs = ve.extract_vocabs(iter(docs), ngram_ranges, min_dfs, threshold=0.9, verbose=False)
+        self.assertEqual(3, len(vocabs))
+        for (vocab, matrix), ngram_range, min_df in zip(vocabs, ngram_ranges, min_dfs):
+            expect = ve.extract_vocab(docs, min_df=min_df, ngram_range=ngram_range, threshold=0.9, verbose=False)
+            self.assertEqual(expect.tolist(), vocab.tolist())
+            vect = TfidfVectorizer(vocabulary=vocab, ngram_range=ngram_range, binary=True, use_idf=False, norm=None)
+            self.assertEqual(0, (vect.fit_transform(docs) != matrix).nnz)
+        with self.assertRaises(ValueError):
+            ve.extract_vocabs(docs, ngram_ranges, [1, 2], verbose=False)
+
     def print_list(self, lst):
         if len(lst) > 1:
             return reduce(lambda a, b: str(a)+', '+str(b), lst)
@@ -1,3 +1,5 @@
+import tempfile
+from pathlib import Path
 import numpy.typing as npt
 import numpy as np
 import pandas as pd
@@ -88,6 +90,25 @@ class TestModelWrapper(unittest.TestCase):
             self.assertAlmostEqual(
                 expect[idx], actual[idx], delta=.001, msg=f'Wrong f1 in index {idx}')
 
+    def test_features(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.mw.write_features(Path(tmp))
+            self.assertEqual([], list(Path(tmp).iterdir()))
+
+            self.mw.features = {'mode': 'hashed', 'n_features': 1024}
+            self.mw.write_features(Path(tmp))
+            other = MW('unit test')
+            other.read_features(Path(tmp))
+            self.assertEqual(self.mw.features, other.features)
+
+    def test_fits_features(self):
+        features = {'mode': 'vocabulary', 'vocab_hash': 'abc', 'n_features': 2, 'ngram_range': [1, 1]}
+        self.assertTrue(self.mw.fits_features(features))
+        self.mw.features = dict(features)
+        self.assertTrue(self.mw.fits_features(features))
+        self.assertTrue(self.mw.fits_features(None))
+        self.assertFalse(self.mw.fits_features(dict(features, vocab_hash='abd')))
+
 
 if __name__ == '__main__':
     unittest.main()
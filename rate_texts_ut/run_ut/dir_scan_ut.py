@@ -0,0 +1,100 @@
+import os
+import tempfile
+from pathlib import Path
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.core.dir_scan import DirectoryScanner
+# autopep8: on
+
+_PAST = 10**9 * 10**9
+"""An mtime in nanoseconds long ago."""
+
+
+def make_root(tmp: str) -> Path:
+    root = Path(tmp, 'training')
+    for directory in ['0000', '0001']:
+        Path(root, directory).mkdir(parents=True)
+        for idx in range(3):
+            Path(root, directory, f's{idx}-raw.html').write_text('<p>text</p>')
+    Path(root, '0000', 's0-cleaned.txt').write_text('text')
+    Path(root, 'loose.html').write_text('<p>text</p>')
+    age(root)
+    return root
+
+
+def age(root: Path) -> None:
+    # directories modified just now are always scanned again, move the mtimes of the modified ones back
+    for directory in root.iterdir():
+        mtime = directory.stat().st_mtime_ns
+        if mtime > _PAST + 10**9:
+            os.utime(directory, ns=(mtime, _PAST + mtime % 10**9))
+
+
+def make_scanner(root: Path) -> DirectoryScanner:
+    return DirectoryScanner(root, Path(root.parent, 'cache', 'scan.json'))
+
+
+class TestDirScan(unittest.TestCase):
+
+    def test_scan(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = make_root(tmp)
+            scanner = make_scanner(root)
+            added, removed = scanner.scan()
+            self.assertEqual(sorted(os.path.join(d, f's{idx}-raw.html') for d in ['0000', '0001'] for idx in range(3)),
+                             sorted(added))
+            self.assertEqual([], removed)
+            self.assertEqual(([], []), scanner.scan())
+
+            Path(root, '0001', 's1-raw.html').unlink()
+            Path(root, '0002').mkdir()
+            Path(root, '0002', 's9-raw.htm').write_text('<p>text</p>')
+            age(root)
+            added, removed = make_scanner(root).scan()  # from the persisted manifest
+            self.assertEqual([os.path.join('0002', 's9-raw.htm')], added)
+            self.assertEqual([os.path.join('0001', 's1-raw.html')], removed)
+
+            Path(root, '0002', 's9-raw.htm').unlink()
+            Path(root, '0002').rmdir()
+            self.assertEqual(([], [os.path.join('0002', 's9-raw.htm')]), make_scanner(root).scan())
+
+    def test_unchanged_dirs_skipped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = make_root(tmp)
+            scanner = make_scanner(root)
+            scanner.scan()
+            # a file added without changing the mtime of its directory goes unnoticed
+            mtime = Path(root, '0000').stat().st_mtime_ns
+            Path(root, '0000', 's7-raw.html').write_text('<p>text</p>')
+            os.utime(Path(root, '0000'), ns=(mtime, mtime))
+            self.assertEqual(([], []), scanner.scan())
+            os.utime(Path(root, '0000'), ns=(mtime, mtime + 1))
+            self.assertEqual(([os.path.join('0000', 's7-raw.html')], []), scanner.scan())
+
+    def test_known(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            known = [os.path.join('0000', 's0-raw.html'), os.path.join('0000', 'gone-raw.html'),
+                     os.path.join('0003', 'gone-raw.html'), 'loose.html']
+            added, removed = make_scanner(make_root(tmp)).scan(known)
+            self.assertEqual(5, len(added))
+            self.assertNotIn(os.path.join('0000', 's0-raw.html'), added)
+            self.assertEqual(sorted([os.path.join('0000', 'gone-raw.html'), os.path.join('0003', 'gone-raw.html')]),
+                             sorted(removed))
+
+    def test_known_after_scan(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = make_root(tmp)
+            make_scanner(root).scan()
+            # the caller has lost track of some files, or knows about files that are gone
+            known = [os.path.join('0000', f's{idx}-raw.html') for idx in range(3)] + [os.path.join('0001', 'x.html')]
+            added, removed = make_scanner(root).scan(known)
+            self.assertEqual([os.path.join('0001', f's{idx}-raw.html') for idx in range(3)], added)
+            self.assertEqual([os.path.join('0001', 'x.html')], removed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.core import doc_index
+from rate_texts.core.doc_index import SqliteIndex
+from rate_texts.tools import keys
+# autopep8: on
+
+
+def make_file_data(size: int) -> pd.DataFrame:
+    rows = dict()
+    for idx in range(size):
+        rows[f'0000/sample{idx}'] = {keys.RAW_FILE: f'0000/sample{idx}-raw.html', keys.PREP_FILE: np.nan,
+                                     keys.ORIGIN: 'unit test', keys.LANGUAGE: np.nan,
+                                     keys.RATING: idx % 3 if idx % 4 else np.nan, keys.LABELED_BY: np.nan,
+                                     keys.USAGE: keys.TRAIN}
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+class TestDocIndex(unittest.TestCase):
+
+    def assert_same(self, expect: pd.DataFrame, actual: pd.DataFrame):
+        self.assertEqual(expect.index.tolist(), actual.index.tolist())
+        pd.testing.assert_frame_equal(expect, actual[expect.columns], check_dtype=False)
+
+    def test_write_read(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = SqliteIndex(Path(tmp, 'index.sqlite'))
+            self.assertFalse(index.exists())
+            file_data = make_file_data(20)
+            self.assertEqual(20, index.write(file_data))
+            other = SqliteIndex(index.path)
+            read = other.read()
+            self.assert_same(file_data, read)
+            self.assertTrue(pd.api.types.is_float_dtype(read[keys.RATING]))
+            self.assertTrue(read[keys.PREP_FILE].isna().all())
+
+    def test_incremental(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = SqliteIndex(Path(tmp, 'index.sqlite'))
+            file_data = make_file_data(20)
+            index.write(file_data)
+            self.assertEqual(0, index.write(file_data))
+
+            file_data[keys.PREP_FILE] = file_data[keys.PREP_FILE].astype(object)
+            file_data.loc['0000/sample3', keys.PREP_FILE] = '0000/sample3-cleaned.txt'
+            file_data.loc['0000/sample5', keys.RATING] = np.nan
+            file_data = pd.concat([file_data, make_file_data(22).iloc[20:].rename(lambda row: row + 'b')])
+            file_data = file_data.drop('0000/sample7')
+            file_data['extra'] = 1.5
+            # 2 changed, 2 added, 1 removed, and the new column changes all the others
+            self.assertEqual(22, index.write(file_data))
+            file_data.loc['0000/sample3', 'extra'] = 2.5
+            self.assertEqual(1, index.write(file_data))
+            self.assert_same(file_data, SqliteIndex(index.path).read())
+
+    def test_empty(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = SqliteIndex(Path(tmp, 'index.sqlite'))
+            index.write(doc_index.make_empty_index())
+            self.assertEqual(0, len(SqliteIndex(index.path).read()))
+
+
+if __name__ == '__main__':
+    unittest.main()
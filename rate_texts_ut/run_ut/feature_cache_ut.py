@@ -0,0 +1,101 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from scipy import sparse
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.core import feature_cache as fc
+from rate_texts.core.sample_store import FileStore, ShardStore
+from rate_texts.tools import keys
+# autopep8: on
+
+
+def make_file_data() -> pd.DataFrame:
+    return pd.DataFrame({keys.PREP_FILE: ['a.txt', 'b.txt', 'c.txt', np.nan],
+                         keys.RATING: [1, 0, np.nan, 1],
+                         keys.USAGE: [keys.TRAIN, keys.TRAIN, keys.TRAIN, keys.TRAIN]},
+                        index=['a.html', 'b.html', 'c.html', 'd.html'])
+
+
+def age(root: Path) -> None:
+    # stores modified just now give no version, move the mtimes of the directories modified just now back
+    for directory in root.iterdir():
+        mtime = directory.stat().st_mtime_ns
+        if directory.is_dir() and time.time_ns() - mtime < 10**10:
+            os.utime(directory, ns=(mtime - 10**10, mtime - 10**10))
+
+
+class TestFeatureCache(unittest.TestCase):
+
+    def test_fingerprint(self):
+        file_data = make_file_data()
+        fingerprint = fc.fingerprint_rows(file_data, keys.TRAIN)
+        self.assertNotEqual(fingerprint, fc.fingerprint_rows(file_data, keys.TEST))
+
+        # rows that are not labeled or not prepared do not count
+        file_data.loc['c.html', keys.PREP_FILE] = 'other.txt'
+        file_data.loc['d.html', keys.RATING] = 0
+        self.assertEqual(fingerprint, fc.fingerprint_rows(file_data, keys.TRAIN))
+
+        file_data.loc['a.html', keys.RATING] = 0
+        self.assertNotEqual(fingerprint, fc.fingerprint_rows(file_data, keys.TRAIN))
+
+    def test_fingerprint_content(self):
+        file_data = make_file_data().assign(**{keys.PREP_FILE: ['0000/a.txt', '0000/b.txt', '0000/c.txt', np.nan]})
+        for store_class in [FileStore, ShardStore]:
+            with tempfile.TemporaryDirectory() as tmp:
+                store = store_class(Path(tmp))
+                for name in ['a', 'b']:
+                    store.write(f'0000/{name}.txt', f'text {name}')
+                self.assertIsNone(fc.fingerprint_rows(file_data, keys.TRAIN, store))  # just written
+                age(Path(tmp))
+                fingerprint = fc.fingerprint_rows(file_data, keys.TRAIN, store)
+                self.assertIsNotNone(fingerprint)
+                self.assertEqual(fingerprint, fc.fingerprint_rows(file_data, keys.TRAIN, store))
+                # prepared again under the same name
+                store.write('0000/a.txt', 'another text a')
+                age(Path(tmp))
+                self.assertNotIn(fc.fingerprint_rows(file_data, keys.TRAIN, store), [None, fingerprint])
+
+    def test_evict(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = fc.FeatureCache(Path(tmp))
+            features = sparse.csr_matrix(np.ones((20, 20)))
+            labels = pd.Series(np.zeros(20), index=[str(idx) for idx in range(20)])
+            cache.store('a', features, labels)
+            cache.max_bytes = 3 * sum(path.stat().st_size for path in Path(tmp, 'a').iterdir())
+            cache.store('b', features, labels)
+            cache.store('c', features, labels)
+            cache.load('a')  # used after 'b'
+            cache.store('d', features, labels)
+            self.assertEqual(['a', 'c', 'd'], sorted(path.name for path in Path(tmp).iterdir()))
+
+    def test_store_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = fc.FeatureCache(Path(tmp, 'features'))
+            key = cache.make_key('vocab', (1, 2), keys.TRAIN, 'rows')
+            self.assertNotEqual(key, cache.make_key('vocab', (1, 1), keys.TRAIN, 'rows'))
+            self.assertIsNone(cache.load(key))
+
+            features = sparse.csr_matrix(np.array([[1., 0., 1.], [0., 0., 1.]]))
+            labels = pd.Series([1, 0], index=['a.html', 'b.html'])
+            cache.store(key, features, labels)
+            cache.store(key, features, labels)  # replaces the entry
+
+            loaded_features, loaded_labels = cache.load(key)
+            # memory mapped read only
+            self.assertFalse(loaded_features.data.flags.writeable)
+            self.assertEqual(features.toarray().tolist(), loaded_features.toarray().tolist())
+            self.assertEqual(labels.tolist(), loaded_labels.tolist())
+            self.assertEqual(labels.index.tolist(), loaded_labels.index.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
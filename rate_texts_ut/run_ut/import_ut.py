@@ -0,0 +1,20 @@
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.dev_tools.benchmarks import import_bench
+# autopep8: on
+
+
+class TestImport(unittest.TestCase):
+
+    def test_no_heavy_imports(self):
+        # the frameworks are imported on first use only, see 'import_bench' for the time it takes
+        for module in ['rate_texts.core.project', 'rate_texts.core.rate_texts']:
+            self.assertEqual([], import_bench.measure(module)['heavy'], module)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+from pathlib import Path
+import unittest
+import sys
+from sklearn.dummy import DummyClassifier
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.core.model_registry import ModelRegistry
+from rate_texts.core.project import Project as Pro
+from rate_texts.models.sklearn_model import SklearnModel
+from rate_texts.tools import tools
+# autopep8: on
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def write(self, prj: Pro, name: str) -> Path:
+        prj.write_model(SklearnModel(name, DummyClassifier()))
+        return Path(prj.model_dir, f'{name}.sklearn')
+
+    def test_reuse_and_reload(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prj = Pro('unit', Path(tmp))
+            prj.make_missing_dirs()
+            path = self.write(prj, 'a')
+            model = prj.read_model('a')
+            self.assertIs(model, prj.read_model('a'))
+            self.assertEqual((1, 1), (prj.models.hits, prj.models.misses))
+
+            # written by another process
+            mtime = path.stat().st_mtime_ns
+            os.utime(path, ns=(mtime, mtime + 10**9))
+            self.assertIsNot(model, prj.read_model('a'))
+
+            self.write(prj, 'b')  # not indexed yet
+            self.assertEqual('b', prj.read_model('b').name)
+            self.assertEqual(['a', 'b'], prj.models.names())
+            with self.assertRaises(FileNotFoundError):
+                prj.read_model('missing')
+
+    def test_features(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prj = Pro('unit', Path(tmp))
+            prj.make_missing_dirs()
+            model = SklearnModel('a', DummyClassifier())
+            model.features = {'mode': 'tfidf'}
+            prj.write_model(model)
+            prj.write_model_index(tools.make_model_index(index=['a']))
+            self.assertEqual(['a'], prj.models.names())
+            with self.assertRaises(FileNotFoundError):
+                prj.read_model('model_index')
+
+            model = prj.read_model('a')
+            self.assertEqual({'mode': 'tfidf'}, model.features)
+            path = Path(prj.model_dir, 'a.features.json')
+            path.write_text('{"mode": "counts"}')
+            mtime = path.stat().st_mtime_ns
+            os.utime(path, ns=(mtime, mtime + 10**9))
+            self.assertEqual({'mode': 'counts'}, prj.read_model('a').features)
+
+    def test_bounded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prj = Pro('unit', Path(tmp))
+            prj.make_missing_dirs()
+            size = self.write(prj, 'a').stat().st_size
+            self.write(prj, 'b')
+            self.write(prj, 'c')
+            registry = ModelRegistry(prj.model_dir, max_bytes=2 * size)
+            self.assertEqual(['a', 'b'], registry.preload(['a', 'missing', 'b']))
+            registry.get('a')
+            registry.get('c')
+            self.assertEqual(['a', 'c'], [name for name in 'abc' if name in registry])
+            self.assertEqual(2 * size, registry.loaded_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
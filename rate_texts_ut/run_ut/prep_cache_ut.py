@@ -0,0 +1,113 @@
+import tempfile
+from pathlib import Path
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.core.prep_cache import PreprocessingCache
+# autopep8: on
+
+
+def make_raw_file(tmp: str) -> Path:
+    raw_file = Path(tmp, 'raw.html')
+    raw_file.write_text('<p>Some sample</p>')
+    return raw_file
+
+
+def make_cache(tmp: str, fingerprint: str = 'a', max_bytes: int = 2**20) -> PreprocessingCache:
+    return PreprocessingCache(Path(tmp, 'cache'), fingerprint, max_bytes)
+
+
+class TestPreprocessingCache(unittest.TestCase):
+
+    def test_store_restore(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            raw_file = make_raw_file(tmp)
+            cache = make_cache(tmp)
+            key = cache.make_key(raw_file, None, None)
+            prep_file = Path(tmp, 'cleaned.txt')
+            self.assertIsNone(cache.restore(key, prep_file))
+
+            prep_file.write_text('some sampl')
+            size = cache.store(key, 'english', prep_file)
+            cache.record(key, False, size)
+            prep_file.unlink()
+            self.assertEqual('english', cache.restore(key, prep_file))
+            cache.record(key, True)
+            self.assertEqual('some sampl', prep_file.read_text())
+            self.assertAlmostEqual(0.5, cache.hit_rate())
+
+    def test_unknown_language(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            raw_file = make_raw_file(tmp)
+            cache = make_cache(tmp)
+            key = cache.make_key(raw_file, None, None)
+            cache.store(key, 'unknown', None)
+            prep_file = Path(tmp, 'cleaned.txt')
+            self.assertEqual('unknown', cache.restore(key, prep_file))
+            self.assertFalse(prep_file.exists())
+
+    def test_key(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            raw_file = make_raw_file(tmp)
+            cache = make_cache(tmp)
+            key = cache.make_key(raw_file, None, None)
+            copy = Path(tmp, 'copy.html')
+            copy.write_text(raw_file.read_text())
+            self.assertEqual(key, cache.make_key(copy, None, None))
+            self.assertNotEqual(key, cache.make_key(
+                raw_file, 'tests', None))
+            self.assertNotEqual(key, cache.make_key(
+                raw_file, None, 'english'))
+            self.assertNotEqual(key, make_cache(tmp, 'b').make_key(
+                raw_file, None, None))
+
+    def test_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = make_cache(tmp, max_bytes=50)
+            keys = []
+            for idx in range(3):
+                raw_file = Path(tmp, f'{idx}.html')
+                raw_file.write_text(f'<p>sample {idx}</p>')
+                key = cache.make_key(raw_file, None, None)
+                cache.record(key, False, cache.store(key, 'x' * 20, None))
+                keys.append(key)
+                if idx == 1:
+                    # use the first entry, so the second one is the oldest
+                    cache.record(keys[0], True)
+
+            prep_file = Path(tmp, 'cleaned.txt')
+            self.assertIsNotNone(cache.restore(keys[0], prep_file))
+            self.assertIsNone(cache.restore(keys[1], prep_file))
+            self.assertIsNotNone(cache.restore(keys[2], prep_file))
+
+            cache.write_index()
+            self.assertEqual(cache._size, make_cache(tmp)._size)
+
+    def test_untracked_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = make_cache(tmp, max_bytes=50)
+            keys = []
+            for idx in range(3):
+                raw_file = Path(tmp, f'{idx}.html')
+                raw_file.write_text(f'<p>sample {idx}</p>')
+                key = cache.make_key(raw_file, None, None)
+                size = cache.store(key, 'x' * 20, None)
+                if idx < 2:
+                    cache.record(key, False, size)
+                keys.append(key)
+            cache.write_index()
+            # the last entry has been added by a session that did not write the index
+            self.assertEqual(63, make_cache(tmp)._size)
+
+            cache = make_cache(tmp, max_bytes=50)
+            prep_file = Path(tmp, 'cleaned.txt')
+            self.assertIsNone(cache.restore(keys[2], prep_file))
+            self.assertIsNotNone(cache.restore(keys[0], prep_file))
+            self.assertEqual(42, cache._size)
+
+
+if __name__ == '__main__':
+    unittest.main()
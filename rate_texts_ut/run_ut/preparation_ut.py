@@ -0,0 +1,113 @@
+import tempfile
+from pathlib import Path
+from typing import List
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.core import preparation as prep
+from rate_texts.doc_process.pipeline import Pipeline
+from rate_texts.core.prep_cache import PreprocessingCache
+from rate_texts.core import sample_store
+from rate_texts.core.sample_store import FileStore, ShardStore
+# autopep8: on
+
+
+def make_jobs(tmp: str) -> List[prep.PreparationJob]:
+    jobs = []
+    for idx in range(12):
+        raw_file = Path(tmp, f'{idx}-raw.html')
+        raw_file.write_text(
+            f'<html><body><p>Sample {idx}</p>\n<p>of the tests</p></body></html>')
+        prep_file = Path(tmp, f'{idx}-cleaned.txt')
+        jobs.append(prep.PreparationJob(
+            str(idx), raw_file, prep_file, 'tests', 'english'))
+    return jobs
+
+
+class TestPreparation(unittest.TestCase):
+
+    def test_prepare_sample(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            job = make_jobs(tmp)[3]
+            result = prep.prepare_sample(Pipeline([]), job)
+            self.assertTrue(result.written)
+            self.assertEqual('english', result.language)
+            self.assertEqual('sample 3 of the tests', job.prep_file.read_text())
+
+    def test_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            job = make_jobs(tmp)[3]
+            result = prep.prepare_sample(Pipeline([]), job, chunk_size=5)
+            self.assertTrue(result.written)
+            self.assertEqual('sample 3 of the tests', job.prep_file.read_text())
+
+    def test_stores(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            raw_file = make_jobs(tmp)[3].raw_file
+            for name, store in [('shards', ShardStore(Path(tmp, 'shards'))),
+                                ('gzip', FileStore(Path(tmp, 'gzip'), sample_store.GZIP))]:
+                store.write('0000/3-raw.html', Path(raw_file).read_text())
+                job = prep.PreparationJob('3', Path('0000/3-raw.html'), Path('0000/3-cleaned.txt'), 'tests',
+                                          'english', store)
+                cache = PreprocessingCache(Path(tmp, f'cache-{name}'), 'tests')
+                for chunk_size in [None, 5]:
+                    result = prep.prepare_sample(Pipeline([]), job, chunk_size, cache)
+                    self.assertTrue(result.written)
+                    self.assertEqual('sample 3 of the tests', store.read(job.prep_file))
+                self.assertTrue(result.cache_hit)
+            self.assertFalse(Path(tmp, 'shards', '0000', '3-cleaned.txt').exists())
+            self.assertNotIn(b'sample', Path(tmp, 'gzip', '0000', '3-cleaned.txt').read_bytes())
+
+    def test_missing_raw_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            job = make_jobs(tmp)[3]
+            job.raw_file.unlink()
+            result = prep.prepare_sample(Pipeline([]), job)
+            self.assertFalse(result.written)
+            self.assertIsNone(result.language)
+            self.assertIsNotNone(result.message)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = make_jobs(tmp)
+            pipeline = Pipeline([])
+            cache = PreprocessingCache(
+                Path(tmp, 'cache'), pipeline.fingerprint())
+            for _ in range(2):
+                for job in jobs[:4]:
+                    result = prep.prepare_sample(pipeline, job, cache=cache)
+                    cache.record(result.cache_key, result.cache_hit,
+                                 result.cache_size)
+                    job.prep_file.unlink()
+            self.assertEqual(4, cache.hits)
+            self.assertEqual(4, cache.misses)
+            self.assertEqual(4, pipeline.documents)
+
+            job = jobs[0]
+            result = prep.prepare_sample(pipeline, job, cache=cache)
+            self.assertTrue(result.cache_hit)
+            self.assertTrue(result.written)
+            self.assertEqual('english', result.language)
+            self.assertEqual('sample 0 of the tests', job.prep_file.read_text())
+
+    def test_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = make_jobs(tmp)
+            pipeline = Pipeline([])
+            results = list(prep.prepare_samples(pipeline, jobs, workers=3))
+            self.assertEqual(sorted(job.row for job in jobs),
+                             sorted(result.row for result in results))
+            for job in jobs:
+                self.assertEqual(
+                    f'sample {job.row} of the tests', job.prep_file.read_text())
+
+            for result in results:
+                prep.merge_stats(pipeline, result)
+            self.assertEqual(len(jobs), pipeline.documents)
+
+
+if __name__ == '__main__':
+    unittest.main()
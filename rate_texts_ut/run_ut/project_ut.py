@@ -1,3 +1,7 @@
+import os
+import tempfile
+from pathlib import Path
+import pandas as pd
 import unittest
 import sys
 sys.path.append('..')
@@ -5,11 +9,126 @@ sys.path.append('../..')
 sys.path.append('../../rate_texts')
 # autopep8: off
 from rate_texts.core.project import Project as Pro
+from rate_texts.tools import keys
 # autopep8: on
 
 
 class TestProject(unittest.TestCase):
-    pass
+
+    def test_read_samples(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prj = Pro('unit', Path(tmp))
+            prj.make_missing_dirs()
+            rows = dict()
+            for idx in range(50):
+                if idx != 7:  # missing file
+                    Path(prj.training_dir, f'{idx}.txt').write_text(f' text {idx}\n')
+                rows[f'row{idx}'] = {keys.PREP_FILE: f'{idx}.txt', keys.RATING: 1 if idx != 3 else None,
+                                     keys.USAGE: keys.TRAIN if idx % 5 else keys.TEST}
+            file_data = pd.DataFrame.from_dict(rows, orient='index')
+
+            expect = [f'row{idx}' for idx in range(50) if idx % 5 and idx not in [3, 7]]
+            for threads in [1, 4]:
+                samples = prj.read_train_samples(file_data, threads)
+                self.assertEqual(expect, samples.index.tolist())
+                self.assertEqual('text 1', samples['row1'])
+                lazy = list(prj.iter_training_samples(file_data, keys.TRAIN, threads))
+                self.assertEqual(list(samples.items()), lazy)
+            self.assertEqual(10, len(prj.read_test_samples(file_data)))
+            self.assertEqual(0, len(prj.read_validation_samples(file_data.assign(usage=keys.TRAIN))))
+
+    def test_training_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prj = Pro('unit', Path(tmp))
+            prj.make_missing_dirs()
+            self.assertEqual(0, len(prj.read_training_index()))
+            file_data = pd.DataFrame({keys.RAW_FILE: ['a.html', 'b.html'], keys.RATING: [1, None]}, index=['a', 'b'])
+            # written by a former version
+            file_data.to_csv(Path(prj.training_dir, 'document_index.csv'))
+            legacy = prj.read_training_index()
+            self.assertEqual(['a', 'b'], legacy.index.tolist())
+            prj.write_training_index(legacy)
+            Path(prj.training_dir, 'document_index.csv').unlink()
+            self.assertEqual(['a.html', 'b.html'], Pro('unit', Path(tmp)).read_training_index()[keys.RAW_FILE].tolist())
+
+            csv = Pro('unit', Path(tmp), index_format='csv')
+            csv.write_training_index(file_data)
+            self.assertTrue(Path(prj.training_dir, 'document_index.csv').exists())
+
+    def test_update_training_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prj = Pro('unit', Path(tmp))
+            prj.make_missing_dirs()
+            Path(prj.training_dir, '0000').mkdir()
+            for name in ['a', 'b', 'c']:
+                Path(prj.training_dir, '0000', f'{name}-raw.html').write_text('<p>text</p>')
+            a_path = str(Path('0000', 'a-raw.html'))
+            file_data = pd.DataFrame({keys.RAW_FILE: [a_path, str(Path('0000', 'gone-raw.html'))],
+                                      keys.RATING: [1, 2]}, index=['a', 'gone'])
+            file_data = prj.update_training_index(file_data)
+            self.assertEqual(['a', str(Path('0000', 'b-raw.html')), str(Path('0000', 'c-raw.html'))],
+                             file_data.index.tolist())
+            self.assertEqual(1, file_data.loc['a', keys.RATING])
+            self.assertEqual(file_data.index.tolist(), prj.read_training_index().index.tolist())
+
+            Path(prj.training_dir, '0000', 'b-raw.html').unlink()
+            file_data = Pro('unit', Path(tmp)).update_training_index(file_data)
+            self.assertEqual(['a', str(Path('0000', 'c-raw.html'))], file_data.index.tolist())
+
+    def test_unsaved_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prj = Pro('unit', Path(tmp))
+            prj.make_missing_dirs()
+            shard = Path(prj.training_dir, '0000')
+            shard.mkdir()
+            Path(shard, 'a-raw.html').write_text('<p>text</p>')
+            # directories modified just now are scanned again anyway
+            os.utime(shard, ns=(10**18, 10**18))
+            file_data = prj.update_training_index(prj.read_training_index(), write_on_update=False)
+            self.assertEqual(1, len(file_data))
+
+            # the index has not been written, the next session finds the file again
+            prj = Pro('unit', Path(tmp))
+            file_data = prj.update_training_index(prj.read_training_index())
+            self.assertEqual([str(Path('0000', 'a-raw.html'))], file_data.index.tolist())
+            self.assertEqual(1, len(Pro('unit', Path(tmp)).update_training_index(prj.read_training_index())))
+
+    def test_index_deleted(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prj = Pro('unit', Path(tmp))
+            prj.make_missing_dirs()
+            shard = Path(prj.training_dir, '0000')
+            shard.mkdir()
+            Path(shard, 'a-raw.html').write_text('<p>text</p>')
+            os.utime(shard, ns=(10**18, 10**18))
+            self.assertEqual(1, len(prj.update_training_index(prj.read_training_index())))
+            self.assertTrue(prj.training_scanner.manifest_path.exists())
+
+            # the manifest is kept, the files are compared with the index anyway
+            prj.training_index.path.unlink()
+            prj = Pro('unit', Path(tmp))
+            file_data = prj.update_training_index(prj.read_training_index())
+            self.assertEqual([str(Path('0000', 'a-raw.html'))], file_data.index.tolist())
+
+    def test_pack(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prj = Pro('unit', Path(tmp))
+            prj.make_missing_dirs()
+            for idx in range(4):
+                prj.write_sample_file(f'0000/s{idx}-raw.html', f'<p>text {idx}</p>')
+                prj.write_sample_file(f'0000/s{idx}-cleaned.txt', f'text {idx}')
+            file_data = pd.DataFrame({keys.RAW_FILE: [f'0000/s{idx}-raw.html' for idx in range(4)],
+                                      keys.PREP_FILE: [f'0000/s{idx}-cleaned.txt' for idx in range(4)],
+                                      keys.RATING: 1, keys.USAGE: keys.TRAIN}, index=[f's{idx}' for idx in range(4)])
+            file_data = prj.update_training_index(file_data)
+            self.assertEqual(8, prj.pack_training_samples(file_data))
+            self.assertEqual(['samples.dat', 'samples.idx'],
+                             sorted(path.name for path in Path(prj.training_dir, '0000').iterdir()))
+
+            packed = Pro('unit', Path(tmp))  # finds the shard archives
+            self.assertEqual(4, len(packed.update_training_index(file_data)))
+            self.assertEqual('text 2', packed.read_train_samples(file_data)['s2'])
+            self.assertEqual('<p>text 1</p>', packed.read_sample_file('0000/s1-raw.html'))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,141 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.core.project import Project
+from rate_texts.core.rate_texts import RateTexts
+from rate_texts.tools import keys
+# autopep8: on
+
+
+def age(root: Path) -> None:
+    # stores modified just now give no version, move the mtimes of the directories modified just now back
+    for directory in root.iterdir():
+        mtime = directory.stat().st_mtime_ns
+        if directory.is_dir() and time.time_ns() - mtime < 10**10:
+            os.utime(directory, ns=(mtime - 10**10, mtime - 10**10))
+
+
+class TestRateTexts(unittest.TestCase):
+
+    def make_rate(self, tmp: str) -> RateTexts:
+        rate = RateTexts()
+        rate.home_path = Path(tmp)
+        rate.create_project('unit')
+        return rate
+
+    def test_stale_samples(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rate = self.make_rate(tmp)
+            rate.use_hashed_features(2**10)  # the corpus store is not used
+            texts = {'a': 'apple pie', 'b': 'plum cake', 'c': 'cherry tart'}
+            for row, text in texts.items():
+                rate.prj.write_sample_file(f'0000/{row}.txt', text)
+            age(rate.prj.training_dir)
+            rate.file_data = pd.DataFrame({keys.PREP_FILE: ['0000/a.txt', '0000/b.txt'], keys.RATING: [1, 0],
+                                           keys.USAGE: keys.TRAIN}, index=['a', 'b'])
+            features, _ = rate.get_features(keys.TRAIN)
+            self.assertEqual(2, features[0].sum())
+
+            # prepared again under the same name
+            rate.prj.write_sample_file('0000/a.txt', 'apple crumble with cream')
+            age(rate.prj.training_dir)
+            self.assertEqual(4, rate.get_features(keys.TRAIN)[0][0].sum())
+
+            # a sample added
+            rate.file_data = pd.DataFrame({keys.PREP_FILE: ['0000/a.txt', '0000/b.txt', '0000/c.txt'],
+                                           keys.RATING: [1, 0, 1], keys.USAGE: keys.TRAIN}, index=['a', 'b', 'c'])
+            features, labels = rate.get_features(keys.TRAIN)
+            self.assertEqual(['a', 'b', 'c'], labels.index.tolist())
+            self.assertEqual(4, features[0].sum())
+            self.assertIs(rate.get_feature_extractor(), rate.get_feature_extractor())
+
+            # the next session takes the matrix from the cache
+            later = self.make_rate(tmp)
+            later.use_hashed_features(2**10)
+            later.file_data = rate.file_data
+            cached, _ = later.get_features(keys.TRAIN)
+            self.assertEqual(features.toarray().tolist(), cached.toarray().tolist())
+
+    def test_stores_follow_samples(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rate = self.make_rate(tmp)
+            Path(rate.prj.training_dir, '0000').mkdir()
+            for row in ['a', 'b']:
+                Path(rate.prj.training_dir, '0000', f'{row}-raw.html').write_text('<p>text</p>')
+                rate.prj.write_sample_file(f'0000/{row}-cleaned.txt', f'apple {row}')
+            rate.file_data = rate.prj.read_training_index()
+            rate.update_project()
+            rate.file_data[keys.PREP_FILE] = [f'0000/{row}-cleaned.txt' for row in ['a', 'b']]
+            self.assertEqual(2, rate.update_doc_freqs())
+            self.assertEqual(2, rate.update_corpus())
+            self.assertEqual((0, 0), (rate.update_doc_freqs(), rate.update_corpus()))
+
+            # prepared again
+            rate.prj.write_sample_file('0000/a-cleaned.txt', 'apple crumble')
+            self.assertEqual((1, 1), (rate.update_doc_freqs(), rate.update_corpus()))
+            row_a = rate.file_data.index[0]
+            self.assertEqual(['apple', 'crumble'], rate.corpus.get_tokens()[rate.corpus.get_ids(row_a)].tolist())
+
+            Path(rate.prj.training_dir, '0000', 'a-raw.html').unlink()
+            rate.update_project()
+            self.assertEqual((1, 1), (len(rate.doc_freqs), len(rate.corpus)))
+
+    def test_stale_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rate = self.make_rate(tmp)
+            Path(rate.prj.training_dir, '0000').mkdir()
+            for row, text in [('a', 'the cat is in the garden'), ('b', 'the dog is in the house')]:
+                Path(rate.prj.training_dir, '0000', f'{row}-raw.html').write_text(f'<p>{text}</p>')
+            rate.file_data = rate.prj.read_training_index()
+            rate.update_project()
+            rate.file_data[keys.RATING] = [1, 0]
+            rate.file_data[keys.USAGE] = keys.TRAIN
+            rate.prepare_unclean_samples(use_cache=False)
+            rate.vocab = np.array(['cat', 'dog', 'garden', 'mous'])
+            features, _ = rate.get_features(keys.TRAIN, use_cache=False)
+            self.assertEqual([1, 0, 1, 0], features[0].toarray()[0].tolist())
+
+            # prepared again, but the corpus store is not updated
+            row_a = rate.file_data.index[0]
+            Path(rate.prj.training_dir, rate.file_data.loc[row_a, keys.RAW_FILE]).write_text(
+                '<p>the mouse is in the garden too</p>')
+            rate.file_data.loc[row_a, keys.PREP_FILE] = np.nan
+            rate.prepare_unclean_samples(use_cache=False, update_corpus=False)
+            features, _ = rate.get_features(keys.TRAIN, use_cache=False)
+            self.assertEqual([0, 0, 1, 1], features[0].toarray()[0].tolist())
+
+    def test_stores_not_opened(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rate = RateTexts()
+            rate.prj = Project('unit', Path(tmp))  # set without reading the stores
+            rate.prj.make_missing_dirs()
+            Path(rate.prj.training_dir, '0000').mkdir()
+            Path(rate.prj.training_dir, '0000', 'a-raw.html').write_text('<p>text</p>')
+            rate.file_data = rate.prj.read_training_index()
+            rate.update_project()
+            Path(rate.prj.training_dir, '0000', 'a-raw.html').unlink()
+            self.assertEqual(0, len(rate.update_project()))
+
+    def test_dev_project(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rate = RateTexts()
+            rate.home_path = Path(tmp)
+            rate.make_dev_project(200, 'dev')
+            file_data = rate.read_training_index()
+            rate.prepare_unclean_samples()
+            prepared = file_data[keys.PREP_FILE].notna().sum()
+            self.assertEqual(prepared, len(rate.doc_freqs))
+            self.assertEqual(prepared, len(rate.corpus))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import pickle
+import tempfile
+from pathlib import Path
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.core import sample_store
+from rate_texts.core.sample_store import FileStore, ShardStore
+# autopep8: on
+
+
+class TestSampleStore(unittest.TestCase):
+
+    def test_open_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            self.assertIsInstance(sample_store.open_store(root), FileStore)
+            store = sample_store.open_store(root, sample_store.SHARDS)
+            self.assertIsInstance(store, ShardStore)
+            store.write('0001/a-raw.html', 'text')
+            self.assertIsInstance(sample_store.open_store(root), ShardStore)
+
+    def test_file_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store = FileStore(root)
+            store.write('0001/a-raw.html', '<p>ä</p>')
+            self.assertTrue(Path(root, '0001', 'a-raw.html').is_file())
+            self.assertEqual('<p>ä</p>', store.read(Path('0001', 'a-raw.html')))
+            self.assertEqual('<p>ä</p>'.encode('utf-8'), Path(root, '0001', 'a-raw.html').read_bytes())
+            self.assertFalse(store.exists('0001/b-raw.html'))
+            with self.assertRaises(RuntimeError):
+                with store.open_write('0001/a-raw.html') as file:
+                    file.write('half')
+                    raise RuntimeError()
+            self.assertEqual('<p>ä</p>', store.read('0001/a-raw.html'))  # left as it is
+            self.assertEqual(['a-raw.html'], [path.name for path in Path(root, '0001').iterdir()])
+
+    def test_shards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store = ShardStore(root)
+            for idx in range(5):
+                store.write(f'000{idx % 2}/s{idx}-raw.html', f'<p>sample {idx} ä</p>')
+            self.assertEqual('<p>sample 2 ä</p>', store.read('0000/s2-raw.html'))
+            store.write('0000/s2-raw.html', 'replaced')
+            self.assertEqual(['0000', '0001', 'shards'], sorted(path.name for path in root.iterdir()))
+            self.assertEqual('<p>sample 3 ä</p>', store.read('0001/s3-raw.html'))
+            self.assertEqual('replaced', store.read(Path('0000', 's2-raw.html')))
+            self.assertFalse(store.exists('0000/s1-raw.html'))
+            with self.assertRaises(FileNotFoundError):
+                store.read('0000/s1-raw.html')
+
+            # samples written by another store, like the one of another process
+            other = ShardStore(root)
+            self.assertEqual('<p>sample 4 ä</p>', other.read('0000/s4-raw.html'))
+            other.write('0000/s9-raw.html', 'new')
+            self.assertEqual('new', store.read('0000/s9-raw.html'))
+
+            copy = pickle.loads(pickle.dumps(store))
+            self.assertEqual('replaced', copy.read('0000/s2-raw.html'))
+            store.close()
+            copy.close()
+            other.close()
+
+    def test_writer(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store = ShardStore(root)
+            with store.open_write('0000/a-cleaned.txt') as file:
+                file.write('some ')
+                file.write('words')
+            self.assertEqual('some words', store.read('0000/a-cleaned.txt'))
+            with self.assertRaises(RuntimeError):
+                with store.open_write('0000/b-cleaned.txt') as file:
+                    file.write('half')
+                    raise RuntimeError()
+            self.assertFalse(store.exists('0000/b-cleaned.txt'))
+
+    def test_streaming(self):
+        line = '<p>' + 'word ' * 30 + '</p>\n'
+        text = line * 20_000  # beyond what is spooled in memory
+        for codec in [sample_store.NONE, sample_store.GZIP, sample_store.LZMA]:
+            with tempfile.TemporaryDirectory() as tmp:
+                store = ShardStore(Path(tmp), codec)
+                with store.open_write('0000/a-raw.html') as file:
+                    for _ in range(20_000):
+                        file.write(line)
+                store.write('0000/b-raw.html', 'next')
+                with store.open_read('0000/a-raw.html') as file:
+                    chunks = iter(lambda: file.read(4096), '')
+                    self.assertEqual(text, ''.join(chunks))  # ends where the next sample starts
+                self.assertEqual('next', store.read('0000/b-raw.html'))
+                store.close()
+
+    def test_codecs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            text = '<html><body><p>Boilerplate ä</p></body></html>\n' * 50
+            for codec in [sample_store.GZIP, sample_store.LZMA]:
+                for store in [FileStore(Path(root, codec, 'files'), codec),
+                              ShardStore(Path(root, codec, 'shards'), codec)]:
+                    store.write('0000/plain-raw.html', 'none')
+                    with store.open_write('0000/a-raw.html') as file:
+                        file.write(text)
+                    self.assertEqual(text, store.read('0000/a-raw.html'))
+                    with store.open_read('0000/a-raw.html') as file:
+                        self.assertEqual(text.splitlines(True), file.readlines())
+                    with store.open_binary('0000/a-raw.html') as file:
+                        self.assertEqual(text.encode('utf-8'), file.read())
+                    self.assertEqual(codec, sample_store.read_codec(store.root))
+                    self.assertEqual(codec, sample_store.open_store(store.root).codec)
+                    # samples written without a codec are still read
+                    plain = sample_store.open_store(store.root, codec=sample_store.NONE)
+                    plain.write('0000/b-raw.html', text)
+                    self.assertEqual(text, store.read('0000/b-raw.html'))
+                packed = Path(root, codec, 'files', '0000', 'a-raw.html').read_bytes()
+                self.assertLess(len(packed), len(text) // 5)
+                self.assertEqual(text.encode('utf-8'), sample_store.decompress(packed))
+
+            store = FileStore(Path(root, 'files'))
+            store.write('0000/a-raw.html', text)
+            self.assertEqual(text, Path(root, 'files', '0000', 'a-raw.html').read_text(encoding='utf-8'))
+            self.assertFalse(Path(root, 'files', 'codec').exists())
+
+    def test_pack(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            FileStore(root).write('0000/a-raw.html', '<p>single file</p>')
+            store = ShardStore(root)
+            self.assertEqual('<p>single file</p>', store.read('0000/a-raw.html'))
+            self.assertTrue(store.pack('0000/a-raw.html'))
+            self.assertFalse(Path(root, '0000', 'a-raw.html').exists())
+            self.assertEqual('<p>single file</p>', store.read('0000/a-raw.html'))
+            self.assertFalse(store.pack('0000/a-raw.html'))
+
+
+if __name__ == '__main__':
+    unittest.main()
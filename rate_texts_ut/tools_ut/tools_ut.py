@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.tools import tools, keys
+# autopep8: on
+
+
+class TestTools(unittest.TestCase):
+
+    def test_hash_vocab(self):
+        vocab = np.array(['bart', 'cough'])
+        self.assertEqual(tools.hash_vocab(vocab),
+                         tools.hash_vocab(['bart', 'cough']))
+        self.assertNotEqual(tools.hash_vocab(vocab),
+                            tools.hash_vocab(['cough', 'bart']))
+        self.assertNotEqual(tools.hash_vocab(['ab', 'c']),
+                            tools.hash_vocab(['a', 'bc']))
+
+    def test_extractor(self):
+        vocab = np.array(['bart', 'cough', 'bart cough'])
+        extractor = tools.FeatureExtractor(vocab, (1, 2))
+        for docs in [['bart cough cough', 'cough'], ['nothing here', 'bart bart']]:
+            vect = TfidfVectorizer(use_idf=False, binary=True, norm=None,
+                                   vocabulary=vocab, ngram_range=(1, 2))
+            expect = vect.fit_transform(docs).toarray()
+            self.assertTrue(np.array_equal(
+                expect, extractor.transform(docs).toarray()))
+
+    def test_hashed_extractor(self):
+        extractor = tools.HashedFeatureExtractor(2**10, (1, 2))
+        docs = ['bart cough cough', 'cough', 'a new word']
+        features = extractor.transform(docs)
+        self.assertEqual((3, 2**10), features.shape)
+        self.assertEqual({1.}, set(features.data))
+        self.assertEqual([4, 1, 3], features.getnnz(axis=1).tolist())
+        self.assertEqual(tools.HASHED, extractor.describe()['mode'])
+        self.assertNotEqual(extractor.fingerprint(),
+                            tools.HashedFeatureExtractor(2**12).fingerprint())
+
+    def test_shards(self):
+        docs = [f'word{idx} word{idx % 7} common' for idx in range(50)]
+        extractor = tools.HashedFeatureExtractor(2**10)
+        sharded = tools._transform_in_shards(
+            extractor._vect, docs, workers=2, shard_size=8)
+        self.assertTrue(np.array_equal(
+            extractor.transform(docs).toarray(), sharded.toarray()))
+
+    def test_features_labels(self):
+        vocab = np.array(['bart', 'cough'])
+        file_data = pd.DataFrame({keys.RATING: [1, 0, 1]}, index=[
+                                 'a', 'b', 'c'])
+        docs = pd.Series(['cough', 'bart'], index=['c', 'a'])
+        extractor = tools.FeatureExtractor(vocab)
+        features, labels = tools.get_features_labels(
+            vocab, docs, file_data, extractor=extractor)
+        self.assertEqual([[0, 1], [1, 0]], features.toarray().tolist())
+        self.assertEqual([1, 1], labels.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import tempfile
+from pathlib import Path
+import numpy as np
+import unittest
+import sys
+sys.path.append('..')
+sys.path.append('../..')
+sys.path.append('../../rate_texts')
+# autopep8: off
+from rate_texts.tools import tools
+from rate_texts.tools.vocab_file import VocabFile, write_vocab_file
+# autopep8: on
+
+
+class TestVocabFile(unittest.TestCase):
+
+    def test_write_read(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            words = np.array(['although', 'bart', 'bart coughed', 'café', 'coughed'])
+            path = Path(tmp, 'unit.vocab')
+            vocab_hash = write_vocab_file(path, words)
+            self.assertEqual(tools.hash_vocab(words), vocab_hash)
+
+            vocab = VocabFile(path)
+            self.assertEqual(vocab_hash, vocab.vocab_hash)
+            self.assertEqual(len(words), len(vocab))
+            self.assertEqual(words.tolist(), vocab.to_list())
+            self.assertEqual('café', vocab[3])
+            self.assertEqual('coughed', vocab[-1])
+            for position, word in enumerate(words):
+                self.assertEqual(position, vocab.index(word))
+            self.assertIsNone(vocab.index('cough'))
+            self.assertNotIn('', vocab)
+            with self.assertRaises(IndexError):
+                vocab[5]
+            vocab.close()
+
+    def test_large(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            words = [f'word{idx}' for idx in range(5000)]
+            path = Path(tmp, 'large.vocab')
+            write_vocab_file(path, words)
+            vocab = VocabFile(path)
+            self.assertEqual([4999, 0, 1234], [vocab.index(word) for word in ['word4999', 'word0', 'word1234']])
+            self.assertIsNone(vocab.index('word5000'))
+            array = vocab.to_array()
+            self.assertEqual(np.str_, array.dtype.type)
+            self.assertEqual(words, array.tolist())
+            vocab.close()
+
+    def test_empty(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, 'empty.vocab')
+            write_vocab_file(path, [])
+            vocab = VocabFile(path)
+            self.assertEqual(0, len(vocab))
+            self.assertIsNone(vocab.index('bart'))
+            self.assertEqual(tools.hash_vocab([]), vocab.vocab_hash)
+
+    def test_no_vocab(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, 'unit.txt')
+            path.write_text('although\nbart\n')
+            with self.assertRaises(ValueError):
+                VocabFile(path)
+
+
+if __name__ == '__main__':
+    unittest.main()